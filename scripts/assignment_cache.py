@@ -0,0 +1,195 @@
+import csv
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+
+from bank import atomic_write, bank_generation, ensure_directory, locked
+from orchestrator import render_assignment, select_template, selection_pool
+
+# Hidden directory of a question bank holding pre-rendered assignments; bank
+# scans skip it like any hidden directory
+CACHE_DIRNAME = ".assignment_cache"
+
+# Map of each (student, config) to its current cache entry, kept in the cache directory
+ENTRIES_FILENAME = "entries.json"
+
+def config_digest(config):
+    """Hash an assignment config independently of key order."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+def bank_version(directory="questions"):
+    """Fingerprint the inputs of a rendering: the bank's generation and the templates.
+
+    Reading it costs one stat and two small template reads, however large
+    the bank is.
+    """
+    digest = hashlib.sha256(f"{bank_generation(directory)}\n".encode())
+    for question_type in ("knowledge", "programmatic"):
+        with open(select_template(question_type), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def student_rng(student, digest):
+    """Seed a student's random choices so re-rendering an assignment reproduces it."""
+    return random.Random(hashlib.sha256(f"{student}\0{digest}".encode()).digest())
+
+class AssignmentCache:
+    """Per-student assignments rendered ahead of time and stored by content address.
+
+    An entry's key hashes the student, the config and the bank version (the
+    bank's generation and the templates), so an entry is served only while
+    all three are unchanged; changing one replaces just the entries that
+    depend on it. Looking an entry up never reads the bank: the selection
+    pool is loaded only to render a miss. warm() queues a roster for
+    background worker threads, and get() serves cached entries without
+    rendering.
+    """
+
+    def __init__(self, directory="questions", workers=4):
+        self.directory = directory
+        self.cache_dir = os.path.join(directory, CACHE_DIRNAME)
+        self.workers = workers
+        self.jobs = queue.Queue()
+        self.lock = threading.Lock()
+        self.threads = []
+        self.pools = {}
+        self.errors = []
+        self.entries = self.load_entries()
+        # Entries this process rendered since it last saved
+        self.updated = {}
+
+    def version(self, config):
+        """Return the (config digest, bank version) an entry of a config is keyed on."""
+        return config_digest(config), bank_version(self.directory)
+
+    def pool(self, config, digest, version):
+        """Load a config's selection pool once per bank version."""
+        with self.lock:
+            if (digest, version) not in self.pools:
+                # Pools of earlier bank versions are never used again
+                self.pools = {
+                    key: pool for key, pool in self.pools.items() if key[1] == version
+                }
+                self.pools[digest, version] = selection_pool(config, self.directory)
+            return self.pools[digest, version]
+
+    def key(self, student, digest, version):
+        """Content address of one student's assignment."""
+        return hashlib.sha256(f"{student}\0{digest}\0{version}".encode()).hexdigest()
+
+    def path(self, key):
+        """File of a cache entry."""
+        return os.path.join(self.cache_dir, f"{key}.md")
+
+    def lookup(self, student, config):
+        """Return a cached assignment, or None when it has not been rendered for the current inputs."""
+        digest, version = self.version(config)
+        path = self.path(self.key(student, digest, version))
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return f.read()
+
+    def render(self, student, config):
+        """Render one student's assignment into the cache, replacing the entry it supersedes."""
+        digest, version = self.version(config)
+        key = self.key(student, digest, version)
+        pool = self.pool(config, digest, version)
+        content = render_assignment(config, student_rng(student, digest), self.directory, pool)
+        ensure_directory(self.cache_dir)
+        atomic_write(self.path(key), content)
+        with self.lock:
+            previous = self.entries.get(f"{student}\0{digest}")
+            self.entries[f"{student}\0{digest}"] = key
+            self.updated[f"{student}\0{digest}"] = key
+        if previous and previous != key and os.path.exists(self.path(previous)):
+            os.remove(self.path(previous))
+        return content
+
+    def get(self, student, config):
+        """Serve a student's assignment from the cache, rendering it on a miss."""
+        content = self.lookup(student, config)
+        if content is None:
+            content = self.render(student, config)
+            self.save()
+        return content
+
+    def work(self):
+        """Render queued (student, config) jobs until the process exits."""
+        while True:
+            student, config = self.jobs.get()
+            try:
+                if self.lookup(student, config) is None:
+                    self.render(student, config)
+            except Exception as error:
+                with self.lock:
+                    self.errors.append((student, error))
+            finally:
+                self.jobs.task_done()
+
+    def warm(self, roster, config):
+        """Queue the assignments of a roster that are not cached yet; returns how many were queued."""
+        while len(self.threads) < self.workers:
+            thread = threading.Thread(target=self.work, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        queued = 0
+        for student in roster:
+            if self.lookup(student, config) is None:
+                self.jobs.put((student, config))
+                queued += 1
+        return queued
+
+    def join(self):
+        """Wait for queued renders to finish and persist the entry map."""
+        self.jobs.join()
+        self.save()
+
+    def load_entries(self):
+        """Read the persisted map of each (student, config) to its current entry."""
+        path = os.path.join(self.cache_dir, ENTRIES_FILENAME)
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def save(self):
+        """Merge the entries rendered by this process into the persisted map.
+
+        The map is re-read under the bank lock, so pre-render processes
+        sharing a cache do not drop each other's entries.
+        """
+        path = os.path.join(self.cache_dir, ENTRIES_FILENAME)
+        with self.lock:
+            ensure_directory(self.cache_dir)
+            with locked(path):
+                entries = self.load_entries()
+                entries.update(self.updated)
+                atomic_write(path, json.dumps(entries))
+            self.entries = entries
+            self.updated.clear()
+
+def load_roster(path):
+    """Read student ids from a roster: a CSV with a `student` column, or one id per line."""
+    with open(path, 'r', newline='') as f:
+        first = f.readline()
+        f.seek(0)
+        if "student" in [field.strip() for field in first.split(",")]:
+            return [row["student"] for row in csv.DictReader(f)]
+        return [line.strip() for line in f if line.strip()]
+
+if __name__ == "__main__":
+    import time
+
+    config = {"num_knowledge_questions": 1, "num_programmatic_questions": 1}
+    cache = AssignmentCache('questions')
+    started = time.perf_counter()
+    queued = cache.warm([f"student_{n}" for n in range(100)], config)
+    cache.join()
+    print(f"Pre-rendered {queued} assignments in {time.perf_counter() - started:.2f} s")
+    started = time.perf_counter()
+    cache.get("student_0", config)
+    print(f"Served a cached assignment in {(time.perf_counter() - started) * 1000:.2f} ms")
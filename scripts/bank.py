@@ -0,0 +1,756 @@
+import hashlib
+import atexit
+import json
+import os
+import queue
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import yaml
+
+try:
+    import fcntl
+except ImportError:
+    # Advisory locks are POSIX-only; elsewhere writers rely on atomic renames alone
+    fcntl = None
+
+# Name of the metadata index kept at the root of a question bank
+INDEX_FILENAME = "index.sqlite"
+
+# Name of the answer key store kept at the root of a question bank
+ANSWER_KEYS_FILENAME = "answer_keys.jsonl"
+
+# Name of the layout configuration kept at the root of a sharded question bank
+LAYOUT_FILENAME = "layout.json"
+
+# Hidden file at the root of a question bank whose mtime is bumped whenever
+# questions are written, removed or re-indexed
+GENERATION_FILENAME = ".generation"
+
+# Directory layouts of a question bank: one flat directory, a directory per
+# topic, a directory per id-hash prefix, or hash directories inside topic ones
+LAYOUTS = ("flat", "topic", "hash", "topic_hash")
+
+# Hex digits of an id's hash naming its shard, giving 256 shards
+HASH_PREFIX_LENGTH = 2
+
+# Shard directory of questions without a topic
+NO_TOPIC_DIRECTORY = "other"
+
+# Layout of each question bank this process has used, keyed by directory
+_layouts = {}
+
+# Near-duplicate checks applied by write_question, keyed by output directory
+_duplicate_checks = {}
+
+# Shared tag tuples, so questions with the same tags hold one tuple between them
+_tag_sets = {}
+
+# Directories this process has already created, so makedirs runs once per directory
+_known_directories = set()
+
+# Background writer used by write_question once enable_write_behind() is called
+_write_behind = None
+
+def load_layout(directory="questions"):
+    """Return the bank's directory layout; banks without a layout file are flat."""
+    if directory not in _layouts:
+        path = os.path.join(directory, LAYOUT_FILENAME)
+        layout = "flat"
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                layout = json.load(f).get("layout", "flat")
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown question bank layout in {path}: {layout}")
+        _layouts[directory] = layout
+    return _layouts[directory]
+
+def topic_directory(topic):
+    """Name the shard directory of a topic."""
+    if not topic:
+        return NO_TOPIC_DIRECTORY
+    return re.sub(r"[^a-z0-9_-]+", "_", str(topic).lower()).strip("_") or NO_TOPIC_DIRECTORY
+
+def question_path(directory, question_id, topic=None, layout=None):
+    """Return where a question file lives in the bank's layout."""
+    layout = layout or load_layout(directory)
+    parts = [directory]
+    if layout in ("topic", "topic_hash"):
+        parts.append(topic_directory(topic))
+    if layout in ("hash", "topic_hash"):
+        parts.append(hashlib.md5(question_id.encode()).hexdigest()[:HASH_PREFIX_LENGTH])
+    parts.append(f"{question_id}.md")
+    return os.path.join(*parts)
+
+def find_question(directory, question_id):
+    """Return the path of a question by id, or None if the bank does not hold it.
+
+    Only topic layouts need to look further than one computed path, checking
+    the question's place in each topic directory.
+    """
+    layout = load_layout(directory)
+    if layout not in ("topic", "topic_hash"):
+        path = question_path(directory, question_id, layout=layout)
+        return path if os.path.exists(path) else None
+    with os.scandir(directory) as entries:
+        topics = [entry.name for entry in entries if entry.is_dir() and not entry.name.startswith(".")]
+    for topic in topics:
+        path = question_path(directory, question_id, topic, layout)
+        if os.path.exists(path):
+            return path
+    return None
+
+def iter_question_paths(directory="questions", topic=None):
+    """Yield the path of every question file in the bank, whatever its layout.
+
+    In topic layouts, topic limits the scan to that topic's directory; other
+    layouts yield every question and leave filtering to the caller. Hidden
+    files and directories, like in-flight temporary files, are skipped.
+    """
+    if topic is not None and load_layout(directory) in ("topic", "topic_hash"):
+        directory = os.path.join(directory, topic_directory(topic))
+        if not os.path.isdir(directory):
+            return
+    pending = [directory]
+    while pending:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    pending.append(entry.path)
+                elif entry.name.endswith(".md") and entry.is_file():
+                    yield entry.path
+
+def split_front_matter(text):
+    """Split a question's text into its front matter dict and its body."""
+    if not text.startswith("---"):
+        return {}, text
+    end = text.find("\n---", 3)
+    if end == -1:
+        return {}, text
+    front_matter = yaml.safe_load(text[3:end]) or {}
+    body = text[end + 4:].lstrip("\n")
+    return front_matter, body
+
+def read_front_matter(path):
+    """Read a question's front matter without reading its body."""
+    with open(path, 'r') as f:
+        if f.readline().strip() != "---":
+            return {}
+        lines = []
+        for line in f:
+            if line.strip() == "---":
+                break
+            lines.append(line)
+    return yaml.safe_load("".join(lines)) or {}
+
+def load_question(path):
+    """Load a question file as a (front matter, body) pair."""
+    with open(path, 'r') as f:
+        return split_front_matter(f.read())
+
+def intern_tags(tags):
+    """Return a shared tuple of interned tag strings."""
+    key = tuple(sys.intern(str(tag)) for tag in tags or ())
+    return _tag_sets.setdefault(key, key)
+
+class Question:
+    """Compact in-memory record of a bank question.
+
+    Only the fields used to select questions are kept: repeated strings are
+    interned and the body is read from disk when it is accessed.
+    """
+
+    __slots__ = ("id", "path", "title", "topic", "bloom_level", "difficulty", "tags")
+
+    def __init__(self, id, path, title=None, topic=None, bloom_level=None, difficulty=None, tags=()):
+        self.id = id
+        self.path = path
+        self.title = title
+        self.topic = sys.intern(topic) if topic is not None else None
+        self.bloom_level = sys.intern(bloom_level) if bloom_level is not None else None
+        self.difficulty = int(difficulty) if difficulty is not None else None
+        self.tags = intern_tags(tags)
+
+    @classmethod
+    def from_file(cls, path):
+        """Build a record from a question file's front matter, without reading its body."""
+        front_matter = read_front_matter(path)
+        metadata = front_matter.get("metadata", {})
+        return cls(
+            front_matter.get("id") or os.path.splitext(os.path.basename(path))[0],
+            path,
+            front_matter.get("title"),
+            metadata.get("topic"),
+            metadata.get("bloom_level"),
+            metadata.get("difficulty"),
+            metadata.get("tags")
+        )
+
+    @property
+    def body(self):
+        """The question's body, read from its file."""
+        return load_question(self.path)[1]
+
+    def __repr__(self):
+        return f"Question({self.id!r}, topic={self.topic!r}, difficulty={self.difficulty!r})"
+
+def load_questions(directory="questions", topic=None):
+    """Load a compact record of every question in the bank, or of one topic's questions."""
+    questions = [Question.from_file(path) for path in iter_question_paths(directory, topic)]
+    if topic is not None:
+        questions = [question for question in questions if question.topic == topic]
+    return questions
+
+def enable_duplicate_check(output_dir="questions", suppress=True):
+    """Check every question written to output_dir against the bank's near-duplicate index.
+
+    Near-duplicates are not written when suppress is true (the existing
+    question's path is returned instead) and are flagged in their metadata
+    otherwise. Call save_duplicate_check() to persist the index.
+    """
+    from dedup import load_bank_index
+    _duplicate_checks[output_dir] = (load_bank_index(output_dir), suppress)
+
+def save_duplicate_check(output_dir="questions"):
+    """Persist the near-duplicate index of an output directory."""
+    from dedup import save_bank_index
+    index, _ = _duplicate_checks[output_dir]
+    save_bank_index(index, output_dir)
+
+def new_question_id(id_prefix, attempt=0):
+    """Draw a random question id; later attempts draw from a wider range to escape collisions."""
+    digits = 4 + attempt // 5
+    return f"{id_prefix}_{random.randint(10 ** (digits - 1), 10 ** digits - 1)}"
+
+def ensure_directory(directory):
+    """Create a directory once per process."""
+    if directory not in _known_directories:
+        os.makedirs(directory, exist_ok=True)
+        _known_directories.add(directory)
+
+def bump_generation(directory="questions"):
+    """Mark the bank's questions as changed, invalidating anything keyed on bank_generation()."""
+    ensure_directory(directory)
+    path = os.path.join(directory, GENERATION_FILENAME)
+    with open(path, 'a'):
+        pass
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+def bank_generation(directory="questions"):
+    """Return a token that changes whenever the bank's questions do, read with a single stat."""
+    try:
+        return os.stat(os.path.join(directory, GENERATION_FILENAME)).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+@contextmanager
+def locked(path):
+    """Hold an exclusive advisory lock on a hidden lock file next to path."""
+    directory, name = os.path.split(path)
+    ensure_directory(directory or ".")
+    with open(os.path.join(directory, f".{name}.lock"), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def temporary_path(path):
+    """Name a hidden temporary file next to path, unique to this process and call."""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.{os.getpid()}.{os.urandom(4).hex()}.tmp")
+
+def publish(temp_path, path, replace=True):
+    """Move a complete temporary file to path; without replace, FileExistsError keeps an existing file."""
+    try:
+        if replace:
+            os.replace(temp_path, path)
+        else:
+            os.link(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def atomic_write(path, content, replace=True):
+    """Write a file so readers only ever see its old or its complete new content.
+
+    The content goes to a hidden temporary file in the same directory, which
+    is renamed over path, or hard-linked to it when replace is false so an
+    existing file is never clobbered (FileExistsError is raised instead).
+    """
+    temp_path = temporary_path(path)
+    try:
+        with open(temp_path, 'x') as f:
+            f.write(content)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    publish(temp_path, path, replace)
+
+def reservation_path(path):
+    """Name the hidden file that reserves a question path before its file is published."""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f".{name}.reserved")
+
+def reserve(path):
+    """Claim a question path for one writer, raising FileExistsError if it is taken.
+
+    The hidden reservation is created with O_EXCL, so exactly one writer of
+    any process claims a path; a path whose file already exists is released
+    again. Scans skip reservations like any hidden file.
+    """
+    os.close(os.open(reservation_path(path), os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+    if os.path.exists(path):
+        release(path)
+        raise FileExistsError(path)
+
+def release(path):
+    """Drop the reservation of a question path."""
+    try:
+        os.remove(reservation_path(path))
+    except FileNotFoundError:
+        pass
+
+def append_answer_key(output_dir, record):
+    """Append one record to the bank's answer key store under an exclusive lock."""
+    append_answer_keys(output_dir, [record])
+
+def append_answer_keys(output_dir, records, sync=False):
+    """Append records to the bank's answer key store in one write under an exclusive lock."""
+    with open(os.path.join(output_dir, ANSWER_KEYS_FILENAME), 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        f.write("".join(json.dumps(record) + "\n" for record in records))
+        f.flush()
+        if sync:
+            os.fsync(f.fileno())
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def render_question(front_matter, body):
+    """Render a question file's text from its front matter and body."""
+    return "---\n" + yaml.dump(front_matter, default_flow_style=False) + "---\n\n" + body
+
+class WriteBehind:
+    """Bounded queue of question writes drained in batches by a background thread.
+
+    write_question only picks the file's path and queues the write, blocking
+    when max_pending writes are waiting. A random id is reserved with
+    reserve() when it is queued, so the returned path and id stay final
+    even if another process draws the same id, while the question file
+    itself only appears once it is complete. The writer thread takes up to
+    batch_size writes at a time, keeps only the latest write of each path,
+    writes every file of the batch before fsyncing them together, publishes
+    them and releases their reservations, fsyncs their directories once and
+    appends the batch's answer keys in one locked write.
+    """
+
+    def __init__(self, max_pending=1024, batch_size=256, sync=True):
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.batch_size = batch_size
+        self.sync = sync
+        self.lock = threading.Lock()
+        # Path of each queued question, keyed by (output directory, id)
+        self.queued = {}
+        self.errors = []
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, output_dir, front_matter, body, answer_key=None, id_prefix=None):
+        """Queue a question, returning the path it will be written to."""
+        attempt = 0
+        with self.lock:
+            while True:
+                topic = front_matter.get("metadata", {}).get("topic")
+                file_path = question_path(output_dir, front_matter["id"], topic)
+                if id_prefix is None:
+                    break
+                # Random ids must not collide with a queued write, or with a file of any process
+                ensure_directory(os.path.dirname(file_path))
+                try:
+                    reserve(file_path)
+                    break
+                except FileExistsError:
+                    attempt += 1
+                    front_matter["id"] = new_question_id(id_prefix, attempt)
+            self.queued[output_dir, front_matter["id"]] = file_path
+        self.jobs.put((file_path, output_dir, front_matter, body, answer_key, id_prefix))
+        return file_path
+
+    def queued_path(self, output_dir, question_id):
+        """Return the path of a question that is queued but may not be written yet, or None."""
+        with self.lock:
+            return self.queued.get((output_dir, question_id))
+
+    def run(self):
+        """Drain the queue batch by batch until the None sentinel arrives."""
+        while True:
+            batch = [self.jobs.get()]
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                try:
+                    batch.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            jobs = [job for job in batch if job is not None]
+            try:
+                self.write_batch(jobs)
+            except Exception as error:
+                self.errors.append(error)
+            finally:
+                with self.lock:
+                    for job in jobs:
+                        self.queued.pop((job[1], job[2]["id"]), None)
+                for _ in batch:
+                    self.jobs.task_done()
+            if batch[-1] is None:
+                return
+
+    def write_batch(self, jobs):
+        """Write, sync and publish one batch of questions, then record their answer keys."""
+        # Coalesce: a later write of the same path replaces an earlier one
+        latest = {}
+        for job in jobs:
+            latest.pop(job[0], None)
+            latest[job[0]] = job
+
+        staged = []
+        try:
+            for file_path, output_dir, front_matter, body, answer_key, id_prefix in latest.values():
+                ensure_directory(os.path.dirname(file_path))
+                temp_path = temporary_path(file_path)
+                f = open(temp_path, 'x')
+                staged.append((f, temp_path, file_path, output_dir, front_matter, body, answer_key, id_prefix))
+                f.write(render_question(front_matter, body))
+            for f, *_ in staged:
+                f.flush()
+                if self.sync:
+                    os.fsync(f.fileno())
+                f.close()
+        except BaseException:
+            for f, temp_path, *_ in staged:
+                f.close()
+                os.remove(temp_path)
+            # Release the ids reserved for questions that will not be written
+            for file_path, *_, id_prefix in latest.values():
+                if id_prefix is not None:
+                    release(file_path)
+            raise
+
+        answer_keys = {}
+        directories = set()
+        output_dirs = set()
+        for _, temp_path, file_path, output_dir, front_matter, body, answer_key, id_prefix in staged:
+            # Random ids never replace a file; their reservation is released once published
+            try:
+                publish(temp_path, file_path, replace=id_prefix is None)
+            finally:
+                if id_prefix is not None:
+                    release(file_path)
+            directories.add(os.path.dirname(file_path))
+            output_dirs.add(output_dir)
+            if answer_key is not None:
+                answer_keys.setdefault(output_dir, []).append({"id": front_matter["id"], **answer_key})
+
+        if self.sync and hasattr(os, "O_DIRECTORY"):
+            for directory in directories:
+                descriptor = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(descriptor)
+                finally:
+                    os.close(descriptor)
+        for output_dir, records in answer_keys.items():
+            append_answer_keys(output_dir, records, sync=self.sync)
+        for output_dir in output_dirs:
+            bump_generation(output_dir)
+
+    def flush(self):
+        """Block until every queued write is on disk, raising the first error the writer hit."""
+        self.jobs.join()
+        if self.errors:
+            error = self.errors[0]
+            self.errors.clear()
+            raise error
+
+    def close(self):
+        """Flush the queue and stop the writer thread."""
+        self.jobs.put(None)
+        self.thread.join()
+        if self.errors:
+            raise self.errors[0]
+
+def enable_write_behind(max_pending=1024, batch_size=256, sync=True):
+    """Route write_question through a background writer, flushed at the latest when the process exits.
+
+    write_question then returns as soon as a question is queued, so its file
+    may not exist yet: call flush_writes() before reading questions back.
+    """
+    global _write_behind
+    if _write_behind is None:
+        _write_behind = WriteBehind(max_pending, batch_size, sync)
+        atexit.register(disable_write_behind)
+    return _write_behind
+
+def flush_writes():
+    """Wait until every queued question and answer key is written."""
+    if _write_behind is not None:
+        _write_behind.flush()
+
+def disable_write_behind():
+    """Flush the background writer and return write_question to writing synchronously."""
+    global _write_behind
+    writer, _write_behind = _write_behind, None
+    if writer is not None:
+        atexit.unregister(disable_write_behind)
+        writer.close()
+
+@contextmanager
+def background_writes(enabled=True):
+    """Route write_question through the background writer within a block, flushing it when the block exits.
+
+    The queue is flushed even when the block raises; with enabled false
+    writes stay synchronous.
+    """
+    if not enabled:
+        yield
+        return
+    enable_write_behind()
+    try:
+        yield
+    finally:
+        disable_write_behind()
+
+def write_question(output_dir, front_matter, body, answer_key=None, id_prefix=None):
+    """Write a question file and append its answer record to the bank's key store.
+
+    The file is published atomically, so concurrent writers never produce
+    torn files. Questions with a random id (id_prefix given) never replace an
+    existing file: on a collision the id is redrawn with new_question_id.
+    Other questions, like definitions keyed by their title, replace the
+    previous version. After enable_write_behind() the write is queued for a
+    background writer and the returned path is where it will appear.
+    """
+    check = _duplicate_checks.get(output_dir)
+    if check is not None:
+        index, suppress = check
+        signature = index.signature(body)
+        duplicates = index.query_signature(signature, exclude=front_matter["id"])
+        existing = None
+        if duplicates and suppress:
+            # A duplicate may still be queued for the background writer; check the queue
+            # first, since a queued write leaves it only once its file is published
+            if _write_behind is not None:
+                existing = _write_behind.queued_path(output_dir, duplicates[0][0])
+            existing = existing or find_question(output_dir, duplicates[0][0])
+        if existing:
+            return existing
+        if duplicates:
+            front_matter["metadata"]["near_duplicates"] = [key for key, _ in duplicates]
+
+    if _write_behind is not None:
+        file_path = _write_behind.submit(output_dir, front_matter, body, answer_key, id_prefix)
+        if check is not None:
+            index.add_signature(front_matter["id"], signature)
+        return file_path
+
+    attempt = 0
+    while True:
+        file_path = question_path(output_dir, front_matter["id"], front_matter.get("metadata", {}).get("topic"))
+        ensure_directory(os.path.dirname(file_path))
+        try:
+            if id_prefix is None:
+                atomic_write(file_path, render_question(front_matter, body))
+                break
+            # Reserve random ids so a path queued by a background writer is not taken
+            reserve(file_path)
+            try:
+                atomic_write(file_path, render_question(front_matter, body), replace=False)
+            finally:
+                release(file_path)
+            break
+        except FileExistsError:
+            attempt += 1
+            front_matter["id"] = new_question_id(id_prefix, attempt)
+
+    if check is not None:
+        index.add_signature(front_matter["id"], signature)
+
+    # Record the machine-readable answer in the same pass
+    if answer_key is not None:
+        append_answer_key(output_dir, {"id": front_matter["id"], **answer_key})
+    bump_generation(output_dir)
+
+    return file_path
+
+def load_answer_keys(directory="questions"):
+    """Load the bank's answer keys, keeping the latest record for each question."""
+    answer_keys = {}
+    path = os.path.join(directory, ANSWER_KEYS_FILENAME)
+    if not os.path.exists(path):
+        return answer_keys
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                answer_keys[record["id"]] = record
+    return answer_keys
+
+def iter_answer_keys(directory="questions", batch_size=10000):
+    """Yield the latest answer key of each question in store order, without holding the store in memory.
+
+    A first pass records the offset of each question's latest record in a
+    temporary SQLite database, which spills to disk as it grows; a second
+    pass reads those records back.
+    """
+    path = os.path.join(directory, ANSWER_KEYS_FILENAME)
+    if not os.path.exists(path):
+        return
+    connection = sqlite3.connect("")
+    try:
+        connection.execute("CREATE TABLE latest (id TEXT PRIMARY KEY, offset INTEGER)")
+        with open(path, 'rb') as f:
+            rows = []
+            offset = 0
+            for line in f:
+                if line.strip():
+                    rows.append((json.loads(line)["id"], offset))
+                if len(rows) >= batch_size:
+                    connection.executemany("INSERT OR REPLACE INTO latest VALUES (?, ?)", rows)
+                    rows.clear()
+                offset += len(line)
+            connection.executemany("INSERT OR REPLACE INTO latest VALUES (?, ?)", rows)
+            for (offset,) in connection.execute("SELECT offset FROM latest ORDER BY offset"):
+                f.seek(offset)
+                yield json.loads(f.readline())
+    finally:
+        connection.close()
+
+def open_index(directory="questions"):
+    """Open the bank's metadata index, creating it if needed."""
+    connection = sqlite3.connect(os.path.join(directory, INDEX_FILENAME))
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS questions ("
+        "id TEXT PRIMARY KEY, path TEXT NOT NULL, topic TEXT, bloom_level TEXT, "
+        "difficulty INTEGER, tags TEXT, mtime_ns INTEGER, size INTEGER)"
+    )
+    # Response statistics from graded results, kept apart from the file metadata
+    # that update_index rewrites; the sums are the running totals item_analysis adds to
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS item_statistics ("
+        "id TEXT PRIMARY KEY, responses INTEGER, score_sum REAL, "
+        "pairs INTEGER, pair_score_sum REAL, pair_score_squares REAL, "
+        "rest_sum REAL, rest_squares REAL, product_sum REAL, "
+        "p_value REAL, discrimination REAL, difficulty INTEGER)"
+    )
+    return connection
+
+def load_calibrated_difficulties(directory="questions"):
+    """Map question ids to the difficulty calibrated from student results, if any were analyzed."""
+    if not os.path.exists(os.path.join(directory, INDEX_FILENAME)):
+        return {}
+    connection = open_index(directory)
+    difficulties = dict(connection.execute(
+        "SELECT id, difficulty FROM item_statistics WHERE difficulty IS NOT NULL"
+    ))
+    connection.close()
+    return difficulties
+
+def build_index(directory="questions"):
+    """Bring the bank's metadata index up to date, re-reading only changed files.
+
+    Concurrent updates of one bank are serialized by an advisory lock.
+    """
+    with locked(os.path.join(directory, INDEX_FILENAME)):
+        return update_index(directory)
+
+def update_index(directory):
+    """Re-index the bank's changed files; callers hold the index lock."""
+    connection = open_index(directory)
+    known = {
+        path: (mtime_ns, size)
+        for path, mtime_ns, size in connection.execute("SELECT path, mtime_ns, size FROM questions")
+    }
+
+    seen = set()
+    updated = 0
+    for path in iter_question_paths(directory):
+        seen.add(path)
+        stat = os.stat(path)
+        if known.get(path) == (stat.st_mtime_ns, stat.st_size):
+            continue
+        front_matter = read_front_matter(path)
+        metadata = front_matter.get("metadata", {})
+        question_id = front_matter.get("id") or os.path.splitext(os.path.basename(path))[0]
+        connection.execute("DELETE FROM questions WHERE path = ?", (path,))
+        connection.execute(
+            "INSERT OR REPLACE INTO questions VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                question_id,
+                path,
+                metadata.get("topic"),
+                metadata.get("bloom_level"),
+                metadata.get("difficulty"),
+                json.dumps(metadata.get("tags", [])),
+                stat.st_mtime_ns,
+                stat.st_size
+            )
+        )
+        updated += 1
+
+    removed = known.keys() - seen
+    connection.executemany("DELETE FROM questions WHERE path = ?", [(path,) for path in removed])
+    connection.commit()
+    connection.close()
+    # Also catches questions edited or deleted by hand since the last update
+    if updated or removed:
+        bump_generation(directory)
+
+    return {"indexed": len(seen), "updated": updated, "removed": len(removed)}
+
+def migrate_layout(directory, layout):
+    """Move every question of a bank into another directory layout and re-index it.
+
+    Files are renamed in place, so the migration is cheap and can be re-run
+    after an interruption; it should not run while generators write to the
+    bank. Returns how many questions were moved.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown question bank layout: {layout}")
+    moved = 0
+    with locked(os.path.join(directory, LAYOUT_FILENAME)):
+        for path in list(iter_question_paths(directory)):
+            question_id = os.path.splitext(os.path.basename(path))[0]
+            topic = None
+            if layout in ("topic", "topic_hash"):
+                topic = read_front_matter(path).get("metadata", {}).get("topic")
+            target = question_path(directory, question_id, topic, layout)
+            if target != path:
+                ensure_directory(os.path.dirname(target))
+                os.replace(path, target)
+                moved += 1
+
+        # Drop the shard directories the old layout leaves empty
+        for root, _, files in os.walk(directory, topdown=False):
+            if root != directory and not files and not os.listdir(root):
+                os.rmdir(root)
+                _known_directories.discard(root)
+
+        atomic_write(os.path.join(directory, LAYOUT_FILENAME), json.dumps({"layout": layout}) + "\n")
+        _layouts[directory] = layout
+    build_index(directory)
+    return moved
+
+if __name__ == "__main__":
+    summary = build_index('questions')
+    print(f"Indexed {summary['indexed']} questions "
+          f"({summary['updated']} updated, {summary['removed']} removed)")
@@ -0,0 +1,318 @@
+import json
+import os
+import re
+
+from bank import atomic_write, bump_generation, find_question, write_question
+from concept_index import content_hash
+from difficulty import score_difficulty
+from extract_definitions import load_template, process_textbook_file, substitute_placeholders
+
+# Name of the manifest of ingested canvas nodes kept at the root of a question bank
+CANVAS_MANIFEST_FILENAME = "canvas_manifest.json"
+
+# Start of the nodes array in a canvas file
+NODES_START = re.compile(r'"nodes"\s*:\s*\[')
+
+# Fenced code blocks inside a text node
+FENCED_CODE = re.compile(r"```[ \t]*(?:csharp|cs|c#)?[ \t]*\n(.*?)```", re.DOTALL | re.IGNORECASE)
+
+# Lines of C# a text node must consist of to be read as a snippet
+CODE_LINE = re.compile(r"(.*[;{}]|//.*|(for|foreach|while|if|else|do|switch)\b.*)")
+
+# A Console output statement on its own line
+OUTPUT_STATEMENT = re.compile(r"Console\.(WriteLine|Write)\((.*)\);")
+
+ARITHMETIC_TOKEN = re.compile(r"\s*(\d+|[-+*/%()])")
+
+STRING_ESCAPES = {'"': '"', "\\": "\\", "n": "\n", "t": "\t", "'": "'"}
+
+def iter_canvas_nodes(path, chunk_size=1 << 16):
+    """Yield the nodes of an Obsidian canvas one at a time, reading the file in chunks.
+
+    Only the current node is held in memory besides the read buffer, so
+    canvases far larger than memory allows to json.load can be ingested.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r') as f:
+        buffer = ""
+        position = 0
+        at_end = False
+
+        def fill():
+            nonlocal buffer, position, at_end
+            chunk = f.read(chunk_size)
+            at_end = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+
+        while True:
+            match = NODES_START.search(buffer)
+            if match:
+                position = match.end()
+                break
+            if at_end:
+                return
+            # Keep enough of the tail to find a key split across chunks
+            position = max(0, len(buffer) - 16)
+            fill()
+
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                if at_end:
+                    raise ValueError(f"Unterminated nodes array in {path}")
+                fill()
+                continue
+            if buffer[position] == "]":
+                return
+            try:
+                node, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The node continues past the buffer
+                if at_end:
+                    raise
+                fill()
+                continue
+            yield node
+
+def code_snippets(text):
+    """Return the C# snippets of a text node: its fenced code blocks, or the whole text if it is code."""
+    fenced = [block.strip() for block in FENCED_CODE.findall(text) if block.strip()]
+    if fenced:
+        return fenced
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    if lines and all(CODE_LINE.fullmatch(line) for line in lines) and any(line.endswith(";") for line in lines):
+        return [text.strip()]
+    return []
+
+def evaluate_arithmetic(expression):
+    """Evaluate a C# int expression of literals with + - * / % and parentheses, or return None."""
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = ARITHMETIC_TOKEN.match(expression, position)
+        if not match:
+            return None
+        tokens.append(match.group(1))
+        position = match.end()
+    index = 0
+
+    def peek():
+        return tokens[index] if index < len(tokens) else None
+
+    def take():
+        nonlocal index
+        index += 1
+        return tokens[index - 1]
+
+    def parse_sum():
+        value = parse_product()
+        while peek() in ("+", "-"):
+            value = value + parse_product() if take() == "+" else value - parse_product()
+        return value
+
+    def parse_product():
+        value = parse_factor()
+        while peek() in ("*", "/", "%"):
+            operator = take()
+            right = parse_factor()
+            if operator == "*":
+                value *= right
+                continue
+            if right == 0:
+                raise ZeroDivisionError
+            # C# integer division truncates toward zero
+            quotient = abs(value) // abs(right) * (1 if (value < 0) == (right < 0) else -1)
+            value = quotient if operator == "/" else value - right * quotient
+        return value
+
+    def parse_factor():
+        token = take()
+        if token == "-":
+            return -parse_factor()
+        if token == "(":
+            value = parse_sum()
+            if take() != ")":
+                raise ValueError
+            return value
+        return int(token)
+
+    try:
+        value = parse_sum()
+    except (IndexError, ValueError, ZeroDivisionError):
+        return None
+    return value if index == len(tokens) else None
+
+def evaluate_string(literal):
+    """Evaluate a C# string literal, regular or interpolated with int arithmetic holes, or return None."""
+    interpolated = literal.startswith('$')
+    if interpolated:
+        literal = literal[1:]
+    if len(literal) < 2 or literal[0] != '"' or literal[-1] != '"':
+        return None
+    text = literal[1:-1]
+    result = []
+    position = 0
+    while position < len(text):
+        char = text[position]
+        if char == "\\":
+            escaped = STRING_ESCAPES.get(text[position + 1:position + 2])
+            if escaped is None:
+                return None
+            result.append(escaped)
+            position += 2
+        elif char == '"':
+            return None
+        elif interpolated and text.startswith(("{{", "}}"), position):
+            result.append(char)
+            position += 2
+        elif interpolated and char == "{":
+            end = text.find("}", position)
+            value = evaluate_arithmetic(text[position + 1:end]) if end != -1 else None
+            if value is None:
+                return None
+            result.append(str(value))
+            position = end + 1
+        else:
+            result.append(char)
+            position += 1
+    return "".join(result)
+
+def predict_output(code):
+    """Return what a snippet of Console output statements prints, or None if it does anything else."""
+    output = []
+    for line in code.splitlines():
+        line = line.strip()
+        if not line or line.startswith("//"):
+            continue
+        match = OUTPUT_STATEMENT.fullmatch(line)
+        if not match:
+            return None
+        method, argument = match.groups()
+        argument = argument.strip()
+        if not argument:
+            value = ""
+        elif argument.startswith(('"', '$"')):
+            value = evaluate_string(argument)
+        else:
+            value = evaluate_arithmetic(argument)
+        if value is None:
+            return None
+        output.append(f"{value}\n" if method == "WriteLine" else str(value))
+    return "".join(output)
+
+def generate_canvas_question(code, question_id, canvas_path, node_id, node_hash, output_dir="questions"):
+    """Generate a code reading question from a canvas snippet using the apply_code.md template."""
+    expected_output = predict_output(code)
+    question_text = "What does this code print? Explain how each value in the output is computed."
+    front_matter = {
+        "id": question_id,
+        "question_text": question_text,
+        "code_snippet": code,
+        "metadata": {
+            "topic": "code",
+            "bloom_level": "apply",
+            "difficulty": score_difficulty(code, 1),
+            "tags": ["code", "output", "canvas"],
+            "source": canvas_path,
+            "source_root": os.getcwd(),
+            "source_hash": node_hash,
+            "canvas_node": node_id
+        }
+    }
+    template_content = load_template('apply_code.md')
+    filled_template = substitute_placeholders(template_content, {
+        "CODE_SNIPPET": code,
+        "QUESTION_TEXT": question_text
+    })
+
+    # Snippets beyond simple output statements are graded by hand against the code
+    answer_key = {"type": "code_output", "code": code, "expected_output": expected_output}
+    return write_question(output_dir, front_matter, filled_template, answer_key)
+
+def load_canvas_manifest(output_dir="questions"):
+    """Load the node hashes and question ids recorded by earlier ingests."""
+    path = os.path.join(output_dir, CANVAS_MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_canvas_manifest(manifest, output_dir="questions"):
+    """Persist the canvas manifest next to the questions."""
+    os.makedirs(output_dir, exist_ok=True)
+    atomic_write(os.path.join(output_dir, CANVAS_MANIFEST_FILENAME), json.dumps(manifest, indent=1, sort_keys=True))
+
+def ingest_canvas(canvas_path, output_dir="questions", vault_dir=None, force=False):
+    """Turn a canvas's code text nodes into questions and extract its linked chapters.
+
+    Each node's content hash is recorded in the canvas manifest: unchanged
+    nodes are skipped unless one of their questions was deleted, changed
+    nodes replace their questions and the questions of removed nodes are
+    deleted. File nodes are resolved against
+    vault_dir (default: the canvas's directory), and linked Markdown
+    chapters whose content changed go through definition extraction.
+    Returns the paths of the questions written.
+    """
+    canvas_path = str(canvas_path)
+    vault_dir = vault_dir or os.path.dirname(canvas_path)
+    manifest = load_canvas_manifest(output_dir)
+    previous = {} if force else manifest.get(canvas_path, {})
+    previous_nodes = previous.get("nodes", {})
+    previous_files = previous.get("files", {})
+    nodes = {}
+    files = {}
+    written = []
+    skipped = 0
+
+    for node in iter_canvas_nodes(canvas_path):
+        node_id = node.get("id")
+        if node.get("type") == "text" and node_id:
+            node_hash = content_hash(node.get("text", ""))
+            previous_node = previous_nodes.get(node_id, {})
+            # A node is only skipped while all of its questions are still in the bank
+            if previous_node.get("hash") == node_hash and all(
+                find_question(output_dir, question_id) for question_id in previous_node["questions"]
+            ):
+                nodes[node_id] = previous_node
+                skipped += 1
+                continue
+            snippets = code_snippets(node.get("text", ""))
+            question_ids = [
+                f"canvas_{node_id}" if len(snippets) == 1 else f"canvas_{node_id}_{number}"
+                for number in range(1, len(snippets) + 1)
+            ]
+            for code, question_id in zip(snippets, question_ids):
+                written.append(generate_canvas_question(code, question_id, canvas_path, node_id, node_hash,
+                                                        output_dir))
+            nodes[node_id] = {"hash": node_hash, "questions": question_ids}
+        elif node.get("type") == "file" and node.get("file", "").endswith(".md"):
+            chapter = os.path.join(vault_dir, node["file"])
+            if not os.path.exists(chapter):
+                print(f"Linked chapter not found: {chapter}")
+                continue
+            with open(chapter, 'r') as f:
+                file_hash = content_hash(f.read())
+            files[chapter] = file_hash
+            if previous_files.get(chapter) != file_hash:
+                process_textbook_file(chapter, output_dir)
+
+    # Questions of nodes that were removed or no longer hold the same snippets
+    current = {question_id for node in nodes.values() for question_id in node["questions"]}
+    for node in previous_nodes.values():
+        for question_id in node["questions"]:
+            path = find_question(output_dir, question_id) if question_id not in current else None
+            if path:
+                os.remove(path)
+                bump_generation(output_dir)
+
+    manifest[canvas_path] = {"nodes": nodes, "files": files}
+    save_canvas_manifest(manifest, output_dir)
+    print(f"Ingested {canvas_path}: {len(written)} code questions written, {skipped} unchanged nodes skipped")
+    return written
+
+if __name__ == "__main__":
+    for question_path in ingest_canvas('textbook/Level 0.canvas'):
+        print(f"- {question_path}")
@@ -0,0 +1,397 @@
+import argparse
+import sys
+
+# Only the standard library modules needed to parse arguments are imported at
+# startup; each command imports the scripts (and yaml/frontmatter) it needs.
+
+# Question types accepted by `generate`, mapped to generate_<type>_question
+GENERATORS = (
+    "loop",
+    "off_by_one",
+    "nested_loop",
+    "boolean_expression",
+    "numeric_expression",
+    "mixed_expression",
+    "truth_table",
+    "variable_assignment",
+    "variable_scope",
+    "variable_state"
+)
+
+# Default assignment configuration used when `assemble` is given no config file
+DEFAULT_ASSIGNMENT_CONFIG = {
+    "num_knowledge_questions": 1,
+    "num_programmatic_questions": 1,
+    "topics": ["arrays"],
+    "bloom_levels": ["knowledge"]
+}
+
+# Cold-start budget for `--help`, in milliseconds
+STARTUP_TARGET_MS = 50
+
+def load_config(path):
+    """Load a JSON or YAML configuration file."""
+    if path is None:
+        return {}
+    with open(path, 'r') as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            return yaml.safe_load(f) or {}
+        import json
+        return json.load(f)
+
+def run_extract(args, config):
+    """Extract definition questions from the textbook."""
+    from bank import background_writes
+    from extract_definitions import process_textbook_definitions
+
+    textbook_dir = args.textbook_dir or config.get("textbook_dir", "textbook")
+    output_dir = args.output_dir or config.get("output_dir", "questions")
+    workers = args.workers or config.get("workers")
+    include = args.include or config.get("include", ["*.md"])
+    exclude = args.exclude or config.get("exclude", [])
+    write_behind = args.write_behind or config.get("write_behind", False)
+    with background_writes(write_behind):
+        generated_files = process_textbook_definitions(
+            textbook_dir, output_dir, workers, include, exclude, force=args.force
+        )
+    print(f"Generated {len(generated_files)} definition questions")
+
+def run_ingest(args, config):
+    """Turn the code nodes of Obsidian canvases into questions."""
+    from canvas import ingest_canvas
+
+    output_dir = args.output_dir or config.get("output_dir", "questions")
+    vault_dir = args.vault_dir or config.get("vault_dir")
+    generated_files = []
+    for canvas_path in args.canvases or config.get("canvases", []):
+        generated_files.extend(ingest_canvas(canvas_path, output_dir, vault_dir, force=args.force))
+    print(f"Generated {len(generated_files)} canvas questions")
+
+def run_generate(args, config):
+    """Generate programmatic questions of the requested types."""
+    import bank
+    import generate_questions
+
+    types = args.types or config.get("types", ["loop"])
+    count = args.count or config.get("count", 1)
+    output_dir = args.output_dir or config.get("output_dir", "questions")
+    near_duplicates = args.near_duplicates or config.get("near_duplicates", "keep")
+    write_behind = args.write_behind or config.get("write_behind", False)
+    if near_duplicates != "keep":
+        bank.enable_duplicate_check(output_dir, suppress=near_duplicates == "skip")
+    try:
+        with bank.background_writes(write_behind):
+            for question_type in types:
+                if question_type not in GENERATORS:
+                    raise ValueError(f"Unknown question type: {question_type}")
+                generator = getattr(generate_questions, f"generate_{question_type}_question")
+                for _ in range(count):
+                    print(generator(output_dir=output_dir))
+    finally:
+        # Keep the signatures of every question written before a failure
+        if near_duplicates != "keep":
+            bank.save_duplicate_check(output_dir)
+
+def run_assemble(args, config):
+    """Create an assignment from the question bank."""
+    if args.student:
+        from assignment_cache import AssignmentCache
+
+        content = AssignmentCache().get(args.student, config or DEFAULT_ASSIGNMENT_CONFIG)
+        with open('assignment.md', 'w') as f:
+            f.write(content)
+        print(f"Generated assignment.md for {args.student}")
+        return
+    from orchestrator import create_assignment
+
+    create_assignment(config or DEFAULT_ASSIGNMENT_CONFIG)
+    print("Generated assignment.md")
+
+def run_practice(args, config):
+    """Record practice responses and pick a student's next question adaptively."""
+    from adaptive import practice_question, practice_session
+
+    directory = args.directory or config.get("directory", "questions")
+    results_path = args.results or config.get("results")
+    student = args.student or config.get("student")
+    topic = args.topic or config.get("topic")
+    if args.question is not None and (student is None or args.score is None):
+        raise ValueError("--question needs --student and --score")
+    with practice_session(directory) as selector:
+        if results_path is not None:
+            from item_analysis import iter_results
+
+            recorded = selector.record_responses(iter_results(results_path))
+            print(f"Recorded {recorded} responses from {results_path}")
+        if args.question is not None:
+            selector.record_responses([(student, args.question, args.score)])
+        if student is None:
+            return
+        picked = practice_question(selector, student, directory, topic)
+    if picked is None:
+        print(f"No unseen practice questions left for {student}")
+        return
+    question_id, path = picked
+    from bank import load_question
+
+    with open('practice.md', 'w') as f:
+        f.write(load_question(path)[1])
+    print(f"Next question for {student}: {question_id} ({path}), written to practice.md")
+
+def run_prerender(args, config):
+    """Pre-render a roster's assignments into the assignment cache."""
+    from assignment_cache import AssignmentCache, load_roster
+
+    roster = load_roster(args.roster)
+    cache = AssignmentCache(workers=args.workers or 4)
+    queued = cache.warm(roster, config or DEFAULT_ASSIGNMENT_CONFIG)
+    cache.join()
+    for student, error in cache.errors:
+        print(f"Could not render the assignment of {student}: {error}")
+    print(f"Rendered {queued - len(cache.errors)} assignments; "
+          f"{len(roster) - queued} were already cached")
+
+def run_index(args, config):
+    """Bring the question bank's metadata index up to date."""
+    from bank import build_index
+
+    directory = args.directory or config.get("directory", "questions")
+    summary = build_index(directory)
+    print(f"Indexed {summary['indexed']} questions "
+          f"({summary['updated']} updated, {summary['removed']} removed)")
+
+def run_migrate(args, config):
+    """Move the question bank into another directory layout."""
+    from bank import migrate_layout
+
+    directory = args.directory or config.get("directory", "questions")
+    layout = args.layout
+    moved = migrate_layout(directory, layout)
+    print(f"Moved {moved} questions into the {layout} layout")
+
+def run_compact(args, config):
+    """Drop orphaned, stale and duplicate questions from the bank."""
+    from compact import compact_bank
+
+    directory = args.directory or config.get("directory", "questions")
+    archive = args.archive or config.get("archive", False)
+    summary = compact_bank(directory, archive=archive, dry_run=args.dry_run)
+    action = "Would drop" if args.dry_run else "Archived" if archive else "Removed"
+    for reason in ("orphaned", "stale", "duplicate"):
+        print(f"{action} {len(summary[reason])} {reason} questions")
+    print(f"Kept {summary['kept']} questions")
+
+def run_export(args, config):
+    """Stream the question bank into an LMS import file or columnar tables."""
+    export_format = args.format or config.get("format", "qti")
+    directory = args.directory or config.get("directory", "questions")
+    if export_format in ("parquet", "arrow"):
+        from columnar_export import export_bank
+
+        output_dir = args.output or config.get("output", f"questions_{export_format}")
+        results_path = args.results or config.get("results")
+        counts = export_bank(directory, output_dir, export_format, results_path)
+        print(", ".join(f"{count} {table}" for table, count in counts.items()) + f" exported to {output_dir}")
+        return
+    import lms_export
+
+    if export_format == "qti":
+        output_path = args.output or config.get("output", "questions_qti.zip")
+        count = lms_export.export_qti(directory, output_path)
+    else:
+        output_path = args.output or config.get("output", "questions_moodle.xml")
+        count = lms_export.export_moodle(directory, output_path)
+    print(f"Exported {count} questions to {output_path}")
+
+def run_dedup(args, config):
+    """Report near-duplicate questions in the bank."""
+    from dedup import find_near_duplicates
+
+    directory = args.directory or config.get("directory", "questions")
+    pairs = find_near_duplicates(directory)
+    for question_id, other_id, similarity in pairs:
+        print(f"{question_id} ~ {other_id} ({similarity:.2f})")
+    print(f"Found {len(pairs)} near-duplicate pairs")
+
+def run_grade(args, config):
+    """Grade a submissions file against the bank's answer keys."""
+    import json
+    from grader import grade_submissions
+
+    directory = args.directory or config.get("directory", "questions")
+    results_path = args.results or config.get("results", "graded.csv")
+    report = grade_submissions(args.submissions, results_path, directory)
+    report_path = args.report or config.get("report", "item_stats.json")
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Graded {len(report['items'])} questions ({report['ungraded']} submissions not gradable); "
+          f"scores in {results_path}, item statistics in {report_path}")
+
+def run_analyze(args, config):
+    """Calibrate question difficulty from graded student results."""
+    from item_analysis import analyze_results, flagged_items
+
+    directory = args.directory or config.get("directory", "questions")
+    report = analyze_results(args.results, directory)
+    calibrated = sum(1 for item in report.values() if item["difficulty"] is not None)
+    print(f"Analyzed {len(report)} questions, {calibrated} with enough responses to calibrate")
+    for question_id in flagged_items(report):
+        print(f"Low discrimination: {question_id} ({report[question_id]['discrimination']:.2f})")
+
+def run_watch(args, config):
+    """Watch the textbook and templates, rebuilding affected outputs."""
+    from watch import watch
+
+    watch(
+        textbook_dir=args.textbook_dir or config.get("textbook_dir", "textbook"),
+        output_dir=args.output_dir or config.get("output_dir", "questions"),
+        assignment_config=config.get("assignment")
+    )
+
+def measure_startup(runs=20):
+    """Time cold starts of `cli.py --help` in fresh interpreters, in milliseconds."""
+    import subprocess
+    import time
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, __file__, "--help"], stdout=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {"min": timings[0], "median": timings[len(timings) // 2], "max": timings[-1]}
+
+def measure_memory(directory="questions"):
+    """Measure the bytes held per question by frontmatter.Post objects and by Question records."""
+    import tracemalloc
+    import frontmatter
+    from bank import Question, iter_question_paths
+
+    paths = list(iter_question_paths(directory))
+    if not paths:
+        raise ValueError(f"No questions to load in {directory}")
+    per_question = {}
+    for name, load in (("frontmatter.Post", frontmatter.load), ("Question", Question.from_file)):
+        tracemalloc.start()
+        questions = [load(path) for path in paths]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        per_question[name] = current / len(questions)
+        del questions
+    return len(paths), per_question
+
+def run_bench(args, config):
+    """Run a benchmark and report it against its target."""
+    benchmark = args.benchmark or config.get("benchmark", "startup")
+    if benchmark == "memory":
+        directory = args.directory or config.get("directory", "questions")
+        count, per_question = measure_memory(directory)
+        print(f"Memory held per question over {count} questions:")
+        for name, size in per_question.items():
+            print(f"  {name}: {size:.0f} bytes")
+        return
+    runs = args.runs or config.get("runs", 20)
+    timings = measure_startup(runs)
+    status = "OK" if timings["median"] <= STARTUP_TARGET_MS else "OVER TARGET"
+    print(f"--help cold start over {runs} runs: min {timings['min']:.1f} ms, "
+          f"median {timings['median']:.1f} ms, max {timings['max']:.1f} ms "
+          f"(target {STARTUP_TARGET_MS} ms: {status})")
+
+def build_parser():
+    """Build the argument parser with one subcommand per script."""
+    parser = argparse.ArgumentParser(prog="cli.py", description="Question bank tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name, handler, help_text):
+        subparser = subparsers.add_parser(name, help=help_text)
+        subparser.add_argument("--config", help="JSON or YAML configuration file")
+        subparser.set_defaults(handler=handler)
+        return subparser
+
+    extract = add_command("extract", run_extract, "extract definition questions from the textbook")
+    extract.add_argument("--textbook-dir")
+    extract.add_argument("--output-dir")
+    extract.add_argument("--workers", type=int, help="parsing processes (default: one per core)")
+    extract.add_argument("--include", action="append", help="glob of textbook files to extract (repeatable)")
+    extract.add_argument("--exclude", action="append", help="glob of textbook paths to skip (repeatable)")
+    extract.add_argument("--force", action="store_true", help="re-extract files the manifest marks as unchanged")
+    extract.add_argument("--write-behind", action="store_true", help="queue question writes for a background writer")
+
+    ingest = add_command("ingest", run_ingest, "turn code nodes of .canvas files into questions")
+    ingest.add_argument("canvases", nargs="*", metavar="canvas")
+    ingest.add_argument("--output-dir")
+    ingest.add_argument("--vault-dir", help="directory that canvas file links are relative to")
+    ingest.add_argument("--force", action="store_true", help="re-ingest nodes the manifest marks as unchanged")
+
+    generate = add_command("generate", run_generate, "generate programmatic questions")
+    generate.add_argument("types", nargs="*", metavar="type", help=f"one of: {', '.join(GENERATORS)}")
+    generate.add_argument("--count", type=int, help="questions to generate per type")
+    generate.add_argument("--output-dir")
+    generate.add_argument("--near-duplicates", choices=["keep", "flag", "skip"],
+                          help="what to do with questions that nearly duplicate the bank")
+    generate.add_argument("--write-behind", action="store_true", help="queue question writes for a background writer")
+
+    assemble = add_command("assemble", run_assemble, "create assignment.md from an assignment config")
+    assemble.add_argument("--student", help="serve this student's pre-rendered assignment")
+
+    practice = add_command("practice", run_practice, "pick a student's next question by adaptive difficulty")
+    practice.add_argument("--student", help="student to pick the next question for")
+    practice.add_argument("--topic", help="only pick questions of this topic")
+    practice.add_argument("--results", help="graded results CSV or JSONL to update the ratings with first")
+    practice.add_argument("--question", help="question the student just answered")
+    practice.add_argument("--score", type=float, help="score in [0, 1] of the answered question")
+    practice.add_argument("--directory")
+
+    prerender = add_command("prerender", run_prerender, "pre-render a roster's assignments into the cache")
+    prerender.add_argument("roster", help="one student id per line, or a CSV with a student column")
+    prerender.add_argument("--workers", type=int, help="rendering threads (default: 4)")
+
+    index = add_command("index", run_index, "update the question bank's metadata index")
+    index.add_argument("--directory")
+
+    migrate = add_command("migrate", run_migrate, "move the question bank into a sharded or flat layout")
+    migrate.add_argument("layout", choices=["flat", "topic", "hash", "topic_hash"])
+    migrate.add_argument("--directory")
+
+    compact = add_command("compact", run_compact, "drop orphaned, stale and duplicate questions")
+    compact.add_argument("--directory")
+    compact.add_argument("--archive", action="store_true", help="move dropped questions to questions/.archive")
+    compact.add_argument("--dry-run", action="store_true", help="report what would be dropped")
+
+    export = add_command("export", run_export, "export the question bank for an LMS or for analytics")
+    export.add_argument("--format", choices=["qti", "moodle", "parquet", "arrow"])
+    export.add_argument("--directory")
+    export.add_argument("--output", help="output file, or output directory for parquet and arrow")
+    export.add_argument("--results", help="graded results to export with parquet and arrow")
+
+    dedup = add_command("dedup", run_dedup, "report near-duplicate questions in the bank")
+    dedup.add_argument("--directory")
+
+    grade = add_command("grade", run_grade, "grade a CSV or JSONL submissions file")
+    grade.add_argument("submissions")
+    grade.add_argument("--directory")
+    grade.add_argument("--results", help="per-answer scores CSV")
+    grade.add_argument("--report", help="per-item statistics JSON")
+
+    analyze = add_command("analyze", run_analyze, "calibrate question difficulty from graded results")
+    analyze.add_argument("results", help="graded results CSV or JSONL from `grade`")
+    analyze.add_argument("--directory")
+
+    bench = add_command("bench", run_bench, "measure cold-start time or per-question memory")
+    bench.add_argument("benchmark", nargs="?", choices=["startup", "memory"])
+    bench.add_argument("--runs", type=int)
+    bench.add_argument("--directory", help="question bank for the memory benchmark")
+
+    watch = add_command("watch", run_watch, "rebuild affected outputs when sources change")
+    watch.add_argument("--textbook-dir")
+    watch.add_argument("--output-dir")
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.handler(args, load_config(args.config))
+
+if __name__ == "__main__":
+    main()
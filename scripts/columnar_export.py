@@ -0,0 +1,144 @@
+import json
+import os
+
+from bank import iter_answer_keys, iter_question_paths, load_calibrated_difficulties, read_front_matter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Only the columnar export needs pyarrow; the rest of the bank tools work without it
+    pa = pq = None
+
+# File written for each table, by export format
+TABLE_FILENAMES = {
+    "parquet": "{table}.parquet",
+    "arrow": "{table}.arrow"
+}
+
+def require_pyarrow():
+    """Fail with an install hint when pyarrow is missing."""
+    if pa is None:
+        raise ImportError("Columnar export needs pyarrow: pip install pyarrow")
+
+def question_schema():
+    """Columns of the questions table."""
+    return pa.schema([
+        ("id", pa.string()),
+        ("path", pa.string()),
+        ("title", pa.string()),
+        ("topic", pa.string()),
+        ("bloom_level", pa.string()),
+        ("difficulty", pa.int8()),
+        ("calibrated_difficulty", pa.int8()),
+        ("tags", pa.list_(pa.string())),
+        ("source", pa.string())
+    ])
+
+def answer_key_schema():
+    """Columns of the answer keys table; records differ by type, so each is kept whole as JSON."""
+    return pa.schema([
+        ("id", pa.string()),
+        ("type", pa.string()),
+        ("record", pa.string())
+    ])
+
+def result_schema():
+    """Columns of the graded results table."""
+    return pa.schema([
+        ("student", pa.string()),
+        ("question_id", pa.string()),
+        ("score", pa.float32())
+    ])
+
+def write_table(rows, schema, path, file_format="parquet", chunk_size=10000):
+    """Write row tuples in schema order to a Parquet or Arrow IPC file, one record batch per chunk.
+
+    Returns the number of rows written.
+    """
+    names = schema.names
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    count = 0
+    try:
+        chunk = []
+
+        def flush():
+            columns = list(zip(*chunk))
+            writer.write_batch(pa.RecordBatch.from_pydict(
+                {name: list(column) for name, column in zip(names, columns)}, schema=schema
+            ))
+            chunk.clear()
+
+        for row in rows:
+            chunk.append(row)
+            count += 1
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+    finally:
+        writer.close()
+    return count
+
+def iter_question_rows(directory="questions"):
+    """Yield one row of question metadata per file, reading only front matter."""
+    calibrated = load_calibrated_difficulties(directory)
+    for path in iter_question_paths(directory):
+        front_matter = read_front_matter(path)
+        metadata = front_matter.get("metadata") or {}
+        question_id = front_matter.get("id") or os.path.splitext(os.path.basename(path))[0]
+        difficulty = metadata.get("difficulty")
+        yield (
+            question_id,
+            path,
+            front_matter.get("title"),
+            metadata.get("topic"),
+            metadata.get("bloom_level"),
+            int(difficulty) if difficulty is not None else None,
+            calibrated.get(question_id),
+            [str(tag) for tag in metadata.get("tags") or []],
+            metadata.get("source")
+        )
+
+def iter_answer_key_rows(directory="questions"):
+    """Yield the latest answer key of each question, with the full record as JSON."""
+    for record in iter_answer_keys(directory):
+        yield record["id"], record.get("type"), json.dumps(record)
+
+def iter_result_rows(results_path):
+    """Yield graded results as (student, question_id, score) rows."""
+    from item_analysis import iter_results
+    return iter_results(results_path)
+
+def export_bank(directory="questions", output_dir="questions_parquet", file_format="parquet",
+                results_path=None, chunk_size=10000):
+    """Export question metadata, answer keys and optionally graded results as columnar tables.
+
+    Each table is streamed into its own file in output_dir in record
+    batches of chunk_size rows. Returns the row count of each table.
+    """
+    require_pyarrow()
+    if file_format not in TABLE_FILENAMES:
+        raise ValueError(f"Unknown columnar format: {file_format}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    def path(table):
+        return os.path.join(output_dir, TABLE_FILENAMES[file_format].format(table=table))
+
+    counts = {
+        "questions": write_table(iter_question_rows(directory), question_schema(), path("questions"),
+                                 file_format, chunk_size),
+        "answer_keys": write_table(iter_answer_key_rows(directory), answer_key_schema(), path("answer_keys"),
+                                   file_format, chunk_size)
+    }
+    if results_path is not None:
+        counts["results"] = write_table(iter_result_rows(results_path), result_schema(), path("results"),
+                                        file_format, chunk_size)
+    return counts
+
+if __name__ == "__main__":
+    counts = export_bank('questions', 'questions_parquet')
+    print(", ".join(f"{count} {table}" for table, count in counts.items()) + " exported to questions_parquet")
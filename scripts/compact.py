@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+
+from bank import (
+    ANSWER_KEYS_FILENAME, INDEX_FILENAME, atomic_write, build_index, ensure_directory,
+    iter_question_paths, load_answer_keys, load_question, locked
+)
+from dedup import DEDUP_INDEX_FILENAME, load_bank_index, save_bank_index
+from extract_definitions import definition_id, read_textbook_file
+from orchestrator import ASSIGNMENT_ID_PREFIX
+
+# Hidden directory of a question bank that compaction archives questions into;
+# bank scans skip it like any hidden directory
+ARCHIVE_DIRNAME = ".archive"
+
+def resolve_source(metadata):
+    """Return the path of a question's source file, or None if it cannot be located.
+
+    Relative sources are resolved against the source_root recorded at
+    extraction, not the directory compaction runs from; relative sources
+    recorded without a root cannot be resolved.
+    """
+    source = str(metadata["source"])
+    if os.path.isabs(source):
+        return source
+    if metadata.get("source_root") is None:
+        return None
+    return os.path.join(metadata["source_root"], source)
+
+def source_definitions(source, sources):
+    """Return a textbook file's current content hash and definition question ids, or None if it is gone.
+
+    Each file is read once per compaction and remembered in sources.
+    """
+    if source not in sources:
+        sources[source] = None
+        if os.path.exists(source):
+            file_hash, definitions = read_textbook_file(source)
+            sources[source] = (file_hash, {definition_id(title) for title, _ in definitions})
+    return sources[source]
+
+def archive_path(directory, path):
+    """Pick where a dropped question is archived: its path within the bank, below the archive directory.
+
+    An earlier archive of the same file is kept; the new one gets the
+    first free numbered name, e.g. def_loop.1.md.
+    """
+    target = os.path.join(directory, ARCHIVE_DIRNAME, os.path.relpath(path, directory))
+    stem, extension = os.path.splitext(target)
+    number = 0
+    while os.path.exists(target):
+        number += 1
+        target = f"{stem}.{number}{extension}"
+    return target
+
+def body_hash(body):
+    """Hash a question body, ignoring differences in whitespace."""
+    return hashlib.sha1(" ".join(body.split()).encode()).hexdigest()
+
+def classify(front_matter, question_id, sources):
+    """Return why a question should be dropped ("orphaned" or "stale"), or None to keep it.
+
+    Definition questions are orphaned when their textbook file or their
+    definition in it is gone, and stale when they were extracted from
+    content other than the file's current content. Questions whose source
+    cannot be located are kept. Assignment loop
+    questions are orphaned: rendered assignments embed their own, so no
+    assignment or cache entry refers to one left in the bank. Other
+    generated questions are the bank's content and are kept.
+    """
+    if question_id.startswith(ASSIGNMENT_ID_PREFIX):
+        return "orphaned"
+    metadata = front_matter.get("metadata", {})
+    if metadata.get("source") is None:
+        return None
+    source = resolve_source(metadata)
+    if source is None:
+        return None
+    if not source.endswith(".md"):
+        # Canvas questions are replaced by re-ingesting; only a missing canvas orphans them
+        return None if os.path.exists(source) else "orphaned"
+    current = source_definitions(source, sources)
+    if current is None:
+        return "orphaned"
+    file_hash, question_ids = current
+    if question_id not in question_ids:
+        return "orphaned"
+    if metadata.get("source_hash") not in (None, file_hash):
+        return "stale"
+    return None
+
+def compact_bank(directory="questions", archive=False, dry_run=False):
+    """Drop orphaned, stale and duplicate questions from a bank and rewrite its indexes.
+
+    Question files are read once, one at a time. Of questions with the same
+    body, the first in path order is kept. Dropped files are deleted, or
+    moved into the bank's hidden archive directory when archive is true.
+    The answer key store is then rewritten with the latest record of each
+    remaining question, and the metadata and near-duplicate indexes are
+    updated. Like `migrate`, this should not run while generators write to
+    the bank. Returns the ids dropped for each reason and the kept count.
+    """
+    sources = {}
+    dropped = {"orphaned": [], "stale": [], "duplicate": []}
+    kept = set()
+    bodies = set()
+
+    with locked(os.path.join(directory, INDEX_FILENAME)):
+        for path in sorted(iter_question_paths(directory)):
+            front_matter, body = load_question(path)
+            question_id = front_matter.get("id") or os.path.splitext(os.path.basename(path))[0]
+            reason = classify(front_matter, question_id, sources)
+            if reason is None:
+                digest = body_hash(body)
+                if digest in bodies:
+                    reason = "duplicate"
+                bodies.add(digest)
+            if reason is None:
+                kept.add(question_id)
+                continue
+            dropped[reason].append(question_id)
+            if dry_run:
+                continue
+            if archive:
+                target = archive_path(directory, path)
+                ensure_directory(os.path.dirname(target))
+                os.replace(path, target)
+            else:
+                os.remove(path)
+
+        if dry_run:
+            return {"kept": len(kept), **dropped}
+
+        # Keep one record per remaining question, dropping superseded and orphaned records
+        answer_keys = load_answer_keys(directory)
+        records = "".join(json.dumps(record) + "\n" for key, record in answer_keys.items() if key in kept)
+        if records or answer_keys:
+            atomic_write(os.path.join(directory, ANSWER_KEYS_FILENAME), records)
+
+    build_index(directory)
+    if os.path.exists(os.path.join(directory, DEDUP_INDEX_FILENAME)):
+        save_bank_index(load_bank_index(directory), directory)
+    return {"kept": len(kept), **dropped}
+
+if __name__ == "__main__":
+    summary = compact_bank('questions', dry_run=True)
+    for reason in ("orphaned", "stale", "duplicate"):
+        print(f"{len(summary[reason])} {reason} questions")
+    print(f"{summary['kept']} questions kept")
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import math
+import os
+import re
+
+from bank import atomic_write
+
+# Name of the persisted concept index kept at the root of a question bank
+CONCEPT_INDEX_FILENAME = "concept_index.json"
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "for", "from", "has",
+    "have", "in", "into", "is", "it", "its", "of", "on", "or", "that", "the",
+    "their", "them", "then", "there", "these", "this", "to", "was", "were",
+    "which", "with", "within", "when", "where", "will", "not", "but", "all",
+    "any", "each", "such", "than", "other", "more", "may", "also", "used", "use"
+}
+
+def extract_terms(text):
+    """Count the index terms of a text: lowercase words without stopwords."""
+    counts = {}
+    for word in re.findall(r"[a-z][a-z0-9]+", text.lower()):
+        if word not in STOPWORDS:
+            counts[word] = counts.get(word, 0) + 1
+    return counts
+
+def content_hash(text):
+    """Hash a file's content to detect changes between runs."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+class ConceptIndex:
+    """Inverted index from terms to the definitions (and chapters) that use them.
+
+    Term frequencies are stored per definition and weighted by TF-IDF at
+    lookup time, so updating one textbook file only touches its own postings.
+    Definitions are keyed by (chapter, title), so chapters defining the same
+    term keep separate entries.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.definitions = {}
+        self.postings = {}
+        self._norms = None
+
+    def update_file(self, path, definitions, file_hash=None):
+        """Replace the definitions indexed for a textbook file.
+
+        Returns False without touching the index when file_hash matches the
+        hash indexed for the file.
+        """
+        if file_hash is not None and self.files.get(path, {}).get("hash") == file_hash:
+            return False
+        self.remove_file(path)
+        titles = []
+        for title, definition_body in definitions:
+            # The title is counted twice so a definition is anchored on its own name
+            terms = extract_terms(f"{title} {title} {definition_body}")
+            self.add_definition(path, title, terms)
+            titles.append(title)
+        self.files[path] = {"hash": file_hash, "definitions": titles}
+        self._norms = None
+        return True
+
+    def add_definition(self, path, title, terms):
+        """Index one definition of a textbook file with its term counts."""
+        key = (path, title)
+        self.definitions[key] = terms
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[key] = count
+
+    def remove_file(self, path):
+        """Drop a textbook file's definitions from the index, leaving other files' entries alone."""
+        for title in self.files.pop(path, {}).get("definitions", []):
+            terms = self.definitions.pop((path, title), None)
+            if terms is None:
+                continue
+            for term in terms:
+                posting = self.postings.get(term, {})
+                posting.pop((path, title), None)
+                if not posting:
+                    self.postings.pop(term, None)
+        self._norms = None
+
+    def idf(self, term):
+        """Inverse document frequency of a term across all definitions."""
+        return math.log(len(self.definitions) / len(self.postings[term])) + 1
+
+    def norms(self):
+        """TF-IDF vector length of every definition, cached until the index changes."""
+        if self._norms is None:
+            squares = {}
+            for term, posting in self.postings.items():
+                idf = self.idf(term)
+                for key, count in posting.items():
+                    squares[key] = squares.get(key, 0.0) + (count * idf) ** 2
+            self._norms = {key: math.sqrt(total) for key, total in squares.items()}
+        return self._norms
+
+    def lookup(self, term):
+        """Return (definition, chapter, TF-IDF weight) for a term, highest weight first."""
+        term = term.lower()
+        if term not in self.postings:
+            return []
+        idf = self.idf(term)
+        results = [(title, chapter, count * idf) for (chapter, title), count in self.postings[term].items()]
+        return sorted(results, key=lambda result: -result[2])
+
+    def related(self, title, limit=3, chapter=None):
+        """Return the titles of the definitions most similar to one definition by TF-IDF cosine similarity.
+
+        chapter picks the definition when several chapters define the title;
+        without it the first indexed one is used.
+        """
+        if chapter is None:
+            chapter = next((path for path, other in self.definitions if other == title), None)
+        key = (chapter, title)
+        terms = self.definitions.get(key)
+        if terms is None:
+            return []
+        norms = self.norms()
+        scores = {}
+        for term, count in terms.items():
+            idf = self.idf(term)
+            weight = count * idf * idf
+            for other, other_count in self.postings[term].items():
+                if other != key:
+                    scores[other] = scores.get(other, 0.0) + weight * other_count
+        ranked = sorted(
+            ((other, score / (norms[key] * norms[other])) for other, score in scores.items()),
+            key=lambda item: (-item[1], item[0][1], item[0][0])
+        )
+        # A term defined in several chapters is named once
+        titles = []
+        for (_, other_title), _ in ranked:
+            if other_title != title and other_title not in titles:
+                titles.append(other_title)
+        return titles[:limit]
+
+    def save(self, path):
+        """Persist the indexed files and definitions as JSON; postings are rebuilt on load."""
+        definitions = [
+            {"chapter": chapter, "title": title, "terms": terms}
+            for (chapter, title), terms in self.definitions.items()
+        ]
+        atomic_write(path, json.dumps({"files": self.files, "definitions": definitions}))
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved with save(), raising ValueError for any other file."""
+        index = cls()
+        with open(path, 'r') as f:
+            data = json.load(f)
+        try:
+            index.files = dict(data["files"])
+            for definition in data["definitions"]:
+                index.add_definition(definition["chapter"], definition["title"], definition["terms"])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            raise ValueError(f"Unrecognized concept index: {path}")
+        return index
+
+def load_concept_index(directory="questions"):
+    """Load a bank's concept index, or start an empty one if it is missing or unrecognized.
+
+    Extraction re-reads every textbook file missing from the index, so an
+    empty index is rebuilt on the next run.
+    """
+    path = os.path.join(directory, CONCEPT_INDEX_FILENAME)
+    if not os.path.exists(path):
+        return ConceptIndex()
+    try:
+        return ConceptIndex.load(path)
+    except ValueError:
+        return ConceptIndex()
+
+def save_concept_index(index, directory="questions"):
+    """Persist a bank's concept index next to its questions."""
+    os.makedirs(directory, exist_ok=True)
+    index.save(os.path.join(directory, CONCEPT_INDEX_FILENAME))
@@ -0,0 +1,195 @@
+import json
+import os
+import random
+import re
+import zlib
+from pathlib import Path
+
+from bank import atomic_write, iter_question_paths, load_question
+
+# Get the script's directory
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+
+# Name of the persisted near-duplicate index kept at the root of a question bank
+DEDUP_INDEX_FILENAME = "near_duplicates.json"
+
+# Mersenne prime used by the MinHash permutations
+MERSENNE_PRIME = (1 << 61) - 1
+
+SHINGLE_SIZE = 4
+
+_template_shingles = None
+
+def tokenize(text, normalize_numbers=True):
+    """Split text into lowercase word and symbol tokens, optionally replacing numbers with '#'."""
+    text = text.lower()
+    if normalize_numbers:
+        text = re.sub(r"\d+(\.\d+)?", "#", text)
+    return re.findall(r"\w+|[^\w\s]", text)
+
+def shingle_hashes(text, normalize_numbers=True):
+    """Hash the token shingles of a text, dropping those that only come from template boilerplate."""
+    tokens = tokenize(text, normalize_numbers)
+    hashes = {
+        zlib.crc32(" ".join(tokens[i:i + SHINGLE_SIZE]).encode())
+        for i in range(max(len(tokens) - SHINGLE_SIZE + 1, 1))
+    }
+    return hashes - template_shingles()
+
+def template_shingles():
+    """Shingles of every template's fixed text, which all questions of a type share."""
+    global _template_shingles
+    if _template_shingles is None:
+        _template_shingles = set()
+        for template_path in (PROJECT_ROOT / 'templates').glob('*.md'):
+            # Placeholders split the fixed text; shingles never span them
+            for chunk in re.split(r"<<\w+>>", template_path.read_text()):
+                tokens = tokenize(chunk)
+                _template_shingles.update(
+                    zlib.crc32(" ".join(tokens[i:i + SHINGLE_SIZE]).encode())
+                    for i in range(len(tokens) - SHINGLE_SIZE + 1)
+                )
+    return _template_shingles
+
+class NearDuplicateIndex:
+    """MinHash signatures with banded locality-sensitive hashing.
+
+    Candidates are found by bucket lookups rather than by comparing against
+    every indexed question, then confirmed by estimated Jaccard similarity.
+    """
+
+    def __init__(self, num_perm=64, bands=8, threshold=0.8, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.seed = seed
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self.signatures = {}
+        self.buckets = [{} for _ in range(bands)]
+
+    def signature(self, text):
+        """Compute the MinHash signature of a text."""
+        hashes = shingle_hashes(text)
+        if not hashes:
+            return [MERSENNE_PRIME] * self.num_perm
+        return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self.permutations]
+
+    def band_keys(self, signature):
+        """Yield the bucket key of each band of a signature."""
+        for band in range(self.bands):
+            yield tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def query_signature(self, signature, exclude=None):
+        """Return (key, similarity) pairs of indexed entries at or above the threshold."""
+        candidates = set()
+        for band, band_key in enumerate(self.band_keys(signature)):
+            candidates.update(self.buckets[band].get(band_key, ()))
+        candidates.discard(exclude)
+
+        matches = []
+        for key in candidates:
+            other = self.signatures[key]
+            similarity = sum(x == y for x, y in zip(signature, other)) / self.num_perm
+            if similarity >= self.threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda match: -match[1])
+
+    def query(self, text, exclude=None):
+        """Return the indexed near-duplicates of a text, most similar first."""
+        return self.query_signature(self.signature(text), exclude)
+
+    def add_signature(self, key, signature):
+        """Index a precomputed signature under a key, replacing any previous one."""
+        self.remove(key)
+        self.signatures[key] = signature
+        for band, band_key in enumerate(self.band_keys(signature)):
+            self.buckets[band].setdefault(band_key, set()).add(key)
+
+    def add(self, key, text):
+        """Index a text and return its near-duplicates among the entries indexed before it."""
+        signature = self.signature(text)
+        matches = self.query_signature(signature, exclude=key)
+        self.add_signature(key, signature)
+        return matches
+
+    def remove(self, key):
+        """Drop a key from the index."""
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        for band, band_key in enumerate(self.band_keys(signature)):
+            bucket = self.buckets[band].get(band_key)
+            bucket.discard(key)
+            if not bucket:
+                del self.buckets[band][band_key]
+
+    def __contains__(self, key):
+        return key in self.signatures
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def save(self, path):
+        """Persist the index parameters and signatures as JSON."""
+        atomic_write(path, json.dumps({
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "threshold": self.threshold,
+            "seed": self.seed,
+            "signatures": self.signatures
+        }))
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved with save()."""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        index = cls(data["num_perm"], data["bands"], data["threshold"], data["seed"])
+        for key, signature in data["signatures"].items():
+            index.add_signature(key, signature)
+        return index
+
+def question_key(path):
+    """Key a question by its file name, which is its id."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+def load_bank_index(directory="questions"):
+    """Load the bank's persisted index, adding new questions and dropping removed ones."""
+    path = os.path.join(directory, DEDUP_INDEX_FILENAME)
+    index = NearDuplicateIndex.load(path) if os.path.exists(path) else NearDuplicateIndex()
+    present = set()
+    if os.path.isdir(directory):
+        for question_path in iter_question_paths(directory):
+            key = question_key(question_path)
+            present.add(key)
+            if key not in index:
+                index.add(key, load_question(question_path)[1])
+    for key in set(index.signatures) - present:
+        index.remove(key)
+    return index
+
+def save_bank_index(index, directory="questions"):
+    """Persist a bank's index next to its questions."""
+    index.save(os.path.join(directory, DEDUP_INDEX_FILENAME))
+
+def find_near_duplicates(directory="questions"):
+    """Return (question, near-duplicate, similarity) for every flagged pair in the bank."""
+    index = NearDuplicateIndex()
+    pairs = []
+    for question_path in sorted(iter_question_paths(directory)):
+        question_id = question_key(question_path)
+        for other_id, similarity in index.add(question_id, load_question(question_path)[1]):
+            pairs.append((question_id, other_id, similarity))
+    return pairs
+
+if __name__ == "__main__":
+    for question_id, other_id, similarity in find_near_duplicates('questions'):
+        print(f"{question_id} ~ {other_id} ({similarity:.2f})")
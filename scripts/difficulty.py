@@ -0,0 +1,150 @@
+import re
+from functools import lru_cache
+
+# Tokens of the C# snippets and expressions generators produce; comments are matched
+# so they can be skipped, and longer operators come first
+TOKEN_PATTERN = re.compile(
+    r'//[^\n]*|/\*[\s\S]*?\*/|\$?"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])\'|\d+\.\d+[fFdDmM]?|\d+[fFdDmMlL]?|[A-Za-z_]\w*'
+    r'|\+\+|--|->|=>|&&|\|\||[-+*/%=!<>]=|<<|>>|[-+*/%=!<>^&|?:(){}\[\];,.]'
+)
+
+NUMBER = re.compile(r"\b\d+(\.\d+)?")
+
+# Precedence class of each operator; assignments are counted as state changes instead
+PRECEDENCE_CLASSES = {
+    "!": "unary",
+    "*": "multiplicative", "/": "multiplicative", "%": "multiplicative",
+    "+": "additive", "-": "additive",
+    "<<": "shift", ">>": "shift",
+    "<": "relational", ">": "relational", "<=": "relational", ">=": "relational",
+    "==": "equality", "!=": "equality",
+    "&": "logical", "^": "logical", "|": "logical",
+    "&&": "conditional", "||": "conditional", "->": "conditional",
+    "?": "ternary"
+}
+
+ASSIGNMENTS = {"=", "+=", "-=", "*=", "/=", "%=", "++", "--"}
+
+CONTROL_KEYWORDS = {"for", "foreach", "while", "do", "if", "else", "switch"}
+
+TYPE_KEYWORDS = {
+    "int": "int", "long": "int", "short": "int", "byte": "int",
+    "double": "real", "float": "real", "decimal": "real",
+    "bool": "bool", "string": "string", "char": "char"
+}
+
+# Weight of each feature in the difficulty score
+FEATURE_WEIGHTS = {
+    "operators": 0.15,
+    "precedence_levels": 0.4,
+    "parenthesis_depth": 0.3,
+    "mixed_types": 0.7,
+    "nesting_depth": 0.6,
+    "control_statements": 0.3,
+    "state_changes": 0.2,
+    "negative_literals": 0.3,
+    "large_literals": 0.3
+}
+
+# Lowest score of each difficulty; lower scores are difficulty 1
+DIFFICULTY_THRESHOLDS = ((4.0, 4), (2.7, 3), (1.5, 2))
+
+def fingerprint(code):
+    """Reduce a snippet to its shape: literals become 0, so variants differing only in numbers share features."""
+    return NUMBER.sub(lambda match: "0.0" if match.group(1) else "0", code)
+
+@lru_cache(maxsize=8192)
+def shape_features(shape):
+    """Count the structural features of a snippet's shape."""
+    tokens = [token for token in TOKEN_PATTERN.findall(shape) if not token.startswith(("//", "/*"))]
+    operators = 0
+    levels = set()
+    state_changes = 0
+    control_statements = 0
+    types = set()
+    depth = {"(": 0, "{": 0}
+    deepest = {"(": 0, "{": 0}
+    for token in tokens:
+        if token in ("(", "{"):
+            depth[token] += 1
+            deepest[token] = max(deepest[token], depth[token])
+        elif token in (")", "}"):
+            opening = "(" if token == ")" else "{"
+            depth[opening] = max(0, depth[opening] - 1)
+        elif token in ASSIGNMENTS:
+            state_changes += 1
+        elif token in PRECEDENCE_CLASSES:
+            operators += 1
+            levels.add(PRECEDENCE_CLASSES[token])
+        elif token in CONTROL_KEYWORDS:
+            control_statements += 1
+        elif token in TYPE_KEYWORDS:
+            types.add(TYPE_KEYWORDS[token])
+        elif token in ("true", "false"):
+            types.add("bool")
+        elif token[0] in "\"$":
+            types.add("string")
+        elif token[0] == "'":
+            types.add("char")
+        elif token[0].isdigit():
+            types.add("real" if "." in token or token[-1] in "fFdDmM" else "int")
+    # A loop or branch body written without braces still nests one level
+    nesting = max(deepest["{"], 1 if control_statements else 0)
+    return {
+        "operators": operators,
+        "precedence_levels": len(levels),
+        "parenthesis_depth": deepest["("],
+        "mixed_types": max(0, len(types) - 1),
+        "nesting_depth": nesting,
+        "control_statements": control_statements,
+        "state_changes": state_changes
+    }
+
+def numeric_features(code):
+    """Features that depend on the literal values, computed without the cache."""
+    values = [float(match.group()) for match in NUMBER.finditer(code)]
+    negatives = len(re.findall(r"(?:^|[=(,\-+*/%<>?:]|return)\s*-\s*\d", code))
+    return {
+        "negative_literals": negatives,
+        "large_literals": sum(1 for value in values if value >= 100)
+    }
+
+def structural_features(code):
+    """Return the structural features of a generated snippet or expression."""
+    return {**shape_features(fingerprint(code)), **numeric_features(code)}
+
+def difficulty_score(features):
+    """Weigh a snippet's features into a continuous difficulty score."""
+    return sum(FEATURE_WEIGHTS[name] * value for name, value in features.items())
+
+def score_difficulty(code, baseline=None):
+    """Map a snippet to the generators' 1-4 difficulty scale.
+
+    baseline is the level a variation was assigned by hand for what the
+    task asks of the student (e.g. filling every intermediate column); when
+    given, it is averaged with the structural level.
+    """
+    score = difficulty_score(structural_features(code))
+    level = 1
+    for lowest, difficulty in DIFFICULTY_THRESHOLDS:
+        if score >= lowest:
+            level = difficulty
+            break
+    if baseline is not None:
+        level = int((level + baseline) / 2 + 0.5)
+    return level
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    for code in ("P || Q", "10 * (3 + 6)", "(x > 5) && (y++ < 10)", "5 / 3.1 + 3 * 0.1",
+                 "for(int i = 0; i < (size + 1) / 2; i++) { Process(i); }"):
+        print(f"{score_difficulty(code)}  {code}")
+    snippets = [f"for(int i = {random.randint(0, 9)}; i < {random.randint(10, 999)}; i++) {{ Console.WriteLine(i); }}"
+                for _ in range(100000)]
+    started = time.perf_counter()
+    for code in snippets:
+        score_difficulty(code, 2)
+    print(f"Scored {len(snippets)} loops in {(time.perf_counter() - started) / len(snippets) * 1e6:.1f} us each; "
+          f"{shape_features.cache_info().currsize} distinct shapes analyzed")
@@ -0,0 +1,330 @@
+import random
+import re
+
+# Tokens of the C# boolean expressions used in questions; `->` is the
+# implication arrow the truth table questions write for readability
+TOKEN_PATTERN = re.compile(r"\s*(->|&&|\|\||\+\+|--|<=|>=|==|!=|[<>!^()]|\d+|[A-Za-z_][A-Za-z0-9_]*)")
+
+COMPARISON_OPERATORS = {"<", "<=", ">", ">=", "==", "!="}
+
+# Binding strength used when rendering trees; comparisons and operands bind tighter
+PRECEDENCE = {"implies": 0, "or": 1, "and": 2, "xor": 3, "compare": 4, "not": 5}
+SYMBOLS = {"implies": "->", "or": "||", "and": "&&", "xor": "^"}
+
+# Variable names used by the expression synthesizer, by type
+BOOL_NAMES = ["a", "b", "c", "done", "found", "valid"]
+INT_NAMES = ["x", "y", "z", "count", "total"]
+
+def tokenize(expression):
+    """Split a boolean expression into tokens, ignoring any trailing // comment."""
+    expression = expression.split("//", 1)[0].strip()
+    tokens = []
+    position = 0
+    while position < len(expression):
+        match = TOKEN_PATTERN.match(expression, position)
+        if not match:
+            raise ValueError(f"Unexpected character in expression: {expression[position:]!r}")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+def parse(expression):
+    """Parse a boolean expression into a tuple tree using C# operator precedence.
+
+    From lowest to highest precedence: `->`, `||`, `&&`, `^`, comparisons of
+    int terms (`x < 5`, `y++ >= 10`, `--z == 0`), `!`.
+    """
+    tokens = tokenize(expression)
+    position = 0
+
+    def peek(offset=0):
+        index = position + offset
+        return tokens[index] if index < len(tokens) else None
+
+    def take(expected=None):
+        nonlocal position
+        token = peek()
+        if token is None or (expected is not None and token != expected):
+            raise ValueError(f"Expected {expected or 'an operand'} in expression: {expression!r}")
+        position += 1
+        return token
+
+    def is_name(token):
+        return token is not None and re.match(r"[A-Za-z_]", token) and token not in ("true", "false")
+
+    def parse_implies():
+        left = parse_or()
+        if peek() == "->":
+            take("->")
+            # Implication is right-associative
+            return ("implies", left, parse_implies())
+        return left
+
+    def parse_binary(operator, name, parse_operand):
+        def parse_level():
+            node = parse_operand()
+            while peek() == operator:
+                take(operator)
+                node = (name, node, parse_operand())
+            return node
+        return parse_level
+
+    def parse_int_term():
+        token = take()
+        if token.isdigit():
+            return ("int", int(token))
+        if token in ("++", "--"):
+            name = take()
+            if not is_name(name):
+                raise ValueError(f"Expected a variable after {token} in expression: {expression!r}")
+            return ("pre", token, name)
+        if not is_name(token):
+            raise ValueError(f"Unexpected token {token!r} in expression: {expression!r}")
+        if peek() in ("++", "--"):
+            return ("post", take(), token)
+        return ("var", token)
+
+    def parse_compare():
+        token = peek()
+        starts_int_term = (
+            token is not None and (token.isdigit() or token in ("++", "--"))
+            or is_name(token) and peek(1) in COMPARISON_OPERATORS | {"++", "--"}
+        )
+        if not starts_int_term:
+            return parse_not()
+        left = parse_int_term()
+        operator = take()
+        if operator not in COMPARISON_OPERATORS:
+            raise ValueError(f"Expected a comparison after {left} in expression: {expression!r}")
+        return ("compare", operator, left, parse_int_term())
+
+    def parse_not():
+        if peek() == "!":
+            take("!")
+            return ("not", parse_not())
+        token = take()
+        if token == "(":
+            node = parse_implies()
+            take(")")
+            return node
+        if token in ("true", "false"):
+            return ("const", token == "true")
+        if not is_name(token):
+            raise ValueError(f"Unexpected token {token!r} in expression: {expression!r}")
+        return ("var", token)
+
+    parse_xor = parse_binary("^", "xor", parse_compare)
+    parse_and = parse_binary("&&", "and", parse_xor)
+    parse_or = parse_binary("||", "or", parse_and)
+
+    tree = parse_implies()
+    if peek() is not None:
+        raise ValueError(f"Unexpected token {peek()!r} in expression: {expression!r}")
+    return tree
+
+def format_value(value):
+    """Format a value the way C# prints it in source."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+def render(tree):
+    """Render a tree as C# source with only the parentheses it needs.
+
+    Comparisons are parenthesized when they are operands of a logical
+    operator, as in `(x > 5) && (y++ < 10)`.
+    """
+    kind = tree[0]
+    if kind == "const":
+        return format_value(tree[1])
+    if kind in ("var", "int"):
+        return str(tree[1])
+    if kind == "post":
+        return f"{tree[2]}{tree[1]}"
+    if kind == "pre":
+        return f"{tree[1]}{tree[2]}"
+    if kind == "compare":
+        return f"{render(tree[2])} {tree[1]} {render(tree[3])}"
+
+    def operand(child, minimum):
+        text = render(child)
+        if child[0] in PRECEDENCE and (PRECEDENCE[child[0]] < minimum or child[0] == "compare"):
+            return f"({text})"
+        return text
+
+    if kind == "not":
+        return "!" + operand(tree[1], PRECEDENCE["not"])
+    level = PRECEDENCE[kind]
+    if kind == "implies":
+        return f"{operand(tree[1], level + 1)} -> {operand(tree[2], level)}"
+    return f"{operand(tree[1], level)} {SYMBOLS[kind]} {operand(tree[2], level + 1)}"
+
+def compare(operator, left, right):
+    """Apply a C# comparison operator to two ints."""
+    if operator == "<":
+        return left < right
+    if operator == "<=":
+        return left <= right
+    if operator == ">":
+        return left > right
+    if operator == ">=":
+        return left >= right
+    if operator == "==":
+        return left == right
+    return left != right
+
+def run(tree, state, steps=None, skipped=None):
+    """Evaluate a tree in C# order, updating state with side effects.
+
+    When steps and skipped are lists, every evaluated operation is recorded
+    in steps and every sub-expression bypassed by short-circuiting in skipped.
+    """
+    kind = tree[0]
+    if kind in ("const", "int"):
+        return tree[1]
+    if kind == "var":
+        return state[tree[1]]
+    if kind in ("post", "pre"):
+        _, operator, name = tree
+        old = state[name]
+        state[name] = old + 1 if operator == "++" else old - 1
+        value = old if kind == "post" else state[name]
+        if steps is not None:
+            steps.append(f"{render(tree)} evaluates to {value}; {name} becomes {state[name]}")
+        return value
+    if kind == "compare":
+        left = run(tree[2], state, steps, skipped)
+        right = run(tree[3], state, steps, skipped)
+        result = compare(tree[1], left, right)
+        if steps is not None:
+            steps.append(f"{render(tree)}: {left} {tree[1]} {right} = {format_value(result)}")
+        return result
+    if kind == "not":
+        result = not run(tree[1], state, steps, skipped)
+    else:
+        left = run(tree[1], state, steps, skipped)
+        # && and || skip their right operand once the left decides the result
+        if (kind == "and" and not left) or (kind == "or" and left):
+            if steps is not None:
+                steps.append(f"{render(tree)} = {format_value(left)} "
+                             f"(short-circuit: {render(tree[2])} is not evaluated)")
+                skipped.append(render(tree[2]))
+            return left
+        right = run(tree[2], state, steps, skipped)
+        if kind in ("and", "or"):
+            result = right
+        elif kind == "xor":
+            result = left != right
+        elif kind == "implies":
+            result = (not left) or right
+        else:
+            raise ValueError(f"Unknown expression node: {kind}")
+    if steps is not None:
+        steps.append(f"{render(tree)} = {format_value(result)}")
+    return result
+
+def evaluate(tree, values):
+    """Evaluate a parsed boolean expression with the given variable values."""
+    return run(tree, dict(values))
+
+def trace(expression, values):
+    """Evaluate an expression (source or tree) step by step under C# short-circuit rules.
+
+    Returns the result, the evaluation steps in order, the sub-expressions
+    that were never evaluated and the variables' values afterwards.
+    """
+    tree = parse(expression) if isinstance(expression, str) else expression
+    state = dict(values)
+    steps = []
+    skipped = []
+    result = run(tree, state, steps, skipped)
+    return {"result": result, "steps": steps, "skipped": skipped, "final_state": state}
+
+def variable_types(tree, types=None):
+    """Map each variable of a tree to "bool" or "int"."""
+    types = {} if types is None else types
+    kind = tree[0]
+    if kind == "var":
+        types.setdefault(tree[1], "bool")
+    elif kind in ("post", "pre"):
+        types[tree[2]] = "int"
+    elif kind == "compare":
+        for term in tree[2:]:
+            if term[0] == "var":
+                types[term[1]] = "int"
+            elif term[0] in ("post", "pre"):
+                types[term[2]] = "int"
+    elif kind not in ("const", "int"):
+        for child in tree[1:]:
+            variable_types(child, types)
+    return types
+
+def truth_table(expression, variables):
+    """Return the result column of an expression's truth table.
+
+    Rows follow the layout of generate_truth_table_question: in row i the
+    j-th variable is true when bit j of i is set.
+    """
+    tree = parse(expression)
+    results = []
+    for i in range(2 ** len(variables)):
+        values = {name: bool(i & (1 << j)) for j, name in enumerate(variables)}
+        results.append(evaluate(tree, values))
+    return results
+
+def operand_chain(kind, tree):
+    """List the operands of a chain of one associative operator, left to right."""
+    if tree[0] != kind:
+        return [tree]
+    return operand_chain(kind, tree[1]) + operand_chain(kind, tree[2])
+
+def random_expression(rng=random, depth=2, side_effect_rate=0.3):
+    """Build a random boolean expression tree over bool variables and int comparisons."""
+    def leaf():
+        if rng.random() < 0.3:
+            return ("var", rng.choice(BOOL_NAMES))
+        name = rng.choice(INT_NAMES)
+        if rng.random() < side_effect_rate:
+            term = (rng.choice(["post", "pre"]), rng.choice(["++", "--"]), name)
+        else:
+            term = ("var", name)
+        return ("compare", rng.choice(sorted(COMPARISON_OPERATORS)), term, ("int", rng.randint(0, 15)))
+
+    def build(level):
+        if level == 0 or rng.random() < 0.2:
+            return leaf()
+        roll = rng.random()
+        if roll < 0.1:
+            return ("not", build(level - 1))
+        kind = "xor" if roll < 0.2 else "and" if roll < 0.6 else "or"
+        # Regroup a || (b || c) as (a || b) || c: same evaluation order, fewer parentheses
+        operands = operand_chain(kind, build(level - 1)) + operand_chain(kind, build(level - 1))
+        tree = operands[0]
+        for operand in operands[1:]:
+            tree = (kind, tree, operand)
+        return tree
+
+    return build(depth)
+
+def random_values(tree, rng=random):
+    """Pick initial values for a tree's variables; ints stay near the comparison literals."""
+    return {
+        name: rng.random() < 0.5 if kind == "bool" else rng.randint(0, 15)
+        for name, kind in sorted(variable_types(tree).items())
+    }
+
+def synthesize_expressions(count, rng=random, depth=2, max_attempts=None):
+    """Generate distinct (expression, initial values) pairs, dropping repeated expressions."""
+    max_attempts = max_attempts or count * 20
+    seen = set()
+    results = []
+    for _ in range(max_attempts):
+        if len(results) == count:
+            break
+        tree = random_expression(rng, depth)
+        expression = render(tree)
+        if expression in seen:
+            continue
+        seen.add(expression)
+        results.append((expression, random_values(tree, rng)))
+    return results
@@ -1,12 +1,23 @@
+import fnmatch
+import json
 import re
-import yaml
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from bank import atomic_write, write_question
+from concept_index import content_hash, load_concept_index, save_concept_index
+
 # Get the script's directory
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 
+# Name of the manifest of extracted textbook files kept at the root of a question bank
+EXTRACTION_MANIFEST_FILENAME = "extraction_manifest.json"
+
+# Definitions inside abstract blocks
+DEFINITION_PATTERN = r'(?i)>\[!abstract\]\s*([^\n]+)\n+>>\[!definition\]\s*\n+((?:(?!>>\[!).*?\n)+)'
+
 def load_template(template_name):
     """Load a template from the templates directory."""
     template_path = PROJECT_ROOT / 'templates' / template_name
@@ -20,38 +31,81 @@ def substitute_placeholders(template_content, replacements):
         template_content = template_content.replace(placeholder, value)
     return template_content
 
-def extract_definitions_from_markdown(file_path):
-    """Extract definition blocks from markdown files."""
+def parse_definitions(content):
+    """Return the (title, body) pairs of the definition blocks in markdown content."""
+    matches = re.findall(DEFINITION_PATTERN, content, flags=re.MULTILINE | re.DOTALL)
+    return [(title.strip(), definition_body.strip()) for title, definition_body in matches]
+
+def read_textbook_file(file_path):
+    """Read a textbook file, returning its content hash and its definitions."""
     with open(file_path, 'r') as f:
         content = f.read()
+    return content_hash(content), parse_definitions(content)
+
+def matches_any(relative_path, patterns):
+    """Check a slash-separated path relative to the textbook root against glob patterns."""
+    return any(fnmatch.fnmatch(relative_path, pattern) for pattern in patterns)
+
+def discover_textbook_files(textbook_dir="textbook", include=("*.md",), exclude=()):
+    """Map every textbook file below textbook_dir to its (mtime, size) stamp.
     
-    print(f"Processing file: {file_path}")
-    print("Content preview:")
-    print(content[:500])  # Print first 500 chars to see what we're working with
-    
-    # Updated regex to handle definitions inside abstract blocks
-    pattern = r'(?i)>\[!abstract\]\s*([^\n]+)\n+>>\[!definition\]\s*\n+((?:(?!>>\[!).*?\n)+)'
-    matches = re.findall(pattern, content, flags=re.MULTILINE | re.DOTALL)
-    
-    print(f"\nFound {len(matches)} matches")
-    for i, match in enumerate(matches):
-        print(f"\nMatch {i+1}:")
-        print(f"Title: {match[0].strip()}")
-        print(f"Body: {match[1].strip()[:100]}...")  # Print first 100 chars of body
-    
-    results = []
-    for match in matches:
-        title = match[0].strip()
-        definition_body = match[1].strip()
-        results.append((title, definition_body))
-    return results
+    The tree is walked once with os.scandir. Paths are matched relative to
+    textbook_dir, so "*.md" matches at any depth and "drafts/*" excludes a
+    whole subdirectory without descending into it.
+    """
+    stamps = {}
+    if not os.path.isdir(textbook_dir):
+        return stamps
+    pending = [(textbook_dir, "")]
+    while pending:
+        directory, prefix = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                relative_path = prefix + entry.name
+                if entry.name.startswith(".") or matches_any(relative_path, exclude):
+                    continue
+                if entry.is_dir():
+                    pending.append((entry.path, relative_path + "/"))
+                elif entry.is_file() and matches_any(relative_path, include):
+                    stat = entry.stat()
+                    stamps[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return stamps
+
+def load_extraction_manifest(output_dir="questions"):
+    """Load the path, size, mtime and hash recorded for each extracted textbook file."""
+    path = os.path.join(output_dir, EXTRACTION_MANIFEST_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_extraction_manifest(manifest, output_dir="questions"):
+    """Persist the extraction manifest next to the questions."""
+    os.makedirs(output_dir, exist_ok=True)
+    atomic_write(os.path.join(output_dir, EXTRACTION_MANIFEST_FILENAME),
+                 json.dumps(manifest, indent=1, sort_keys=True))
 
-def generate_definition_question(title, definition_body, output_dir="questions", id_prefix="def"):
+def parse_textbook_files(file_paths, workers=None):
+    """Read and parse textbook files in a process pool, returning results in input order."""
+    if workers == 1 or len(file_paths) < 2:
+        return [read_textbook_file(file_path) for file_path in file_paths]
+    workers = workers or os.cpu_count() or 1
+    # Hand each worker several files at a time to amortize the pickling round trips
+    chunksize = max(1, len(file_paths) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read_textbook_file, file_paths, chunksize=chunksize))
+
+def definition_id(title, id_prefix="def"):
+    """Return the question id of a definition, based on its sanitized title."""
+    sanitized_title = re.sub(r'[^a-zA-Z0-9]', '_', title.lower())
+    return f"{id_prefix}_{sanitized_title}"
+
+def generate_definition_question(title, definition_body, output_dir="questions", id_prefix="def", source=None,
+                                 related_concepts=None, source_hash=None):
     """Generate a question from a definition using the knowledge_definition.md template."""
     
     # Generate unique ID based on sanitized title
-    sanitized_title = re.sub(r'[^a-zA-Z0-9]', '_', title.lower())
-    unique_id = f"{id_prefix}_{sanitized_title}"
+    unique_id = definition_id(title, id_prefix)
     
     # Create front matter
     front_matter = {
@@ -64,6 +118,21 @@ def generate_definition_question(title, definition_body, output_dir="questions",
         }
     }
     
+    # Record the textbook file the definition came from so it can be rebuilt, and
+    # the directory a relative path is relative to so it resolves from anywhere
+    if source is not None:
+        front_matter["metadata"]["source"] = source
+        front_matter["metadata"]["source_root"] = os.getcwd()
+    if source_hash is not None:
+        front_matter["metadata"]["source_hash"] = source_hash
+    
+    # Concepts that co-occur with this one in the textbook
+    if related_concepts:
+        front_matter["metadata"]["related_concepts"] = list(related_concepts)
+        related_text = f"Explain how {title.lower()} relates to: {', '.join(related_concepts)}."
+    else:
+        related_text = "List related programming concepts and explain their relationships."
+    
     # Load template
     template_content = load_template('knowledge_definition.md')
     
@@ -75,52 +144,124 @@ def generate_definition_question(title, definition_body, output_dir="questions",
         "CONCEPT_TITLE": title,
         "CONCEPT_DEFINITION": definition_body,
         "EXAMPLE_USAGE": example_usage,
-        "RELATED_CONCEPTS": "List related programming concepts and explain their relationships.",
+        "RELATED_CONCEPTS": related_text,
         "COMMON_MISCONCEPTIONS": f"What are common misconceptions about {title.lower()}?",
         "PRACTICAL_IMPLICATIONS": f"How does {title.lower()} affect program behavior and design?"
     }
     filled_template = substitute_placeholders(template_content, replacements)
     
-    # Create final content
-    markdown_content = "---\n"
-    markdown_content += yaml.dump(front_matter, default_flow_style=False)
-    markdown_content += "---\n\n"
-    markdown_content += filled_template
+    # Definitions are graded by hand against the textbook's wording
+    answer_key = {
+        "type": "definition",
+        "concept": title,
+        "reference": definition_body
+    }
     
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
+    # Write the question and its answer key
+    return write_question(output_dir, front_matter, filled_template, answer_key)
+
+def generate_file_questions(file_path, definitions, output_dir, concept_index):
+    """Generate the questions of one textbook file's definitions."""
+    generated_files = []
+    source_hash = concept_index.files.get(str(file_path), {}).get("hash")
+    for title, definition_body in definitions:
+        question_file = generate_definition_question(
+            title=title,
+            definition_body=definition_body,
+            output_dir=output_dir,
+            source=str(file_path),
+            related_concepts=concept_index.related(title, chapter=str(file_path)),
+            source_hash=source_hash
+        )
+        generated_files.append(question_file)
+        print(f"Generated question file: {question_file}")
+    return generated_files
+
+def process_textbook_file(file_path, output_dir="questions", concept_index=None):
+    """Extract the definitions of a single textbook file and generate their questions.
     
-    # Write to file
-    file_path = f"{output_dir}/{unique_id}.md"
-    with open(file_path, 'w') as f:
-        f.write(markdown_content)
+    The file's stamp and hash are recorded in the extraction manifest, so a
+    later full extraction does not process it again.
+    """
+    save_index = concept_index is None
+    if save_index:
+        concept_index = load_concept_index(output_dir)
     
-    return file_path
+    # Stat before reading: if the file changes in between, the older stamp makes the next scan re-read it
+    stat = os.stat(file_path)
+    file_hash, definitions = read_textbook_file(file_path)
+    concept_index.update_file(str(file_path), definitions, file_hash)
+    print(f"Found {len(definitions)} definitions in {file_path}")
+    generated_files = generate_file_questions(file_path, definitions, output_dir, concept_index)
+    
+    if save_index:
+        save_concept_index(concept_index, output_dir)
+    manifest = load_extraction_manifest(output_dir)
+    manifest[str(file_path)] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "hash": file_hash}
+    save_extraction_manifest(manifest, output_dir)
+    return generated_files
 
-def process_textbook_definitions(textbook_dir="textbook", output_dir="questions"):
-    """Process all markdown files in the textbook directory and generate questions."""
+def forget_textbook_file(file_path, output_dir="questions"):
+    """Remove a deleted textbook file from the concept index and the extraction manifest."""
+    concept_index = load_concept_index(output_dir)
+    concept_index.remove_file(str(file_path))
+    save_concept_index(concept_index, output_dir)
+    manifest = load_extraction_manifest(output_dir)
+    if manifest.pop(str(file_path), None) is not None:
+        save_extraction_manifest(manifest, output_dir)
+
+def process_textbook_definitions(textbook_dir="textbook", output_dir="questions", workers=None,
+                                 include=("*.md",), exclude=(), force=False):
+    """Process all markdown files below the textbook directory and generate questions.
+    
+    Files whose size and mtime match the extraction manifest are skipped
+    without being read, as are files whose content hash did not change.
+    The remaining files are parsed in parallel across worker processes; the
+    parent indexes the results and writes the questions in path order.
+    """
     generated_files = []
+    concept_index = load_concept_index(output_dir)
+    manifest = {} if force else load_extraction_manifest(output_dir)
     
     print(f"\nLooking for markdown files in: {textbook_dir}")
-    files = os.listdir(textbook_dir)
-    print(f"Found files: {files}")
-    
-    for filename in files:
-        if filename.endswith('.md'):
-            file_path = os.path.join(textbook_dir, filename)
-            print(f"\nProcessing: {filename}")
-            definitions = extract_definitions_from_markdown(file_path)
-            print(f"Found {len(definitions)} definitions in {filename}")
-            
-            for title, definition_body in definitions:
-                question_file = generate_definition_question(
-                    title=title,
-                    definition_body=definition_body,
-                    output_dir=output_dir
-                )
-                generated_files.append(question_file)
-                print(f"Generated question file: {question_file}")
+    stamps = discover_textbook_files(textbook_dir, include, exclude)
+    # Files missing from the concept index are re-read even when unchanged, rebuilding a lost index
+    file_paths = sorted(
+        path for path, (mtime_ns, size) in stamps.items()
+        if (manifest.get(path, {}).get("mtime_ns"), manifest.get(path, {}).get("size")) != (mtime_ns, size)
+        or path not in concept_index.files
+    )
+    print(f"Found {len(stamps)} files, {len(file_paths)} new or modified")
+    
+    parsed_files = []
+    total_definitions = 0
+    
+    # Index every file first so related concepts can come from any chapter
+    for file_path, (file_hash, definitions) in zip(file_paths, parse_textbook_files(file_paths, workers)):
+        mtime_ns, size = stamps[file_path]
+        unchanged = manifest.get(file_path, {}).get("hash") == file_hash and file_path in concept_index.files
+        manifest[file_path] = {"mtime_ns": mtime_ns, "size": size, "hash": file_hash}
+        if unchanged:
+            continue
+        concept_index.update_file(file_path, definitions, file_hash)
+        print(f"Found {len(definitions)} definitions in {file_path}")
+        parsed_files.append((file_path, definitions))
+        total_definitions += len(definitions)
+    
+    # Drop files that were removed from the textbook
+    textbook_root = os.path.join(textbook_dir, "")
+    for indexed_path in set(concept_index.files) | set(manifest):
+        if indexed_path.startswith(textbook_root) and indexed_path not in stamps:
+            concept_index.remove_file(indexed_path)
+            manifest.pop(indexed_path, None)
+    
+    for file_path, definitions in parsed_files:
+        generated_files.extend(generate_file_questions(file_path, definitions, output_dir, concept_index))
     
+    save_concept_index(concept_index, output_dir)
+    save_extraction_manifest(manifest, output_dir)
+    print(f"\nExtracted {total_definitions} definitions from {len(parsed_files)} changed files "
+          f"into {len(generated_files)} questions")
     return generated_files
 
 if __name__ == "__main__":
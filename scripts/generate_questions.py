@@ -1,12 +1,21 @@
 import random
-import yaml
-import os
 from pathlib import Path
 
+from bank import new_question_id, write_question
+from difficulty import score_difficulty
+from expressions import format_value, synthesize_expressions, trace, truth_table
+from loop_analysis import analyze_loop, nested_iterations
+from minimize import simplify
+from scope_analysis import describe_execution, describe_scopes, generate_programs
+from mutations import MUTATION_HINTS, behavior, random_mutant, render_loop
+
 # Get the script's directory
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
 
+# Loops visiting more values than this only record their first and last value in the answer key
+MAX_LISTED_VALUES = 50
+
 def load_template(template_name):
     """Load a template from the templates directory."""
     template_path = PROJECT_ROOT / 'templates' / template_name
@@ -20,13 +29,17 @@ def substitute_placeholders(template_content, replacements):
         template_content = template_content.replace(placeholder, value)
     return template_content
 
-def generate_loop_question(output_dir="questions", start_range=(1, 5), end_range=(6, 15), id_prefix="gen_loop"):
-    """Generate a loop question using the apply_code.md template."""
-    start = random.randint(start_range[0], start_range[1])
-    end = random.randint(end_range[0], end_range[1])
+def loop_question(start_range=(1, 5), end_range=(6, 15), id_prefix="gen_loop", rng=random):
+    """Build a loop question from the apply_code.md template without writing it.
+
+    Returns its front matter, body and answer key. Pass a seeded
+    random.Random as rng to make the loop reproducible.
+    """
+    start = rng.randint(start_range[0], start_range[1])
+    end = rng.randint(end_range[0], end_range[1])
     
     # Generate a unique ID
-    unique_id = f"{id_prefix}_{random.randint(1000, 9999)}"
+    unique_id = new_question_id(id_prefix)
     
     # Create the code snippet and question text
     code_snippet = f"```csharp\nfor(int i = {start}; i < {end}; i++) {{ /* ... */ }}\n```"
@@ -39,7 +52,7 @@ def generate_loop_question(output_dir="questions", start_range=(1, 5), end_range
         "metadata": {
             "topic": "loops",
             "bloom_level": "apply",
-            "difficulty": 2,
+            "difficulty": score_difficulty(code_snippet, 2),
             "tags": ["loops", "iteration"]
         }
     }
@@ -54,21 +67,27 @@ def generate_loop_question(output_dir="questions", start_range=(1, 5), end_range
     }
     filled_template = substitute_placeholders(template_content, replacements)
     
-    # Add front matter to the filled template
-    markdown_content = "---\n"
-    markdown_content += yaml.dump(front_matter, default_flow_style=False)
-    markdown_content += "---\n\n"
-    markdown_content += filled_template
-
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
+    # Answer: the values the loop visits and the counter value that ends it
+    analysis = analyze_loop(start, "<", end)
+    answer_key = {"type": "loop", **analysis}
+    if analysis["iterations"] <= MAX_LISTED_VALUES:
+        answer_key["values"] = list(range(start, end))
+    else:
+        answer_key["first_value"] = start
+        answer_key["last_value"] = end - 1
     
-    # Write to file
-    file_path = f"{output_dir}/{unique_id}.md"
-    with open(file_path, 'w') as f:
-        f.write(markdown_content)
+    return front_matter, filled_template, answer_key
 
-    return file_path
+def generate_loop_question(output_dir="questions", start_range=(1, 5), end_range=(6, 15), id_prefix="gen_loop",
+                           rng=random):
+    """Generate a loop question using the apply_code.md template.
+
+    Pass a seeded random.Random as rng to make the loop reproducible.
+    """
+    front_matter, filled_template, answer_key = loop_question(start_range, end_range, id_prefix, rng)
+    
+    # Write the question and its answer key
+    return write_question(output_dir, front_matter, filled_template, answer_key, id_prefix)
 
 def generate_off_by_one_question(output_dir="questions", id_prefix="off_by_one"):
     """Generate an off-by-one concept question with parameterized variations."""
@@ -82,6 +101,23 @@ def generate_off_by_one_question(output_dir="questions", id_prefix="off_by_one")
             return f"for(int i = 1; i <= {size}; i++) {{ {array_name}[i] = i * 2; }}"
         return f"for(int i = 0; i < {array_name}.Length - 1; i++) {{ {array_name}[i] = i; }}"
 
+    # Helper function to inject a verified bug into a correct loop with the mutation engine
+    def mutant_variation():
+        correct_loop, mutant_loop, mutation, bug = random_mutant()
+        return {
+            "loop_code": render_loop(mutant_loop),
+            "intention": correct_loop["intention"],
+            "hint_focus": MUTATION_HINTS[mutation],
+            "difficulty": 3,
+            "answer": {
+                "bug": bug,
+                "fix": render_loop(correct_loop),
+                "mutation": mutation,
+                "actual_behavior": behavior(mutant_loop),
+                "expected_behavior": behavior(correct_loop)
+            }
+        }
+
     # Generate random ranges for number sequences
     start = random.randint(1, 5)
     end = random.randint(start + 3, start + 8)
@@ -94,50 +130,82 @@ def generate_off_by_one_question(output_dir="questions", id_prefix="off_by_one")
             "loop_code": f"for(int i = {start}; i < {end}; i++) {{ Console.WriteLine(i); }}",
             "intention": f"print the numbers {start} through {end}",
             "hint_focus": "termination",
-            "difficulty": 2
+            "difficulty": 2,
+            "answer": {
+                "bug": f"the condition i < {end} stops before printing {end}",
+                "fix": f"for(int i = {start}; i <= {end}; i++) {{ Console.WriteLine(i); }}",
+                "actual_values": list(range(start, end)),
+                "expected_values": list(range(start, end + 1))
+            }
         },
         # Including zero unintentionally
         {
             "loop_code": f"for(int i = 0; i <= {end}; i++) {{ Console.WriteLine(i); }}",
             "intention": f"print the numbers 1 through {end}",
             "hint_focus": "starting",
-            "difficulty": 2
+            "difficulty": 2,
+            "answer": {
+                "bug": "the loop starts at 0, so 0 is printed as well",
+                "fix": f"for(int i = 1; i <= {end}; i++) {{ Console.WriteLine(i); }}",
+                "actual_values": list(range(0, end + 1)),
+                "expected_values": list(range(1, end + 1))
+            }
         },
         # Array indexing error with size parameter
         {
             "loop_code": generate_array_code(size, "process"),
             "intention": f"fill an array of size {size} with even numbers (2, 4, 6, etc.)",
             "hint_focus": "array indexing",
-            "difficulty": 3
+            "difficulty": 3,
+            "answer": {
+                "bug": f"index {size} is outside an array of size {size} (IndexOutOfRangeException) and index 0 is never filled",
+                "fix": f"loop from i = 0 while i < {size}, storing (i + 1) * 2"
+            }
         },
         # Missing last array element
         {
             "loop_code": generate_array_code(size, "print"),
             "intention": "print all elements in the array",
             "hint_focus": "array length calculation",
-            "difficulty": 3
+            "difficulty": 3,
+            "answer": {
+                "bug": "the condition i < Length - 1 skips the last element",
+                "fix": "use the condition i < Length"
+            }
         },
         # Subtle expression-based condition (harder)
         {
             "loop_code": f"for(int i = 0; i < (size + 1) / 2; i++) {{ Process(i); }}",
             "intention": "process half of the elements (rounded up)",
             "hint_focus": "division expression",
-            "difficulty": 4
+            "difficulty": 4,
+            "answer": {
+                "bug": None,
+                "fix": "none needed: (size + 1) / 2 rounds up under integer division"
+            }
         },
         # Complex boundary condition
         {
             "loop_code": f"while(start + offset < end - 1) {{ Process(start + offset++); }}",
             "intention": "process all values between start and end",
             "hint_focus": "compound condition",
-            "difficulty": 4
-        }
+            "difficulty": 4,
+            "answer": {
+                "bug": "the condition start + offset < end - 1 stops at end - 2, so end - 1 and end are never processed",
+                "fix": "while(start + offset <= end) { Process(start + offset++); }"
+            }
+        },
+        # Mutant of a correct loop, built only when chosen
+        mutant_variation
     ]
     
     # Choose a random variation
     variation = random.choice(variations)
+    if callable(variation):
+        variation = variation()
     
     # Generate a unique ID
-    unique_id = f"{id_prefix}_{random.randint(1000, 9999)}"
+    unique_id = new_question_id(id_prefix)
     
     # Create front matter
     front_matter = {
@@ -145,7 +213,7 @@ def generate_off_by_one_question(output_dir="questions", id_prefix="off_by_one")
         "metadata": {
             "topic": "loops",
             "bloom_level": "analyze",
-            "difficulty": variation["difficulty"],
+            "difficulty": score_difficulty(variation["loop_code"], variation["difficulty"]),
             "tags": ["loops", "off-by-one", "debugging"]
         }
     }
@@ -161,21 +229,10 @@ def generate_off_by_one_question(output_dir="questions", id_prefix="off_by_one")
     }
     filled_template = substitute_placeholders(template_content, replacements)
     
-    # Add front matter to the filled template
-    markdown_content = "---\n"
-    markdown_content += yaml.dump(front_matter, default_flow_style=False)
-    markdown_content += "---\n\n"
-    markdown_content += filled_template
-
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
+    answer_key = {"type": "off_by_one", **variation["answer"]}
     
-    # Write to file
-    file_path = f"{output_dir}/{unique_id}.md"
-    with open(file_path, 'w') as f:
-        f.write(markdown_content)
-
-    return file_path
+    # Write the question and its answer key
+    return write_question(output_dir, front_matter, filled_template, answer_key, id_prefix)
 
 def generate_loop_mechanics_question(output_dir="questions", id_prefix="loop_mechanics"):
     """Generate a question testing understanding of loop mechanics."""
@@ -189,13 +246,119 @@ def generate_loop_invariant_question(output_dir="questions", id_prefix="loop_inv
     """Generate a question about loop invariants."""
     # Implementation coming in next message...
 
-def generate_nested_loop_question(output_dir="questions", id_prefix="nested_loop"):
-    """Generate a question about nested loops."""
-    # Implementation coming in next message...
+def generate_nested_loop_question(output_dir="questions", outer_range=(3, 8), id_prefix="nested_loop"):
+    """Generate a nested loop counting question using the nested_loop.md template."""
+    
+    # Helper function to render an inner loop term that may depend on i
+    def render_term(term):
+        if not isinstance(term, tuple):
+            return str(term)
+        coefficient, constant = term
+        text = "i" if coefficient == 1 else f"{coefficient} * i"
+        if constant > 0:
+            return f"{text} + {constant}"
+        if constant < 0:
+            return f"{text} - {-constant}"
+        return text
+    
+    n = random.randint(outer_range[0], outer_range[1])
+    m = random.randint(outer_range[0], outer_range[1])
+    
+    # (outer loop, inner loop) pairs in the form analyzed by loop_analysis
+    patterns = [
+        # Rectangular
+        ((0, "<", n, 1), (0, "<", m, 1)),
+        # Triangular below the diagonal
+        ((0, "<", n, 1), (0, "<", (1, 0), 1)),
+        # Triangular from the diagonal
+        ((0, "<", n, 1), ((1, 0), "<", n, 1)),
+        # Inclusive triangular
+        ((1, "<=", n, 1), (1, "<=", (1, 0), 1)),
+        # Counting down the inner loop
+        ((0, "<", n, 1), ((1, 0), ">", 0, -1)),
+        # Inner loop stepping by two
+        ((0, "<", n, 1), (0, "<", (2, 0), 2))
+    ]
+    outer, inner = random.choice(patterns)
+    
+    def render_loop(counter, loop):
+        start, operator, bound, step = loop
+        update = f"{counter}++" if step == 1 else f"{counter}--" if step == -1 else f"{counter} += {step}"
+        return f"for(int {counter} = {render_term(start)}; {counter} {operator} {render_term(bound)}; {update})"
+    
+    nested_loop_code = (
+        "int count = 0;\n"
+        f"{render_loop('i', outer)}\n"
+        "{\n"
+        f"    {render_loop('j', inner)}\n"
+        "    {\n"
+        "        count++;\n"
+        "    }\n"
+        "}\n"
+        "Console.WriteLine(count);"
+    )
+    
+    # Generate a unique ID
+    unique_id = new_question_id(id_prefix)
+    
+    # Create front matter
+    front_matter = {
+        "id": unique_id,
+        "metadata": {
+            "topic": "loops",
+            "bloom_level": "analyze",
+            "difficulty": score_difficulty(nested_loop_code, 3),
+            "tags": ["loops", "nested-loops", "patterns"]
+        }
+    }
+    
+    # Load the template
+    template_content = load_template('nested_loop.md')
+    
+    # Replace placeholders
+    replacements = {
+        "NESTED_LOOP_CODE": nested_loop_code
+    }
+    filled_template = substitute_placeholders(template_content, replacements)
+    
+    # Answer: iteration counts in closed form; count++ runs once per inner iteration
+    total_iterations = nested_iterations(outer, inner)
+    answer_key = {
+        "type": "nested_loop",
+        "outer_iterations": analyze_loop(*outer)["iterations"],
+        "total_iterations": total_iterations,
+        "output": total_iterations
+    }
+    
+    # Write the question and its answer key
+    return write_question(output_dir, front_matter, filled_template, answer_key, id_prefix)
 
 def generate_boolean_expression_question(output_dir="questions", id_prefix="bool_expr"):
     """Generate a boolean expression evaluation question."""
     
+    # Helper function to build a random expression that exercises short-circuiting or side effects
+    def synthesized_variation():
+        candidates = synthesize_expressions(20, depth=2)
+        for expression, values in candidates:
+            analysis = trace(expression, values)
+            if analysis["skipped"] or analysis["final_state"] != values:
+                break
+        has_side_effects = analysis["final_state"] != values
+        return {
+            "expression": expression,
+            "initial_values": ", ".join(f"{name} = {format_value(value)}" for name, value in values.items()),
+            "evaluation_steps": "\n".join(f"{i}. {step}" for i, step in enumerate(analysis["steps"], 1)),
+            "concepts": "short-circuit evaluation and side effects in boolean expressions",
+            "focus_point": "which operands C# evaluates, and in which order",
+            "hint_text": "Evaluate left to right; && stops at the first false operand and || at the first true one",
+            "extra_task": ("What are the values of the variables after the expression is evaluated?"
+                           if has_side_effects else "Which sub-expressions are never evaluated?"),
+            "difficulty": 3 if has_side_effects else 2,
+            "expected": analysis["result"],
+            "final_state": analysis["final_state"],
+            "skipped": analysis["skipped"]
+        }
+    
     # Define possible variations
     variations = [
         # Basic boolean precedence
@@ -207,7 +370,10 @@ def generate_boolean_expression_question(output_dir="questions", id_prefix="bool
             "focus_point": "AND has higher precedence than OR",
             "hint_text": "Evaluate AND operations before OR operations",
             "extra_task": "How would adding parentheses around 'true || false' change the result?",
-            "difficulty": 1
+            "difficulty": 1,
+            "expected": True,
+            "final_state": {},
+            "skipped": ["false && false"]
         },
         # Short-circuit evaluation
         {
@@ -218,7 +384,10 @@ def generate_boolean_expression_question(output_dir="questions", id_prefix="bool
             "focus_point": "the right side of AND won't execute if the left is false",
             "hint_text": "Consider what happens when the left side of && is false",
             "extra_task": "What will be the value of y after this expression is evaluated?",
-            "difficulty": 2
+            "difficulty": 2,
+            "expected": False,
+            "final_state": {"x": 3, "y": 7},
+            "skipped": ["y++ < 10"]
         },
         # De Morgan's Law
         {
@@ -229,15 +398,22 @@ def generate_boolean_expression_question(output_dir="questions", id_prefix="bool
             "focus_point": "how NOT affects boolean expressions",
             "hint_text": "Apply NOT operations first, then evaluate AND, finally OR",
             "extra_task": "Rewrite this expression using De Morgan's Law",
-            "difficulty": 3
-        }
+            "difficulty": 3,
+            "expected": True,
+            "final_state": {"a": True, "b": False, "c": True},
+            "skipped": ["c && !b"]
+        },
+        # Synthesized expression, built only when chosen
+        synthesized_variation
     ]
     
     # Choose a random variation
     variation = random.choice(variations)
+    if callable(variation):
+        variation = variation()
     
     # Generate unique ID
-    unique_id = f"{id_prefix}_{random.randint(1000, 9999)}"
+    unique_id = new_question_id(id_prefix)
     
     # Create front matter
     front_matter = {
@@ -245,7 +421,7 @@ def generate_boolean_expression_question(output_dir="questions", id_prefix="bool
         "metadata": {
             "topic": "expressions",
             "bloom_level": "analyze",
-            "difficulty": variation["difficulty"],
+            "difficulty": score_difficulty(variation["expression"], variation["difficulty"]),
             "tags": ["boolean", "operators", "precedence"]
         }
     }
@@ -265,21 +441,17 @@ def generate_boolean_expression_question(output_dir="questions", id_prefix="bool
     }
     filled_template = substitute_placeholders(template_content, replacements)
     
-    # Create final content
-    markdown_content = "---\n"
-    markdown_content += yaml.dump(front_matter, default_flow_style=False)
-    markdown_content += "---\n\n"
-    markdown_content += filled_template
-    
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Write to file
-    file_path = f"{output_dir}/{unique_id}.md"
-    with open(file_path, 'w') as f:
-        f.write(markdown_content)
+    answer_key = {
+        "type": "boolean_expression",
+        "expression": variation["expression"],
+        "expected": variation["expected"],
+        "steps": variation["evaluation_steps"].split("\n"),
+        "final_state": variation["final_state"],
+        "skipped": variation["skipped"]
+    }
     
-    return file_path
+    # Write the question and its answer key
+    return write_question(output_dir, front_matter, filled_template, answer_key, id_prefix)
 
 def generate_numeric_expression_question(output_dir="questions", id_prefix="num_expr"):
     """Generate a parameterized numeric expression evaluation question."""
@@ -291,9 +463,9 @@ def generate_numeric_expression_question(output_dir="questions", id_prefix="num_
             b = random.randint(2, 10)
             c = random.randint(2, 8)
             ops = [
-                (f"{a} + {b} * {c}", f"{b} * {c} = {b*c}\n{a} + {b*c} = {a + b*c}"),
-                (f"{a} - {b} / {c}", f"{b} / {c} = {b//c}\n{a} - {b//c} = {a - b//c}"),
-                (f"{a} * ({b} + {c})", f"{b} + {c} = {b+c}\n{a} * {b+c} = {a*(b+c)}")
+                (f"{a} + {b} * {c}", f"{b} * {c} = {b*c}\n{a} + {b*c} = {a + b*c}", a + b*c),
+                (f"{a} - {b} / {c}", f"{b} / {c} = {b//c}\n{a} - {b//c} = {a - b//c}", a - b//c),
+                (f"{a} * ({b} + {c})", f"{b} + {c} = {b+c}\n{a} * {b+c} = {a*(b+c)}", a*(b+c))
             ]
             return random.choice(ops)
         elif complexity == 2:
@@ -302,13 +474,16 @@ def generate_numeric_expression_question(output_dir="questions", id_prefix="num_
             c = random.randint(3, 9)
             # Add negative numbers for modulo
             neg_a = -a
+            # C#'s % takes the sign of the dividend, unlike Python's
+            neg_mod = -(a % b)
             ops = [
                 (f"({a} / {b}) * {c} + {a} % {b}", 
-                 f"{a} / {b} = {a//b}\n{a} % {b} = {a%b}\n({a//b}) * {c} = {(a//b)*c}\n{(a//b)*c} + {a%b} = {(a//b)*c + a%b}"),
+                 f"{a} / {b} = {a//b}\n{a} % {b} = {a%b}\n({a//b}) * {c} = {(a//b)*c}\n{(a//b)*c} + {a%b} = {(a//b)*c + a%b}", (a//b)*c + a%b),
                 (f"{neg_a} % {b} + {c} * ({a} / {b})",
-                 f"{neg_a} % {b} = {neg_a%b}\n{a} / {b} = {a//b}\n{c} * {a//b} = {c*(a//b)}\n{neg_a%b} + {c*(a//b)} = {neg_a%b + c*(a//b)}"),
+                 f"{neg_a} % {b} = {neg_mod}\n{a} / {b} = {a//b}\n{c} * {a//b} = {c*(a//b)}\n{neg_mod} + {c*(a//b)} = {neg_mod + c*(a//b)}",
+                 neg_mod + c*(a//b)),
                 (f"({a} + {b}) / {c} * ({a} % {c})",
-                 f"{a} + {b} = {a+b}\n{a} % {c} = {a%c}\n({a+b}) / {c} = {(a+b)//c}\n{(a+b)//c} * {a%c} = {((a+b)//c) * (a%c)}")
+                 f"{a} + {b} = {a+b}\n{a} % {c} = {a%c}\n({a+b}) / {c} = {(a+b)//c}\n{(a+b)//c} * {a%c} = {((a+b)//c) * (a%c)}", ((a+b)//c) * (a%c))
             ]
             return random.choice(ops)
         else:
@@ -319,11 +494,11 @@ def generate_numeric_expression_question(output_dir="questions", id_prefix="num_
             d = round(random.uniform(0.1, 0.9), 1)
             ops = [
                 (f"{a} / {b} + {c} * {d}",
-                 f"{a} / {b} = {a/b:.2f}\n{c} * {d} = {c*d:.2f}\n{a/b:.2f} + {c*d:.2f} = {a/b + c*d:.2f}"),
+                 f"{a} / {b} = {a/b:.2f}\n{c} * {d} = {c*d:.2f}\n{a/b:.2f} + {c*d:.2f} = {a/b + c*d:.2f}", a/b + c*d),
                 (f"({a} + {c}) / {b} - {d} * {c}",
-                 f"{a} + {c} = {a+c}\n{d} * {c} = {d*c:.2f}\n({a+c}) / {b} = {(a+c)/b:.2f}\n{(a+c)/b:.2f} - {d*c:.2f} = {(a+c)/b - d*c:.2f}"),
+                 f"{a} + {c} = {a+c}\n{d} * {c} = {d*c:.2f}\n({a+c}) / {b} = {(a+c)/b:.2f}\n{(a+c)/b:.2f} - {d*c:.2f} = {(a+c)/b - d*c:.2f}", (a+c)/b - d*c),
                 (f"{a} * {d} / ({b} + {c})",
-                 f"{a} * {d} = {a*d:.2f}\n{b} + {c} = {b+c:.2f}\n{a*d:.2f} / {b+c:.2f} = {(a*d)/(b+c):.2f}")
+                 f"{a} * {d} = {a*d:.2f}\n{b} + {c} = {b+c:.2f}\n{a*d:.2f} / {b+c:.2f} = {(a*d)/(b+c):.2f}", (a*d)/(b+c))
             ]
             return random.choice(ops)
     
@@ -365,7 +540,7 @@ def generate_numeric_expression_question(output_dir="questions", id_prefix="num_
     variation = random.choice(variations)
     
     # Generate unique ID
-    unique_id = f"{id_prefix}_{random.randint(1000, 9999)}"
+    unique_id = new_question_id(id_prefix)
     
     # Create front matter
     front_matter = {
@@ -373,7 +548,7 @@ def generate_numeric_expression_question(output_dir="questions", id_prefix="num_
         "metadata": {
             "topic": "expressions",
             "bloom_level": "analyze",
-            "difficulty": variation["difficulty"],
+            "difficulty": score_difficulty(variation["expression"][0], variation["difficulty"]),
             "tags": ["arithmetic", "operators", "precedence"]
         }
     }
@@ -393,21 +568,18 @@ def generate_numeric_expression_question(output_dir="questions", id_prefix="num_
     }
     filled_template = substitute_placeholders(template_content, replacements)
     
-    # Create final content
-    markdown_content = "---\n"
-    markdown_content += yaml.dump(front_matter, default_flow_style=False)
-    markdown_content += "---\n\n"
-    markdown_content += filled_template
-    
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Write to file
-    file_path = f"{output_dir}/{unique_id}.md"
-    with open(file_path, 'w') as f:
-        f.write(markdown_content)
+    # Doubles are compared to the two decimals the steps are shown with
+    expected = variation["expression"][2]
+    answer_key = {
+        "type": "numeric_expression",
+        "expression": variation["expression"][0],
+        "expected": expected,
+        "tolerance": 0.005 if isinstance(expected, float) else 0,
+        "steps": variation["expression"][1].split("\n")
+    }
     
-    return file_path
+    # Write the question and its answer key
+    return write_question(output_dir, front_matter, filled_template, answer_key, id_prefix)
 
 def generate_mixed_expression_question(output_dir="questions", id_prefix="mixed_expr"):
     """Generate a mixed expression evaluation question."""
@@ -424,7 +596,8 @@ def generate_mixed_expression_question(output_dir="questions", id_prefix="mixed_
             "focus_points": "arithmetic before comparison, comparison before boolean operations",
             "hint_text": "Evaluate arithmetic first, then comparisons, then boolean operations",
             "extra_task": "What values of x, y, and z would make this expression false?",
-            "difficulty": 2
+            "difficulty": 2,
+            "expected": True
         },
         # Floating-point comparison
         {
@@ -436,7 +609,8 @@ def generate_mixed_expression_question(output_dir="questions", id_prefix="mixed_
             "focus_points": "why direct equality comparison with floating-point numbers is problematic",
             "hint_text": "Floating-point arithmetic isn't always exact",
             "extra_task": "Why is using Math.Abs and a small epsilon better than direct equality comparison?",
-            "difficulty": 3
+            "difficulty": 3,
+            "expected": True
         }
     ]
     
@@ -444,7 +618,7 @@ def generate_mixed_expression_question(output_dir="questions", id_prefix="mixed_
     variation = random.choice(variations)
     
     # Generate unique ID
-    unique_id = f"{id_prefix}_{random.randint(1000, 9999)}"
+    unique_id = new_question_id(id_prefix)
     
     # Create front matter
     front_matter = {
@@ -452,7 +626,7 @@ def generate_mixed_expression_question(output_dir="questions", id_prefix="mixed_
         "metadata": {
             "topic": "expressions",
             "bloom_level": "analyze",
-            "difficulty": variation["difficulty"],
+            "difficulty": score_difficulty(variation["expression"], variation["difficulty"]),
             "tags": ["mixed", "operators", "precedence", "comparison"]
         }
     }
@@ -473,18 +647,15 @@ def generate_mixed_expression_question(output_dir="questions", id_prefix="mixed_
     }
     filled_template = substitute_placeholders(template_content, replacements)
     
-    # Create final content
-    markdown_content = "---\n"
-    markdown_content += yaml.dump(front_matter, default_flow_style=False)
-    markdown_content += "---\n\n"
-    markdown_content += filled_template
-    
-    # Write to file
-    file_path = f"{output_dir}/{unique_id}.md"
-    with open(file_path, 'w') as f:
-        f.write(markdown_content)
+    answer_key = {
+        "type": "mixed_expression",
+        "expression": variation["expression"],
+        "expected": variation["expected"],
+        "steps": variation["evaluation_steps"].split("\n")
+    }
     
-    return file_path
+    # Write the question and its answer key
+    return write_question(output_dir, front_matter, filled_template, answer_key, id_prefix)
 
 def generate_truth_table_question(output_dir="questions", id_prefix="truth_table"):
     """Generate a truth table question with parameterized expressions."""
@@ -650,7 +821,7 @@ def generate_truth_table_question(output_dir="questions", id_prefix="truth_table
         instructions = "Fill in all values in the truth table below, showing your work in the intermediate columns."
     
     # Generate unique ID
-    unique_id = f"{id_prefix}_{random.randint(1000, 9999)}"
+    unique_id = new_question_id(id_prefix)
     
     # Create front matter
     front_matter = {
@@ -658,7 +829,7 @@ def generate_truth_table_question(output_dir="questions", id_prefix="truth_table
         "metadata": {
             "topic": "expressions",
             "bloom_level": "analyze",
-            "difficulty": variation["difficulty"],
+            "difficulty": score_difficulty(variation["expression"], variation["difficulty"]),
             "tags": ["boolean", "truth-tables", "operators"]
         }
     }
@@ -680,21 +851,20 @@ def generate_truth_table_question(output_dir="questions", id_prefix="truth_table
     }
     filled_template = substitute_placeholders(template_content, replacements)
     
-    # Create final content
-    markdown_content = "---\n"
-    markdown_content += yaml.dump(front_matter, default_flow_style=False)
-    markdown_content += "---\n\n"
-    markdown_content += filled_template
-    
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Write to file
-    file_path = f"{output_dir}/{unique_id}.md"
-    with open(file_path, 'w') as f:
-        f.write(markdown_content)
+    # Answer: the Result column, top row first, and a minimal equivalent expression
+    result_column = truth_table(variation["expression"], variation["variables"])
+    simplified, can_simplify = simplify(variation["expression"], result_column, variation["variables"])
+    answer_key = {
+        "type": "truth_table",
+        "expression": variation["expression"],
+        "variables": variation["variables"],
+        "result_column": result_column,
+        "simplified": simplified,
+        "can_simplify": can_simplify
+    }
     
-    return file_path
+    # Write the question and its answer key
+    return write_question(output_dir, front_matter, filled_template, answer_key, id_prefix)
 
 def generate_variable_assignment_question(output_dir="questions", id_prefix="var_assign"):
     """Generate a question about variable assignment vs equality operators."""
@@ -772,7 +942,8 @@ def generate_variable_assignment_question(output_dir="questions", id_prefix="var
             "focus_point": "using = in an if condition performs assignment, not comparison",
             "hint_text": "The = operator always performs assignment and returns the assigned value",
             "extra_task": "What would happen if you changed the = to == in the if condition?",
-            "difficulty": 1
+            "difficulty": 1,
+            "error_lines": [3]
         },
         # Level 2: Multiple assignments
         {
@@ -782,7 +953,8 @@ def generate_variable_assignment_question(output_dir="questions", id_prefix="var
             "focus_point": "assignment in a while condition creates an infinite loop if the assigned value is non-zero",
             "hint_text": "Think about what value is being assigned and returned in the while condition",
             "extra_task": "How many times will this loop execute? Why?",
-            "difficulty": 2
+            "difficulty": 2,
+            "error_lines": [3]
         },
         # Level 3: Nested conditions
         {
@@ -792,7 +964,8 @@ def generate_variable_assignment_question(output_dir="questions", id_prefix="var
             "focus_point": "how assignments cascade through nested conditions",
             "hint_text": "Track how each assignment changes the values of x, y, and z",
             "extra_task": "Rewrite this code to correctly check for equality between all three variables",
-            "difficulty": 3
+            "difficulty": 3,
+            "error_lines": [4, 6]
         }
     ]
     
@@ -800,7 +973,7 @@ def generate_variable_assignment_question(output_dir="questions", id_prefix="var
     variation = random.choice(variations)
     
     # Generate unique ID
-    unique_id = f"{id_prefix}_{random.randint(1000, 9999)}"
+    unique_id = new_question_id(id_prefix)
     
     # Create front matter
     front_matter = {
@@ -808,7 +981,7 @@ def generate_variable_assignment_question(output_dir="questions", id_prefix="var
         "metadata": {
             "topic": "variables",
             "bloom_level": "analyze",
-            "difficulty": variation["difficulty"],
+            "difficulty": score_difficulty(variation["code"][0], variation["difficulty"]),
             "tags": ["variables", "assignment", "equality", "operators"]
         }
     }
@@ -829,21 +1002,16 @@ def generate_variable_assignment_question(output_dir="questions", id_prefix="var
     }
     filled_template = substitute_placeholders(template_content, replacements)
     
-    # Create final content
-    markdown_content = "---\n"
-    markdown_content += yaml.dump(front_matter, default_flow_style=False)
-    markdown_content += "---\n\n"
-    markdown_content += filled_template
-    
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Write to file
-    file_path = f"{output_dir}/{unique_id}.md"
-    with open(file_path, 'w') as f:
-        f.write(markdown_content)
+    # Answer: an int assignment is not a bool, so every condition fails to compile
+    answer_key = {
+        "type": "variable_assignment",
+        "compiles": False,
+        "error": "CS0029",
+        "error_lines": variation["error_lines"]
+    }
     
-    return file_path
+    # Write the question and its answer key
+    return write_question(output_dir, front_matter, filled_template, answer_key, id_prefix)
 
 def generate_variable_scope_question(output_dir="questions", id_prefix="var_scope"):
     """Generate a question about variable scope and shadowing."""
@@ -872,7 +1040,8 @@ def generate_variable_scope_question(output_dir="questions", id_prefix="var_scop
                 f"Line 1: x = {x}\n"
                 f"Line 3: y = {y}\n"
                 f"Line 4: prints \"Inside: x={x}, y={y}\"\n"
-                f"Line 6: prints \"Outside: x={x}\""
+                f"Line 6: prints \"Outside: x={x}\"",
+                {"compiles": True, "output": [f"Inside: x={x}, y={y}", f"Outside: x={x}"]}
             )
         elif complexity == 2:
             # Variable shadowing
@@ -896,7 +1065,9 @@ def generate_variable_scope_question(output_dir="questions", id_prefix="var_scop
                 f"Line 1: outer x = {x}\n"
                 f"Line 3: inner x = {inner_x} (shadows outer x)\n"
                 f"Line 4: prints \"Inside: x={inner_x}\"\n"
-                f"Line 6: prints \"Outside: x={x}\""
+                f"Line 6: prints \"Outside: x={x}\"",
+                # C# rejects a local that reuses the name of an enclosing local
+                {"compiles": False, "error": "CS0136", "error_lines": [3]}
             )
         else:
             # Complex nested scopes
@@ -928,9 +1099,31 @@ def generate_variable_scope_question(output_dir="questions", id_prefix="var_scop
                 f"Line 5: inner a = {c}\n"
                 f"Line 6: prints \"Inner: a={c}, b={b}\"\n"
                 f"Line 8: prints \"Middle: a={a}, b={b}\"\n"
-                f"Line 10: prints \"Outer: a={a}\""
+                f"Line 10: prints \"Outer: a={a}\"",
+                {"compiles": False, "error": "CS0136", "error_lines": [5]}
             )
     
+    def synthesize_scope_code():
+        """Generate a random block nesting and derive its answers from the scope analysis."""
+        _, analysis = generate_programs(1, compiles=random.random() < 0.5)[0]
+        answer = {
+            "compiles": not analysis["errors"],
+            "declarations": analysis["declarations"],
+            "visibility": analysis["visibility"]
+        }
+        if analysis["errors"]:
+            answer["error"] = analysis["errors"][0]["code"]
+            answer["error_lines"] = sorted({error["line"] for error in analysis["errors"]})
+            answer["errors"] = analysis["errors"]
+        else:
+            answer["output"] = analysis["output"]
+        return (
+            "\n".join(analysis["lines"]),
+            describe_scopes(analysis),
+            describe_execution(analysis),
+            answer
+        )
+    
     # Define possible variations
     variations = [
         # Level 1: Basic scope
@@ -959,14 +1152,25 @@ def generate_variable_scope_question(output_dir="questions", id_prefix="var_scop
             "hint_text": "Track each variable's visibility level by level",
             "extra_task": "Add code to access each version of variable 'a' where possible",
             "difficulty": 3
+        },
+        # Level 3: Random block nesting, synthesized only when chosen
+        {
+            "code": synthesize_scope_code,
+            "concepts": "block scope, name conflicts and out-of-scope access",
+            "focus_point": "a local's scope is its entire block, including nested blocks",
+            "hint_text": "For each use of a name, find the innermost enclosing block that declares it",
+            "extra_task": "Fix every compile error while keeping each block's variables",
+            "difficulty": 3
         }
     ]
     
     # Choose a random variation
     variation = random.choice(variations)
+    if callable(variation["code"]):
+        variation["code"] = variation["code"]()
     
     # Generate unique ID
-    unique_id = f"{id_prefix}_{random.randint(1000, 9999)}"
+    unique_id = new_question_id(id_prefix)
     
     # Create front matter
     front_matter = {
@@ -974,7 +1178,7 @@ def generate_variable_scope_question(output_dir="questions", id_prefix="var_scop
         "metadata": {
             "topic": "variables",
             "bloom_level": "analyze",
-            "difficulty": variation["difficulty"],
+            "difficulty": score_difficulty(variation["code"][0], variation["difficulty"]),
             "tags": ["variables", "scope", "shadowing", "lifetime"]
         }
     }
@@ -994,21 +1198,10 @@ def generate_variable_scope_question(output_dir="questions", id_prefix="var_scop
     }
     filled_template = substitute_placeholders(template_content, replacements)
     
-    # Create final content
-    markdown_content = "---\n"
-    markdown_content += yaml.dump(front_matter, default_flow_style=False)
-    markdown_content += "---\n\n"
-    markdown_content += filled_template
+    answer_key = {"type": "variable_scope", **variation["code"][3]}
     
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Write to file
-    file_path = f"{output_dir}/{unique_id}.md"
-    with open(file_path, 'w') as f:
-        f.write(markdown_content)
-    
-    return file_path
+    # Write the question and its answer key
+    return write_question(output_dir, front_matter, filled_template, answer_key, id_prefix)
 
 def generate_variable_state_question(output_dir="questions", id_prefix="var_state"):
     """Generate a question about tracking variable state changes."""
@@ -1037,7 +1230,8 @@ def generate_variable_state_question(output_dir="questions", id_prefix="var_stat
                 "Changes occurred due to:\n"
                 "1. Initial assignments\n"
                 "2. Addition operation\n"
-                "3. Subtraction and reassignment"
+                "3. Subtraction and reassignment",
+                {"x": z - y, "y": z - y - z, "z": z}
             )
         elif complexity == 2:
             # Conditional state changes
@@ -1066,7 +1260,8 @@ def generate_variable_state_question(output_dir="questions", id_prefix="var_stat
                 "Changes occurred due to:\n"
                 "1. Initial assignments\n"
                 "2. Conditional execution (a < b)\n"
-                "3. Sequential assignments in if block"
+                "3. Sequential assignments in if block",
+                {"a": b, "b": b // 2} if a < b else {"a": a * 2, "b": a}
             )
         else:
             # Complex dependencies
@@ -1092,7 +1287,8 @@ def generate_variable_state_question(output_dir="questions", id_prefix="var_stat
                 "Changes occurred due to:\n"
                 "1. Initial assignments\n"
                 "2. Multiplication and dependencies\n"
-                "3. Order of operations affecting final values"
+                "3. Order of operations affecting final values",
+                {"x": y * z, "y": z * (y * z), "z": (y * z) * (z * (y * z))}
             )
     
     # Define possible variations
@@ -1130,7 +1326,7 @@ def generate_variable_state_question(output_dir="questions", id_prefix="var_stat
     variation = random.choice(variations)
     
     # Generate unique ID
-    unique_id = f"{id_prefix}_{random.randint(1000, 9999)}"
+    unique_id = new_question_id(id_prefix)
     
     # Create front matter
     front_matter = {
@@ -1138,7 +1334,7 @@ def generate_variable_state_question(output_dir="questions", id_prefix="var_stat
         "metadata": {
             "topic": "variables",
             "bloom_level": "analyze",
-            "difficulty": variation["difficulty"],
+            "difficulty": score_difficulty(variation["code"][0], variation["difficulty"]),
             "tags": ["variables", "state", "tracking", "assignment"]
         }
     }
@@ -1159,21 +1355,14 @@ def generate_variable_state_question(output_dir="questions", id_prefix="var_stat
     }
     filled_template = substitute_placeholders(template_content, replacements)
     
-    # Create final content
-    markdown_content = "---\n"
-    markdown_content += yaml.dump(front_matter, default_flow_style=False)
-    markdown_content += "---\n\n"
-    markdown_content += filled_template
-    
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Write to file
-    file_path = f"{output_dir}/{unique_id}.md"
-    with open(file_path, 'w') as f:
-        f.write(markdown_content)
+    answer_key = {
+        "type": "variable_state",
+        "variables": [name.strip() for name in variation["code"][1].split(",")],
+        "final_state": variation["code"][4]
+    }
     
-    return file_path
+    # Write the question and its answer key
+    return write_question(output_dir, front_matter, filled_template, answer_key, id_prefix)
 
 # Example usage:
 if __name__ == "__main__":
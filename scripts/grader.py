@@ -0,0 +1,157 @@
+import csv
+import json
+import re
+
+import numpy as np
+
+from bank import load_answer_keys
+
+# Answer key types that can be graded mechanically
+GRADABLE_TYPES = {
+    "truth_table",
+    "numeric_expression",
+    "variable_state",
+    "boolean_expression",
+    "mixed_expression"
+}
+
+TRUTH_VALUES = {"t": 1, "true": 1, "1": 1, "f": 0, "false": 0, "0": 0}
+
+def iter_submissions(path):
+    """Yield (student, question_id, answer) from a CSV or JSONL submissions file."""
+    with open(path, 'r', newline='') as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield str(record["student"]), record["question_id"], record["answer"]
+        else:
+            for row in csv.DictReader(f):
+                yield row["student"], row["question_id"], row["answer"]
+
+def parse_truth_values(answer):
+    """Parse truth values written as T/F, 1/0 or true/false, e.g. "FTTF" or "F, T, T, F"."""
+    if isinstance(answer, bool):
+        return [int(answer)]
+    if isinstance(answer, list):
+        tokens = [str(value).lower() for value in answer]
+    else:
+        tokens = re.findall(r"true|false|[tf01]", str(answer).lower())
+    if not all(token in TRUTH_VALUES for token in tokens):
+        return None
+    return [TRUTH_VALUES[token] for token in tokens]
+
+def parse_number(answer):
+    """Parse a numeric answer, returning NaN when it is not a number."""
+    try:
+        return float(answer)
+    except (TypeError, ValueError):
+        return float("nan")
+
+def parse_state(answer, variables):
+    """Parse a final state written as a dict or as "x = 5, y = -10" into the key's variable order."""
+    if not isinstance(answer, dict):
+        answer = dict(re.findall(r"([A-Za-z_]\w*)\s*[=:]\s*(-?[\d.]+)", str(answer)))
+    return [parse_number(answer.get(name)) for name in variables]
+
+def grade_group(answer_key, answers):
+    """Grade every answer to one question at once.
+
+    Returns each answer's score and a boolean matrix with one column per
+    gradable part (truth table cell, variable, or the single value).
+    """
+    kind = answer_key["type"]
+    count = len(answers)
+    if kind == "truth_table":
+        expected = np.array(answer_key["result_column"], dtype=np.int8)
+        # Rows that cannot be parsed stay at -1 and match no cell
+        given = np.full((count, len(expected)), -1, dtype=np.int8)
+        for row, answer in enumerate(answers):
+            values = parse_truth_values(answer)
+            if values is not None and len(values) == len(expected):
+                given[row] = values
+        parts = given == expected
+    elif kind == "numeric_expression":
+        given = np.fromiter((parse_number(answer) for answer in answers), dtype=float, count=count)
+        parts = (np.abs(given - answer_key["expected"]) <= answer_key["tolerance"] + 1e-9)[:, None]
+    elif kind == "variable_state":
+        variables = answer_key["variables"]
+        expected = np.array([answer_key["final_state"][name] for name in variables], dtype=float)
+        given = np.array([parse_state(answer, variables) for answer in answers], dtype=float)
+        parts = given.reshape(count, len(variables)) == expected
+    elif kind in ("boolean_expression", "mixed_expression"):
+        given = np.full(count, -1, dtype=np.int8)
+        for row, answer in enumerate(answers):
+            values = parse_truth_values(answer)
+            if values is not None and len(values) == 1:
+                given[row] = values[0]
+        parts = (given == int(answer_key["expected"]))[:, None]
+    else:
+        raise ValueError(f"Cannot grade answer key type: {kind}")
+    return parts.mean(axis=1), parts
+
+def grade_submissions(submissions_path, results_path, directory="questions", chunk_size=10000):
+    """Stream submissions, grade them against the bank's answer keys and write per-answer scores.
+
+    Submissions are buffered per question and graded in vectorized groups
+    every chunk_size rows. Returns per-item statistics.
+    """
+    answer_keys = load_answer_keys(directory)
+    totals = {}
+    pending = {}
+    pending_count = 0
+    ungraded = 0
+
+    with open(results_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["student", "question_id", "score"])
+
+        def flush():
+            for question_id, (students, answers) in pending.items():
+                scores, parts = grade_group(answer_keys[question_id], answers)
+                writer.writerows(
+                    (student, question_id, round(score, 4))
+                    for student, score in zip(students, scores.tolist())
+                )
+                item = totals.setdefault(question_id, {
+                    "submissions": 0,
+                    "score_sum": 0.0,
+                    "full_credit": 0,
+                    "part_correct": np.zeros(parts.shape[1], dtype=np.int64)
+                })
+                item["submissions"] += len(answers)
+                item["score_sum"] += float(scores.sum())
+                item["full_credit"] += int(parts.all(axis=1).sum())
+                item["part_correct"] += parts.sum(axis=0)
+            pending.clear()
+
+        for student, question_id, answer in iter_submissions(submissions_path):
+            answer_key = answer_keys.get(question_id)
+            if answer_key is None or answer_key["type"] not in GRADABLE_TYPES:
+                ungraded += 1
+                continue
+            students, answers = pending.setdefault(question_id, ([], []))
+            students.append(student)
+            answers.append(answer)
+            pending_count += 1
+            if pending_count >= chunk_size:
+                flush()
+                pending_count = 0
+        flush()
+
+    item_stats = {}
+    for question_id, item in totals.items():
+        submissions = item["submissions"]
+        item_stats[question_id] = {
+            "submissions": submissions,
+            "mean_score": item["score_sum"] / submissions,
+            "full_credit_rate": item["full_credit"] / submissions,
+            "part_accuracy": (item["part_correct"] / submissions).round(4).tolist()
+        }
+    return {"items": item_stats, "ungraded": ungraded}
+
+if __name__ == "__main__":
+    report = grade_submissions('submissions.csv', 'graded.csv', 'questions')
+    print(f"Graded {len(report['items'])} questions ({report['ungraded']} submissions not gradable)")
+    with open('item_stats.json', 'w') as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,160 @@
+import csv
+import json
+
+import numpy as np
+
+from bank import bump_generation, open_index
+
+# Running sums kept per item in the index's item_statistics table, in column order
+STATISTIC_COLUMNS = (
+    "responses", "score_sum", "pairs", "pair_score_sum", "pair_score_squares",
+    "rest_sum", "rest_squares", "product_sum"
+)
+
+# Lowest p-value of each calibrated difficulty; harder items fall through to 4
+DIFFICULTY_BANDS = ((0.85, 1), (0.65, 2), (0.40, 3))
+
+# Responses an item needs before its difficulty is calibrated
+MIN_RESPONSES = 30
+
+# Items discriminating less than this between strong and weak students are flagged
+LOW_DISCRIMINATION = 0.2
+
+def iter_results(path):
+    """Yield (student, question_id, score) from a graded results CSV or JSONL file."""
+    with open(path, 'r', newline='') as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield str(record["student"]), record["question_id"], float(record["score"])
+        else:
+            for row in csv.DictReader(f):
+                yield row["student"], row["question_id"], float(row["score"])
+
+def load_results(path, chunk_size=100000):
+    """Read a results file into parallel NumPy arrays, chunk_size rows at a time.
+
+    Returns (student indexes, item indexes, scores, item ids), with students
+    and items numbered in order of first appearance.
+    """
+    students = {}
+    items = {}
+    chunks = []
+    buffer = []
+
+    def flush():
+        if buffer:
+            chunks.append(np.array(buffer, dtype=np.float64).reshape(-1, 3))
+            buffer.clear()
+
+    for student, question_id, score in iter_results(path):
+        buffer.append((
+            students.setdefault(student, len(students)),
+            items.setdefault(question_id, len(items)),
+            score
+        ))
+        if len(buffer) >= chunk_size:
+            flush()
+    flush()
+
+    rows = np.concatenate(chunks) if chunks else np.empty((0, 3))
+    return rows[:, 0].astype(np.int64), rows[:, 1].astype(np.int64), rows[:, 2], list(items)
+
+def item_sums(student_index, item_index, scores, num_items):
+    """Compute each item's running sums (STATISTIC_COLUMNS order) for one cohort.
+
+    An item's discrimination pairs each score with the student's mean score
+    on the other items they answered, so students with a single response
+    count towards the p-value only.
+    """
+    totals = np.bincount(student_index, weights=scores)
+    counts = np.bincount(student_index)
+    others = counts[student_index] - 1
+    paired = others > 0
+    rest = np.where(paired, (totals[student_index] - scores) / np.maximum(others, 1), 0.0)
+    weights = paired.astype(np.float64)
+
+    def per_item(values):
+        return np.bincount(item_index, weights=values, minlength=num_items)
+
+    return np.stack([
+        np.bincount(item_index, minlength=num_items).astype(np.float64),
+        per_item(scores),
+        per_item(weights),
+        per_item(scores * weights),
+        per_item(scores * scores * weights),
+        per_item(rest),
+        per_item(rest * rest),
+        per_item(scores * rest)
+    ], axis=1)
+
+def calibrated_difficulty(p_value):
+    """Map an item's p-value to the 1-4 difficulty scale the generators use."""
+    for lowest, difficulty in DIFFICULTY_BANDS:
+        if p_value >= lowest:
+            return difficulty
+    return 4
+
+def item_statistics(sums):
+    """Derive (p-value, point-biserial discrimination, difficulty) from an item's running sums."""
+    responses, score_sum, pairs, x, xx, y, yy, xy = sums
+    p_value = score_sum / responses
+    discrimination = None
+    spread = (pairs * xx - x * x) * (pairs * yy - y * y)
+    if pairs > 1 and spread > 0:
+        discrimination = (pairs * xy - x * y) / spread ** 0.5
+    difficulty = calibrated_difficulty(p_value) if responses >= MIN_RESPONSES else None
+    return p_value, discrimination, difficulty
+
+def analyze_results(results_path, directory="questions", chunk_size=100000):
+    """Fold a cohort's graded results into the bank index's item statistics.
+
+    Each item's running sums are added to those already stored, so results
+    can be ingested one cohort at a time; ingesting the same file twice
+    counts it twice. Only the items in the file are rewritten. Returns the
+    updated statistics of those items.
+    """
+    student_index, item_index, scores, item_ids = load_results(results_path, chunk_size)
+    if not item_ids:
+        return {}
+    sums = item_sums(student_index, item_index, scores, len(item_ids))
+
+    connection = open_index(directory)
+    stored = {
+        row[0]: row[1:]
+        for row in connection.execute(f"SELECT id, {', '.join(STATISTIC_COLUMNS)} FROM item_statistics")
+    }
+    report = {}
+    rows = []
+    for question_id, item in zip(item_ids, sums.tolist()):
+        if question_id in stored:
+            item = [new + old for new, old in zip(item, stored[question_id])]
+        p_value, discrimination, difficulty = item_statistics(item)
+        rows.append((question_id, *item, p_value, discrimination, difficulty))
+        report[question_id] = {
+            "responses": int(item[0]),
+            "p_value": round(p_value, 4),
+            "discrimination": None if discrimination is None else round(discrimination, 4),
+            "difficulty": difficulty
+        }
+    connection.executemany(
+        f"INSERT OR REPLACE INTO item_statistics VALUES ({', '.join('?' * (len(STATISTIC_COLUMNS) + 4))})",
+        rows
+    )
+    connection.commit()
+    connection.close()
+    # Calibrated difficulties change which questions assignments select
+    bump_generation(directory)
+    return report
+
+def flagged_items(report):
+    """List the analyzed items whose discrimination is low or negative."""
+    return sorted(
+        question_id for question_id, item in report.items()
+        if item["discrimination"] is not None and item["discrimination"] < LOW_DISCRIMINATION
+    )
+
+if __name__ == "__main__":
+    report = analyze_results('graded.csv', 'questions')
+    print(f"Analyzed {len(report)} questions; {len(flagged_items(report))} discriminate poorly")
@@ -0,0 +1,191 @@
+import html
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+
+from bank import iter_question_paths, load_question, split_front_matter
+
+QTI_NAMESPACE = "http://www.imsglobal.org/xsd/imsqti_v2p1"
+CP_NAMESPACE = "http://www.imsglobal.org/xsd/imscp_v1p1"
+
+def iter_bank(directory="questions"):
+    """Yield (id, front matter, body) for each question, one file at a time."""
+    for path in sorted(iter_question_paths(directory)):
+        front_matter, body = load_question(path)
+        # Bodies rendered from a template start with the template's own front matter
+        template_front_matter, body = split_front_matter(body)
+        front_matter.setdefault("title", template_front_matter.get("title"))
+        question_id = front_matter.get("id") or os.path.splitext(os.path.basename(path))[0]
+        yield question_id, front_matter, body
+
+def render_inline(text):
+    """Escape a line of Markdown and render its inline code and bold spans."""
+    text = html.escape(text, quote=False)
+    text = re.sub(r"`([^`]+)`", r"<code>\1</code>", text)
+    return re.sub(r"\*\*([^*]+)\*\*", r"<strong>\1</strong>", text)
+
+def render_table(rows):
+    """Render Markdown table rows to an HTML table, dropping separator rows."""
+    html_rows = []
+    for row in rows:
+        cells = [cell.strip() for cell in row.strip().strip("|").split("|")]
+        if all(set(cell) <= set("-: ") for cell in cells):
+            continue
+        html_rows.append("<tr>" + "".join(f"<td>{render_inline(cell)}</td>" for cell in cells) + "</tr>")
+    return "<table>" + "".join(html_rows) + "</table>"
+
+def render_markdown(body):
+    """Render the small Markdown subset used by question templates to HTML."""
+    parts = []
+    block = []
+    block_kind = None
+    lines = iter(body.splitlines())
+
+    def flush_block():
+        if block_kind == "p":
+            parts.append(f"<p>{' '.join(block)}</p>")
+        elif block_kind == "table":
+            parts.append(render_table(block))
+        elif block_kind in ("ol", "ul"):
+            items = "".join(f"<li>{item}</li>" for item in block)
+            parts.append(f"<{block_kind}>{items}</{block_kind}>")
+        block.clear()
+
+    for line in lines:
+        stripped = line.strip()
+        list_item = re.match(r"(\d+\.|[-*])\s+(.*)", stripped)
+        if stripped.startswith("```"):
+            flush_block()
+            block_kind = None
+            code = []
+            for code_line in lines:
+                if code_line.strip().startswith("```"):
+                    break
+                code.append(html.escape(code_line, quote=False))
+            parts.append("<pre><code>" + "\n".join(code) + "</code></pre>")
+            continue
+        elif stripped.startswith("#"):
+            flush_block()
+            block_kind = None
+            level = min(len(stripped) - len(stripped.lstrip("#")) + 1, 6)
+            parts.append(f"<h{level}>{render_inline(stripped.lstrip('#').strip())}</h{level}>")
+            continue
+        elif not stripped:
+            kind = None
+        elif stripped.startswith("|") or (block_kind == "table" and "|" in stripped):
+            # Generated truth table rows omit the leading pipe
+            kind = "table"
+        elif list_item:
+            kind = "ol" if list_item.group(1)[0].isdigit() else "ul"
+            stripped = list_item.group(2)
+        else:
+            kind = "p"
+        if kind != block_kind:
+            flush_block()
+            block_kind = kind
+        if kind == "table":
+            block.append(stripped)
+        elif kind:
+            block.append(render_inline(stripped))
+    flush_block()
+    return "\n".join(parts)
+
+def cdata(text):
+    """Wrap text in a CDATA section, splitting any embedded terminator."""
+    return "<![CDATA[" + text.replace("]]>", "]]]]><![CDATA[>") + "]]>"
+
+def qti_item(question_id, front_matter, body):
+    """Build a QTI 2.1 essay item for one question."""
+    title = front_matter.get("title") or question_id
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<assessmentItem xmlns="{QTI_NAMESPACE}" identifier="{html.escape(question_id, quote=True)}" '
+        f'title="{html.escape(title, quote=True)}" adaptive="false" timeDependent="false">\n'
+        '  <responseDeclaration identifier="RESPONSE" cardinality="single" baseType="string"/>\n'
+        '  <outcomeDeclaration identifier="SCORE" cardinality="single" baseType="float"/>\n'
+        '  <itemBody>\n'
+        f'    <div>{render_markdown(body)}</div>\n'
+        '    <extendedTextInteraction responseIdentifier="RESPONSE"/>\n'
+        '  </itemBody>\n'
+        '</assessmentItem>\n'
+    )
+
+def export_qti(directory="questions", output_path="questions_qti.zip"):
+    """Stream the bank into a QTI 2.1 content package, one zip entry per question."""
+    count = 0
+    # Manifest resources are spooled to disk so memory stays bounded
+    with tempfile.TemporaryFile(mode="w+", encoding="utf-8") as resources, \
+            zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_DEFLATED) as package:
+        for question_id, front_matter, body in iter_bank(directory):
+            href = f"items/{question_id}.xml"
+            with package.open(href, "w") as entry:
+                entry.write(qti_item(question_id, front_matter, body).encode("utf-8"))
+            resources.write(
+                f'    <resource identifier="RES-{html.escape(question_id, quote=True)}" '
+                f'type="imsqti_item_xmlv2p1" href="{href}">\n'
+                f'      <file href="{href}"/>\n'
+                '    </resource>\n'
+            )
+            count += 1
+
+        resources.seek(0)
+        with package.open("imsmanifest.xml", "w") as entry:
+            manifest = io.TextIOWrapper(entry, encoding="utf-8")
+            manifest.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<manifest xmlns="{CP_NAMESPACE}" identifier="MANIFEST-{count}">\n'
+                '  <metadata>\n'
+                '    <schema>QTIv2.1 Package</schema>\n'
+                '    <schemaversion>1.0.0</schemaversion>\n'
+                '  </metadata>\n'
+                '  <organizations/>\n'
+                '  <resources>\n'
+            )
+            shutil.copyfileobj(resources, manifest)
+            manifest.write('  </resources>\n</manifest>\n')
+            manifest.flush()
+            manifest.detach()
+
+    return count
+
+def moodle_question(question_id, front_matter, body):
+    """Build a Moodle XML essay question for one question."""
+    tags = front_matter.get("metadata", {}).get("tags") or []
+    tag_xml = "".join(f"<tag><text>{html.escape(str(tag))}</text></tag>" for tag in tags)
+    return (
+        '  <question type="essay">\n'
+        f'    <name><text>{html.escape(question_id)}</text></name>\n'
+        f'    <questiontext format="html"><text>{cdata(render_markdown(body))}</text></questiontext>\n'
+        '    <defaultgrade>1</defaultgrade>\n'
+        '    <responseformat>editor</responseformat>\n'
+        f'    <tags>{tag_xml}</tags>\n'
+        '  </question>\n'
+    )
+
+def export_moodle(directory="questions", output_path="questions_moodle.xml"):
+    """Stream the bank into a Moodle XML file, grouping questions into topic categories."""
+    count = 0
+    current_topic = None
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<quiz>\n')
+        for question_id, front_matter, body in iter_bank(directory):
+            topic = front_matter.get("metadata", {}).get("topic") or "uncategorized"
+            # A category question applies to every question that follows it
+            if topic != current_topic:
+                f.write(
+                    '  <question type="category">\n'
+                    f'    <category><text>$course$/{html.escape(str(topic))}</text></category>\n'
+                    '  </question>\n'
+                )
+                current_topic = topic
+            f.write(moodle_question(question_id, front_matter, body))
+            count += 1
+        f.write('</quiz>\n')
+    return count
+
+if __name__ == "__main__":
+    print(f"Exported {export_qti('questions', 'questions_qti.zip')} questions to questions_qti.zip")
+    print(f"Exported {export_moodle('questions', 'questions_moodle.xml')} questions to questions_moodle.xml")
@@ -0,0 +1,130 @@
+# Loops are analyzed in the form
+#   for(int i = start; i <operator> bound; i += step)
+# Inside a nested loop the inner start and bound may be affine in the outer
+# counter, written as (coefficient, constant) for coefficient * i + constant.
+
+# Largest number of outer iterations evaluated one by one when a nested loop
+# has no closed form
+MAX_SIMULATED_ITERATIONS = 1_000_000
+
+def condition_holds(value, operator, bound):
+    """Evaluate the loop condition for one value of the counter."""
+    if operator == "<":
+        return value < bound
+    if operator == "<=":
+        return value <= bound
+    if operator == ">":
+        return value > bound
+    return value >= bound
+
+def iteration_count(start, operator, bound, step):
+    """Count the iterations of a counting loop, or None when it never terminates (ignoring overflow)."""
+    if not condition_holds(start, operator, bound):
+        return 0
+    if operator in ("<", "<="):
+        if step <= 0:
+            return None
+        last = bound - 1 if operator == "<" else bound
+        return (last - start) // step + 1
+    if step >= 0:
+        return None
+    last = bound + 1 if operator == ">" else bound
+    return (start - last) // -step + 1
+
+def analyze_loop(start, operator, bound, step=1):
+    """Return a loop's iteration count, the counter's final value and the sum of the values it visits."""
+    iterations = iteration_count(start, operator, bound, step)
+    if iterations is None:
+        return {"iterations": None, "final_counter": None, "sum": None}
+    return {
+        "iterations": iterations,
+        "final_counter": start + iterations * step,
+        # Arithmetic series start, start + step, ..., start + (iterations - 1) * step
+        "sum": iterations * start + step * iterations * (iterations - 1) // 2
+    }
+
+def affine(term):
+    """Normalize a loop term to (coefficient, constant) in the outer counter."""
+    return term if isinstance(term, tuple) else (0, term)
+
+def at(term, value):
+    """Evaluate an affine term for one value of the outer counter."""
+    coefficient, constant = affine(term)
+    return coefficient * value + constant
+
+def positive_part_sum(first, difference, count):
+    """Sum max(0, first + difference * k) for k = 0 .. count - 1."""
+    if count <= 0:
+        return 0
+    if difference == 0:
+        return count * max(0, first)
+    if difference > 0:
+        # Terms are positive from the first k with first + difference * k > 0
+        low, high = max(0, -first // difference + 1), count - 1
+    else:
+        # Terms are positive up to the last k with first + difference * k > 0
+        # Integer ceiling division stays exact beyond 2 ** 53, where float division does not
+        low, high = 0, min(count - 1, -(-first // -difference) - 1)
+    terms = high - low + 1
+    if terms <= 0:
+        return 0
+    return terms * first + difference * (low + high) * terms // 2
+
+def nested_iterations(outer, inner):
+    """Count the inner-body executions of a nested loop.
+
+    outer is (start, operator, bound, step); inner is the same with start and
+    bound optionally affine in the outer counter, e.g. ((1, 0), "<", 10, 1)
+    for `for(int j = i; j < 10; j++)`. Unit-step inner loops are summed in
+    closed form; other inner steps are counted one outer iteration at a time.
+    Returns None when either loop never terminates.
+    """
+    outer_start, _, _, outer_step = outer
+    outer_count = iteration_count(*outer)
+    if outer_count is None:
+        return None
+    inner_start, inner_operator, inner_bound, inner_step = inner
+    start_coefficient, start_constant = affine(inner_start)
+    bound_coefficient, bound_constant = affine(inner_bound)
+
+    if inner_step == 1 and inner_operator in ("<", "<="):
+        # The inner count is max(0, bound - start [+ 1]), linear in i
+        extra = 1 if inner_operator == "<=" else 0
+        coefficient = bound_coefficient - start_coefficient
+        constant = bound_constant - start_constant + extra
+    elif inner_step == -1 and inner_operator in (">", ">="):
+        extra = 1 if inner_operator == ">=" else 0
+        coefficient = start_coefficient - bound_coefficient
+        constant = start_constant - bound_constant + extra
+    else:
+        if outer_count > MAX_SIMULATED_ITERATIONS:
+            raise ValueError(f"Nested loop needs {outer_count} outer iterations to analyze")
+        total = 0
+        for k in range(outer_count):
+            value = outer_start + k * outer_step
+            count = iteration_count(at(inner_start, value), inner_operator, at(inner_bound, value), inner_step)
+            if count is None:
+                return None
+            total += count
+        return total
+
+    # Over the outer values i = outer_start + k * outer_step the inner count
+    # is max(0, first + difference * k)
+    first = coefficient * outer_start + constant
+    return positive_part_sum(first, coefficient * outer_step, outer_count)
+
+def simulate_nested(outer, inner, max_iterations=MAX_SIMULATED_ITERATIONS):
+    """Count nested iterations by running the loops, for checking the closed forms on small bounds."""
+    outer_start, outer_operator, outer_bound, outer_step = outer
+    inner_start, inner_operator, inner_bound, inner_step = inner
+    total = 0
+    i = outer_start
+    while condition_holds(i, outer_operator, outer_bound):
+        j = at(inner_start, i)
+        while condition_holds(j, inner_operator, at(inner_bound, i)):
+            total += 1
+            if total > max_iterations:
+                raise ValueError(f"Nested loop exceeded {max_iterations} iterations")
+            j += inner_step
+        i += outer_step
+    return total
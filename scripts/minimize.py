@@ -0,0 +1,141 @@
+from functools import lru_cache
+
+from expressions import tokenize
+
+# Truth tables are handled as bitsets: bit i of the table is the result in row
+# i, and in row i the j-th variable is true when bit j of i is set (the layout
+# of generate_truth_table_question). An implicant is a (value, mask) pair
+# covering every row that agrees with value outside the mask bits.
+
+OPERATOR_TOKENS = {"!", "&&", "||", "^", "->"}
+
+def table_bits(result_column):
+    """Pack a truth table's result column into a bitset."""
+    bits = 0
+    for row, result in enumerate(result_column):
+        if result:
+            bits |= 1 << row
+    return bits
+
+def prime_implicants(bits, num_vars):
+    """Return the prime implicants of a truth table bitset by Quine-McCluskey merging."""
+    current = {(row, 0) for row in range(2 ** num_vars) if bits >> row & 1}
+    primes = set()
+    while current:
+        merged = set()
+        used = set()
+        for value, mask in current:
+            for variable in range(num_vars):
+                bit = 1 << variable
+                # Pair each implicant with its neighbour that has this variable set
+                if mask & bit or value & bit:
+                    continue
+                neighbour = (value | bit, mask)
+                if neighbour in current:
+                    merged.add((value, mask | bit))
+                    used.add((value, mask))
+                    used.add(neighbour)
+        primes |= current - used
+        current = merged
+    return primes
+
+def coverage(implicant, num_vars):
+    """Bitset of the truth table rows an implicant covers."""
+    value, mask = implicant
+    bits = 0
+    for row in range(2 ** num_vars):
+        if row & ~mask == value:
+            bits |= 1 << row
+    return bits
+
+def literal_count(implicant, num_vars):
+    """Number of literals in an implicant's product term."""
+    return num_vars - bin(implicant[1]).count("1")
+
+def minimal_cover(bits, num_vars):
+    """Choose the fewest prime implicants (then fewest literals) covering the table's true rows.
+
+    Branch and bound over the rows: each step branches on the uncovered row
+    with the fewest covering primes, starting from a greedy cover as the bound.
+    """
+    primes = sorted(prime_implicants(bits, num_vars))
+    covers = [coverage(prime, num_vars) for prime in primes]
+    costs = [literal_count(prime, num_vars) for prime in primes]
+    rows = [row for row in range(2 ** num_vars) if bits >> row & 1]
+    covering = {row: [index for index, cover in enumerate(covers) if cover >> row & 1] for row in rows}
+    largest = max(bin(cover).count("1") for cover in covers)
+
+    # Greedy cover: repeatedly take the prime covering the most uncovered rows
+    uncovered = bits
+    greedy = []
+    while uncovered:
+        index = max(range(len(primes)), key=lambda i: (bin(covers[i] & uncovered).count("1"), -costs[i]))
+        greedy.append(index)
+        uncovered &= ~covers[index]
+    best = [(len(greedy), sum(costs[index] for index in greedy)), greedy]
+
+    def search(uncovered, chosen, cost):
+        if not uncovered:
+            if (len(chosen), cost) < best[0]:
+                best[0], best[1] = (len(chosen), cost), list(chosen)
+            return
+        # Every remaining prime covers at most `largest` rows
+        needed = -(-bin(uncovered).count("1") // largest)
+        if (len(chosen) + needed, cost) >= best[0]:
+            return
+        row = min(
+            (row for row in rows if uncovered >> row & 1),
+            key=lambda row: len(covering[row])
+        )
+        for index in sorted(covering[row], key=lambda i: -bin(covers[i] & uncovered).count("1")):
+            chosen.append(index)
+            search(uncovered & ~covers[index], chosen, cost + costs[index])
+            chosen.pop()
+
+    search(bits, [], 0)
+    return [primes[index] for index in best[1]]
+
+def term_order(implicant, num_vars):
+    """Sort key listing terms in variable order, positive literals first."""
+    value, mask = implicant
+    return tuple(2 if mask >> j & 1 else 1 - (value >> j & 1) for j in range(num_vars))
+
+def implicant_expression(implicant, variables):
+    """Render an implicant as a C# conjunction of literals."""
+    value, mask = implicant
+    literals = [
+        name if value >> j & 1 else f"!{name}"
+        for j, name in enumerate(variables)
+        if not mask >> j & 1
+    ]
+    return " && ".join(literals) or "true"
+
+@lru_cache(maxsize=4096)
+def minimize_bits(bits, variables):
+    """Return a minimal sum-of-products expression for a truth table bitset."""
+    num_vars = len(variables)
+    if bits == 0:
+        return "false"
+    if bits == (1 << 2 ** num_vars) - 1:
+        return "true"
+    cover = sorted(minimal_cover(bits, num_vars), key=lambda implicant: term_order(implicant, num_vars))
+    terms = [implicant_expression(implicant, variables) for implicant in cover]
+    if len(terms) == 1:
+        return terms[0]
+    return " || ".join(f"({term})" if "&&" in term else term for term in terms)
+
+def minimize(result_column, variables):
+    """Return a minimal sum-of-products expression with the given truth table result column."""
+    return minimize_bits(table_bits(result_column), tuple(variables))
+
+def complexity(expression):
+    """Measure an expression as (literals, operators) for comparing simplifications."""
+    tokens = tokenize(expression)
+    literals = sum(1 for token in tokens if token[0].isalpha() and token not in ("true", "false"))
+    operators = sum(1 for token in tokens if token in OPERATOR_TOKENS)
+    return literals, operators
+
+def simplify(expression, result_column, variables):
+    """Return (minimal expression, whether it is simpler than the original expression)."""
+    simplified = minimize(result_column, variables)
+    return simplified, complexity(simplified) < complexity(expression)
@@ -0,0 +1,204 @@
+import random
+
+from loop_analysis import iteration_count
+
+# A loop is described by a dict for
+#   for(int i = <start>; i <operator> <bound>; <step>) { <body> }
+# where start and bound are ints; when start_from_length or bound_from_length
+# is set they are rendered relative to <array>.Length (e.g. "numbers.Length - 1").
+
+ARRAY_NAMES = ["numbers", "values", "data", "items", "scores", "prices", "grades", "counts"]
+
+# Swapping an operator with its inclusive/exclusive twin moves the boundary by one
+BOUNDARY_SWAPS = {"<": "<=", "<=": "<", ">": ">=", ">=": ">"}
+
+# Hint shown with a mutant, by the operator that produced it
+MUTATION_HINTS = {
+    "boundary": "termination",
+    "start": "starting",
+    "bound": "array length calculation",
+    "increment": "update step"
+}
+
+def make_loop(start, operator, bound, step, body, intention, array=None, length=None,
+              start_from_length=False, bound_from_length=False, indexes=False):
+    """Describe a counting loop; indexes marks bodies that read or write array[i]."""
+    return {
+        "start": start,
+        "operator": operator,
+        "bound": bound,
+        "step": step,
+        "body": body,
+        "intention": intention,
+        "array": array,
+        "length": length,
+        "start_from_length": start_from_length,
+        "bound_from_length": bound_from_length,
+        "indexes": indexes
+    }
+
+def random_loop(rng=random):
+    """Pick a correct loop from the catalogue with random parameters."""
+    array = rng.choice(ARRAY_NAMES)
+    length = rng.randint(5, 50)
+    start = rng.randint(0, 20)
+    end = rng.randint(start + 3, start + 50)
+    factor = rng.randint(2, 5)
+    kind = rng.randrange(7)
+    if kind == 0:
+        return make_loop(start, "<=", end, 1, "Console.WriteLine(i);",
+                         f"print the numbers {start} through {end}")
+    if kind == 1:
+        return make_loop(0, "<", length, 1, f"Console.WriteLine({array}[i]);",
+                         f"print all {length} elements of {array}",
+                         array, length, bound_from_length=True, indexes=True)
+    if kind == 2:
+        return make_loop(0, "<", length, 1, f"{array}[i] = i * {factor};",
+                         f"fill all {length} elements of {array} with 0, {factor}, {2 * factor}, ...",
+                         array, length, bound_from_length=True, indexes=True)
+    if kind == 3:
+        return make_loop(length - 1, ">=", 0, -1, f"Console.WriteLine({array}[i]);",
+                         f"print the {length} elements of {array} from last to first",
+                         array, length, start_from_length=True, indexes=True)
+    if kind == 4:
+        return make_loop(0, "<", length, factor, f"Console.WriteLine({array}[i]);",
+                         f"print the elements of {array} whose index is a multiple of {factor}",
+                         array, length, bound_from_length=True, indexes=True)
+    if kind == 5:
+        return make_loop(start, "<=", end, 1, "total += i;",
+                         f"add up the numbers {start} through {end}")
+    return make_loop(end, ">", 0, -1, "Console.WriteLine(i);",
+                     f"count down from {end} to 1")
+
+def render_term(value, from_length, loop):
+    """Render a start or bound value, relative to the array's Length when requested."""
+    if not from_length:
+        return str(value)
+    offset = value - loop["length"]
+    text = f"{loop['array']}.Length"
+    if offset < 0:
+        return f"{text} - {-offset}"
+    if offset > 0:
+        return f"{text} + {offset}"
+    return text
+
+def render_step(step):
+    """Render the loop's update expression."""
+    if step == 1:
+        return "i++"
+    if step == -1:
+        return "i--"
+    return f"i += {step}" if step > 0 else f"i -= {-step}"
+
+def render_loop(loop):
+    """Render a loop as a single line of C#."""
+    start = render_term(loop["start"], loop["start_from_length"], loop)
+    bound = render_term(loop["bound"], loop["bound_from_length"], loop)
+    return (f"for(int i = {start}; i {loop['operator']} {bound}; {render_step(loop['step'])}) "
+            f"{{ {loop['body']} }}")
+
+def out_of_range_iteration(start, step, length):
+    """Return the first iteration whose index falls outside an array, or None if none ever does."""
+    if start < 0 or start >= length:
+        return 0
+    if step > 0:
+        return (length - start + step - 1) // step
+    if step < 0:
+        return start // -step + 1
+    return None
+
+def behavior(loop):
+    """Evaluate a loop analytically: the values it visits and how it ends.
+
+    Two loops behave the same exactly when their behavior dicts are equal.
+    """
+    start, step = loop["start"], loop["step"]
+    iterations = iteration_count(start, loop["operator"], loop["bound"], step)
+    outcome = "completes" if iterations is not None else "never terminates"
+    if loop["indexes"]:
+        failing = out_of_range_iteration(start, step, loop["length"])
+        if failing is not None and (iterations is None or failing < iterations):
+            iterations = failing
+            outcome = f"IndexOutOfRangeException at i = {start + failing * step}"
+    if iterations == 0:
+        return {"iterations": 0, "first": None, "last": None, "step": None, "outcome": outcome}
+    return {
+        "iterations": iterations,
+        "first": start,
+        "last": start + (iterations - 1) * step if iterations is not None else None,
+        "step": step if iterations != 1 else None,
+        "outcome": outcome
+    }
+
+def candidate_mutants(loop):
+    """Yield (operator, description, mutant) for every mutation of a loop."""
+    operator = loop["operator"]
+    swapped = BOUNDARY_SWAPS[operator]
+    yield ("boundary", f"the condition uses {swapped} where {operator} is needed",
+           {**loop, "operator": swapped})
+
+    for delta in (-1, 1):
+        mutant = {**loop, "start": loop["start"] + delta}
+        yield ("start", f"i starts at {render_term(mutant['start'], loop['start_from_length'], loop)} "
+                        f"instead of {render_term(loop['start'], loop['start_from_length'], loop)}",
+               mutant)
+
+    if loop["bound_from_length"]:
+        mutant = {**loop, "bound": loop["bound"] - 1}
+        yield ("bound", f"the bound {render_term(mutant['bound'], True, loop)} "
+                        f"should be {render_term(loop['bound'], True, loop)}",
+               mutant)
+    else:
+        for delta in (-1, 1):
+            mutant = {**loop, "bound": loop["bound"] + delta}
+            yield ("bound", f"the bound {mutant['bound']} should be {loop['bound']}", mutant)
+
+    step = loop["step"]
+    for wrong_step in (step * 2 if abs(step) == 1 else step // abs(step), -step):
+        yield ("increment", f"the update {render_step(wrong_step)} should be {render_step(step)}",
+               {**loop, "step": wrong_step})
+
+def mutants(loop):
+    """Yield (operator, description, mutant) for the mutations that change the loop's behavior.
+
+    Equivalent mutants, e.g. `i < 9` versus `i <= 9` when stepping by 2 from 0,
+    are discarded by comparing analytic behaviors.
+    """
+    expected = behavior(loop)
+    for operator, description, mutant in candidate_mutants(loop):
+        if behavior(mutant) != expected:
+            yield operator, description, mutant
+
+def generate_mutants(count, rng=random, max_attempts=None):
+    """Generate distinct verified buggy loops as (correct, mutant, operator, description) tuples."""
+    max_attempts = max_attempts or count * 20
+    seen = set()
+    results = []
+    for _ in range(max_attempts):
+        if len(results) == count:
+            break
+        loop = random_loop(rng)
+        options = list(mutants(loop))
+        if not options:
+            continue
+        operator, description, mutant = rng.choice(options)
+        code = render_loop(mutant)
+        if code in seen:
+            continue
+        seen.add(code)
+        results.append((loop, mutant, operator, description))
+    return results
+
+def random_mutant(rng=random):
+    """Generate one verified buggy loop as (correct, mutant, operator, description)."""
+    return generate_mutants(1, rng)[0]
+
+if __name__ == "__main__":
+    import time
+
+    started = time.perf_counter()
+    results = generate_mutants(5000, random.Random(1))
+    elapsed = time.perf_counter() - started
+    print(f"Generated {len(results)} distinct verified mutants in {elapsed * 1000:.0f} ms")
+    for correct, mutant, operator, description in results[:5]:
+        print(f"[{operator}] {render_loop(mutant)}\n    bug: {description}\n    fix: {render_loop(correct)}")
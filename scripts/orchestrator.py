@@ -1,17 +1,12 @@
 import yaml
 import random
-import os
-import frontmatter
-from generate_questions import generate_loop_question
-
-def load_questions(directory):
-    questions = []
-    for filename in os.listdir(directory):
-        if filename.endswith(".md"):
-            path = os.path.join(directory, filename)
-            post = frontmatter.load(path)
-            questions.append(post)
-    return questions
+from bank import load_calibrated_difficulties, load_questions
+from generate_questions import loop_question
+
+# Id prefix of the programmatic questions rendered into assignments. Earlier
+# versions wrote them into the bank, so selection_pool skips any left there
+# and compaction removes them
+ASSIGNMENT_ID_PREFIX = "asg_loop"
 
 def select_template(question_type):
     if question_type == "programmatic":
@@ -23,14 +18,61 @@ def select_template(question_type):
     else:
         raise ValueError(f"Unknown question type: {question_type}")
 
-def create_assignment(config):
-    concept_questions = load_questions('questions')
+def select_distinct(questions, count, rng=random):
+    """Randomly select questions, skipping near-duplicates of those already selected."""
+    from dedup import NearDuplicateIndex
+
+    selected = []
+    index = NearDuplicateIndex()
+    for position, question in enumerate(rng.sample(questions, len(questions))):
+        if len(selected) == count:
+            break
+        if not index.add(position, question.body):
+            selected.append(question)
+    if len(selected) < count:
+        raise ValueError(f"Only {len(selected)} distinct questions available, {count} requested")
+    return selected
+
+def filter_by_difficulty(questions, difficulty, calibrated):
+    """Keep questions within a difficulty or [lowest, highest] range.
+
+    A question's calibrated difficulty from student results is used when it
+    has one, and its front matter difficulty otherwise.
+    """
+    lowest, highest = difficulty if isinstance(difficulty, (list, tuple)) else (difficulty, difficulty)
+    return [
+        question for question in questions
+        if calibrated.get(question.id, question.difficulty) is not None
+        and lowest <= calibrated.get(question.id, question.difficulty) <= highest
+    ]
+
+def selection_pool(config, directory="questions"):
+    """Load the questions an assignment's knowledge questions are drawn from."""
+    questions = [
+        question for question in load_questions(directory)
+        if not question.id.startswith(ASSIGNMENT_ID_PREFIX)
+    ]
+    if config.get("difficulty") is not None:
+        questions = filter_by_difficulty(questions, config["difficulty"], load_calibrated_difficulties(directory))
+    return questions
+
+def render_assignment(config, rng=random, directory="questions", pool=None):
+    """Render an assignment as Markdown, drawing every random choice from rng.
+
+    pool is the selection_pool() to draw knowledge questions from; it is
+    loaded when not given. Programmatic questions are rendered into the
+    assignment only, so rendering never writes to the bank.
+    """
+    concept_questions = selection_pool(config, directory) if pool is None else pool
     
     assignment_content = "# Assignment\n\n"
 
     # Select knowledge questions
     num_knowledge_questions = config.get("num_knowledge_questions", 0)
-    selected_knowledge_questions = random.sample(concept_questions, num_knowledge_questions)
+    if config.get("skip_near_duplicates"):
+        selected_knowledge_questions = select_distinct(concept_questions, num_knowledge_questions, rng)
+    else:
+        selected_knowledge_questions = rng.sample(concept_questions, num_knowledge_questions)
 
     for question in selected_knowledge_questions:
         template_path = select_template("knowledge")
@@ -38,26 +80,29 @@ def create_assignment(config):
             template_content = f.read()
         
         # Replace placeholders with front matter values
-        filled_template = template_content.replace("<<CONCEPT_TITLE>>", question.metadata.get("title", ""))
-        filled_template = filled_template.replace("<<QUESTION_TEXT>>", question.content)
+        filled_template = template_content.replace("<<CONCEPT_TITLE>>", question.title or "")
+        filled_template = filled_template.replace("<<QUESTION_TEXT>>", question.body)
 
         assignment_content += filled_template + "\n\n"
 
     # Generate programmatic questions
     num_programmatic_questions = config.get("num_programmatic_questions", 0)
     for _ in range(num_programmatic_questions):
-        output_path = generate_loop_question()
-        question = frontmatter.load(output_path)
+        front_matter, body, _ = loop_question(id_prefix=ASSIGNMENT_ID_PREFIX, rng=rng)
         template_path = select_template("programmatic")
         with open(template_path, 'r') as f:
             template_content = f.read()
 
         # Replace placeholders with front matter values
-        filled_template = template_content.replace("<<CODE_SNIPPET>>", question.metadata.get("code_snippet", ""))
-        filled_template = filled_template.replace("<<QUESTION_TEXT>>", question.content)
+        filled_template = template_content.replace("<<CODE_SNIPPET>>", front_matter.get("code_snippet", ""))
+        filled_template = filled_template.replace("<<QUESTION_TEXT>>", body)
 
         assignment_content += filled_template + "\n\n"
 
+    return assignment_content
+
+def create_assignment(config):
+    assignment_content = render_assignment(config)
     with open('assignment.md', 'w') as f:
         f.write(assignment_content)
 
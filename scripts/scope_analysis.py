@@ -0,0 +1,226 @@
+import random
+
+# A program is a list of statements:
+#   ("declare", name, value)  ->  int name = value;
+#   ("print", [names])        ->  Console.WriteLine($"<label>: name={name}, ...");
+#   ("block", [statements])   ->  { ... } with each brace on its own line
+# Every statement occupies one line.
+
+# Compiler errors reported by the analysis
+ERROR_MESSAGES = {
+    "CS0103": "The name '{name}' does not exist in the current context",
+    "CS0128": "A local variable named '{name}' is already defined in this scope",
+    "CS0136": "A local variable named '{name}' cannot be declared in this scope because it would give a "
+              "different meaning to '{name}'",
+    "CS0841": "Cannot use local variable '{name}' before it is declared"
+}
+
+# Print labels by block depth
+LABELS = ["Outer", "Inside", "Inner", "Innermost"]
+
+VARIABLE_NAMES = ["a", "b", "c", "x", "y", "z"]
+
+def render_program(program):
+    """Lay a program out as C# lines and record each line's statement and block.
+
+    Returns (lines, statements, blocks): statements are (line, kind, data,
+    block) tuples, with data (name, value) for declarations and (label,
+    names) for prints; blocks maps a block id to (parent, first line, last
+    line). Block 0 is the whole snippet.
+    """
+    lines = []
+    statements = []
+    blocks = {0: (None, 1, None)}
+
+    def emit(body, block, depth):
+        indent = "    " * depth
+        for statement in body:
+            kind = statement[0]
+            if kind == "block":
+                child = len(blocks)
+                lines.append(f"{indent}{{")
+                blocks[child] = (block, len(lines), None)
+                emit(statement[1], child, depth + 1)
+                lines.append(f"{indent}}}")
+                blocks[child] = (block, blocks[child][1], len(lines))
+            elif kind == "declare":
+                _, name, value = statement
+                lines.append(f"{indent}int {name} = {value};")
+                statements.append((len(lines), kind, (name, value), block))
+            else:
+                names = statement[1]
+                label = LABELS[min(depth, len(LABELS) - 1)]
+                fields = ", ".join(f"{name}={{{name}}}" for name in names)
+                lines.append(f"{indent}Console.WriteLine($\"{label}: {fields}\");")
+                statements.append((len(lines), kind, (label, names), block))
+
+    emit(program, 0, 0)
+    blocks[0] = (None, 1, len(lines))
+    return lines, statements, blocks
+
+def analyze_scopes(program):
+    """Apply C#'s local variable scope rules to a program.
+
+    A local's scope is its entire block, nested blocks included, so reusing
+    an enclosing local's name is an error (CS0136) rather than shadowing.
+    Returns the rendered lines, each declaration's scope, the variables
+    visible, shadowed and out of scope on each statement line, the compile
+    errors and, when the program compiles, its output.
+    """
+    lines, statements, blocks = render_program(program)
+
+    def chain(block):
+        while block is not None:
+            yield block
+            block = blocks[block][0]
+
+    # Declarations per block as (name, line), in line order
+    declared = {}
+    values = {}
+    for line, kind, data, block in statements:
+        if kind == "declare":
+            declared.setdefault(block, []).append((data[0], line))
+            values[line] = data[1]
+
+    declarations = []
+    errors = []
+    for line, kind, data, block in statements:
+        if kind != "declare":
+            continue
+        name = data[0]
+        declarations.append({"name": name, "line": line, "scope": [blocks[block][1], blocks[block][2]]})
+        if any(other == name and other_line < line for other, other_line in declared[block]):
+            errors.append({"line": line, "code": "CS0128", "name": name})
+        elif any(other == name for ancestor in list(chain(block))[1:] for other, _ in declared.get(ancestor, [])):
+            errors.append({"line": line, "code": "CS0136", "name": name})
+
+    def resolve(name, line, block):
+        """Return the declaration line a use of name refers to, or the error it causes."""
+        for scope in chain(block):
+            for other, other_line in declared.get(scope, []):
+                if other == name:
+                    return other_line if other_line < line else "CS0841"
+        return "CS0103"
+
+    visibility = []
+    output = []
+    for line, kind, data, block in statements:
+        enclosing = list(chain(block))
+        visible = {}
+        shadowed = []
+        # Walk outwards so the innermost earlier declaration of a name wins
+        for scope in enclosing:
+            for name, declared_line in declared.get(scope, []):
+                if declared_line >= line:
+                    continue
+                if name in visible:
+                    shadowed.append(f"{name}@{declared_line}")
+                else:
+                    visible[name] = declared_line
+        out_of_scope = [
+            f"{name}@{declared_line}"
+            for scope, entries in sorted(declared.items()) if scope not in enclosing
+            for name, declared_line in entries if declared_line < line
+        ]
+        visibility.append({
+            "line": line,
+            "visible": [f"{name}@{declared_line}" for name, declared_line in visible.items()],
+            "shadowed": shadowed,
+            "out_of_scope": sorted(out_of_scope, key=lambda entry: int(entry.split("@")[1]))
+        })
+
+        if kind == "print":
+            label, names = data
+            fields = []
+            for name in names:
+                target = resolve(name, line, block)
+                if isinstance(target, str):
+                    errors.append({"line": line, "code": target, "name": name})
+                else:
+                    fields.append(f"{name}={values[target]}")
+            output.append(f"{label}: {', '.join(fields)}")
+
+    errors.sort(key=lambda error: error["line"])
+    return {
+        "lines": lines,
+        "declarations": declarations,
+        "visibility": visibility,
+        "errors": errors,
+        "output": None if errors else output
+    }
+
+def describe_scopes(analysis):
+    """Summarize each declaration's scope and conflicts as answer text."""
+    conflicts = {(error["line"], error["name"]): error["code"] for error in analysis["errors"]}
+    sections = []
+    for declaration in analysis["declarations"]:
+        name, line = declaration["name"], declaration["line"]
+        first, last = declaration["scope"]
+        visible_lines = [
+            entry["line"] for entry in analysis["visibility"]
+            if f"{name}@{line}" in entry["visible"]
+        ]
+        text = f"Variable {name} (line {line}):\n- Scope: Lines {first}-{last}"
+        if visible_lines:
+            text += f"\n- Visible on statement lines: {', '.join(map(str, visible_lines))}"
+        code = conflicts.get((line, name))
+        if code:
+            text += f"\n- {code}: {ERROR_MESSAGES[code].format(name=name)}"
+        sections.append(text)
+    return "\n\n".join(sections)
+
+def describe_execution(analysis):
+    """Describe what happens when the program is compiled and run."""
+    if analysis["errors"]:
+        return "\n".join(
+            f"Line {error['line']}: error {error['code']}: {ERROR_MESSAGES[error['code']].format(name=error['name'])}"
+            for error in analysis["errors"]
+        )
+    return "\n".join(f"prints \"{line}\"" for line in analysis["output"])
+
+def random_program(rng=random, max_depth=2, error_rate=0.08):
+    """Build a random program of nested blocks, declarations and prints.
+
+    With probability error_rate a declaration reuses an enclosing name or a
+    print uses a name that is not in scope, so some programs do not compile.
+    """
+    declared_anywhere = []
+
+    def build(depth, visible):
+        statements = []
+        visible = list(visible)
+        for _ in range(rng.randint(1, 2)):
+            fresh = [name for name in VARIABLE_NAMES if name not in visible]
+            name = rng.choice(VARIABLE_NAMES if rng.random() < error_rate or not fresh else fresh)
+            statements.append(("declare", name, rng.randint(1, 30)))
+            visible.append(name)
+            declared_anywhere.append(name)
+        if depth < max_depth:
+            for _ in range(rng.choice([1, 1, 2])):
+                statements.append(("block", build(depth + 1, visible)))
+        pool = declared_anywhere if rng.random() < error_rate else visible
+        names = sorted(set(rng.sample(pool, min(len(pool), rng.randint(1, 2)))))
+        statements.append(("print", names))
+        return statements
+
+    return build(0, [])
+
+def generate_programs(count, rng=random, compiles=None, max_depth=2, max_attempts=None):
+    """Generate distinct random programs with their analyses.
+
+    compiles=True or False keeps only programs that do or do not compile.
+    """
+    max_attempts = max_attempts or count * 50
+    seen = set()
+    results = []
+    for _ in range(max_attempts):
+        if len(results) == count:
+            break
+        program = random_program(rng, max_depth)
+        analysis = analyze_scopes(program)
+        code = "\n".join(analysis["lines"])
+        if code in seen or (compiles is not None and compiles != (not analysis["errors"])):
+            continue
+        seen.add(code)
+        results.append((program, analysis))
+    return results
@@ -0,0 +1,160 @@
+import os
+import time
+from pathlib import Path
+
+from bank import bump_generation, iter_question_paths, read_front_matter
+import extract_definitions
+import generate_questions
+
+# Get the script's directory
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+TEMPLATES_DIR = PROJECT_ROOT / 'templates'
+
+# Template used for every question extracted from the textbook
+DEFINITION_TEMPLATE = "knowledge_definition.md"
+
+# Templates used by create_assignment when formatting the assignment
+ASSIGNMENT_TEMPLATES = {"apply_code.md", "knowledge_definition.md", "conceptual_question.md"}
+
+# Generator rendering each programmatic question template
+TEMPLATE_GENERATORS = {
+    "apply_code.md": generate_questions.generate_loop_question,
+    "loop_off_by_one_concept.md": generate_questions.generate_off_by_one_question,
+    "nested_loop.md": generate_questions.generate_nested_loop_question,
+    "boolean_expression.md": generate_questions.generate_boolean_expression_question,
+    "numeric_expression.md": generate_questions.generate_numeric_expression_question,
+    "mixed_expression.md": generate_questions.generate_mixed_expression_question,
+    "truth_table.md": generate_questions.generate_truth_table_question,
+    "variable_assignment_equality.md": generate_questions.generate_variable_assignment_question,
+    "variable_scope.md": generate_questions.generate_variable_scope_question,
+    "variable_state.md": generate_questions.generate_variable_state_question
+}
+
+def snapshot(directory, suffix=".md"):
+    """Map every file with the given suffix in a directory to its (mtime, size) stamp."""
+    stamps = {}
+    if not os.path.isdir(directory):
+        return stamps
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(suffix):
+                stat = entry.stat()
+                stamps[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return stamps
+
+def changed_paths(old, new):
+    """Return the paths that were added, modified or removed between two snapshots."""
+    return {path for path in old.keys() | new.keys() if old.get(path) != new.get(path)}
+
+def load_dependencies(output_dir="questions"):
+    """Map each textbook file to the question files extracted from it."""
+    dependencies = {}
+    if not os.path.isdir(output_dir):
+        return dependencies
+    for path in iter_question_paths(output_dir):
+        source = read_front_matter(path).get("metadata", {}).get("source")
+        if source:
+            dependencies.setdefault(source, []).append(path)
+    return dependencies
+
+def rebuild_textbook_file(file_path, output_dir, dependencies):
+    """Regenerate the questions of one textbook file, removing those whose definition vanished."""
+    previous = dependencies.pop(file_path, [])
+    current = []
+    if os.path.exists(file_path):
+        current = extract_definitions.process_textbook_file(file_path, output_dir)
+        dependencies[file_path] = current
+    else:
+        extract_definitions.forget_textbook_file(file_path, output_dir)
+    for stale in set(previous) - set(current):
+        if os.path.exists(stale):
+            os.remove(stale)
+            bump_generation(output_dir)
+            print(f"Removed stale question file: {stale}")
+    return current
+
+def regenerate_preview(template_name, preview_dir, previews):
+    """Render a fresh sample question for a changed generator template."""
+    previous = previews.pop(template_name, None)
+    if previous and os.path.exists(previous):
+        os.remove(previous)
+    file_path = TEMPLATE_GENERATORS[template_name](output_dir=preview_dir)
+    previews[template_name] = file_path
+    print(f"Rendered preview for {template_name}: {file_path}")
+    return file_path
+
+def rebuild(changed_textbook, changed_templates, textbook_files, output_dir, preview_dir,
+            dependencies, previews, assignment_config=None):
+    """Re-render only the outputs that depend on the changed textbook files and templates."""
+    template_names = {os.path.basename(path) for path in changed_templates}
+
+    # A changed definition template affects every extracted question
+    if DEFINITION_TEMPLATE in template_names:
+        changed_textbook = set(changed_textbook) | set(textbook_files) | set(dependencies)
+
+    rebuilt = []
+    for file_path in sorted(changed_textbook):
+        rebuilt.extend(rebuild_textbook_file(file_path, output_dir, dependencies))
+
+    for template_name in sorted(template_names & TEMPLATE_GENERATORS.keys()):
+        regenerate_preview(template_name, preview_dir, previews)
+
+    # The assignment embeds extracted questions and the assignment templates
+    if assignment_config is not None and (changed_textbook or template_names & ASSIGNMENT_TEMPLATES):
+        from orchestrator import create_assignment
+        create_assignment(assignment_config)
+        print("Regenerated assignment.md")
+
+    return rebuilt
+
+def wait_for_changes(textbook_dir, textbook, templates, interval=0.5, debounce=0.3):
+    """Poll until the textbook or templates change, then wait for the edits to settle."""
+    while True:
+        time.sleep(interval)
+        new_textbook = extract_definitions.discover_textbook_files(textbook_dir)
+        new_templates = snapshot(TEMPLATES_DIR)
+        if new_textbook == textbook and new_templates == templates:
+            continue
+        # Debounce: editors often write a file several times in a row
+        while True:
+            time.sleep(debounce)
+            settled_textbook = extract_definitions.discover_textbook_files(textbook_dir)
+            settled_templates = snapshot(TEMPLATES_DIR)
+            if settled_textbook == new_textbook and settled_templates == new_templates:
+                return new_textbook, new_templates
+            new_textbook, new_templates = settled_textbook, settled_templates
+
+def watch(textbook_dir="textbook", output_dir="questions", preview_dir="preview",
+          interval=0.5, debounce=0.3, assignment_config=None):
+    """Watch the textbook and templates, regenerating only the affected outputs on change."""
+    dependencies = load_dependencies(output_dir)
+    previews = {}
+    textbook = extract_definitions.discover_textbook_files(textbook_dir)
+    templates = snapshot(TEMPLATES_DIR)
+
+    print(f"Watching {textbook_dir} and {TEMPLATES_DIR} (press Ctrl+C to stop)")
+    try:
+        while True:
+            new_textbook, new_templates = wait_for_changes(
+                textbook_dir, textbook, templates, interval, debounce
+            )
+            started = time.perf_counter()
+            rebuilt = rebuild(
+                changed_paths(textbook, new_textbook),
+                changed_paths(templates, new_templates),
+                new_textbook,
+                output_dir,
+                preview_dir,
+                dependencies,
+                previews,
+                assignment_config
+            )
+            textbook, templates = new_textbook, new_templates
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"Rebuilt {len(rebuilt)} question files in {elapsed:.1f} ms")
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+if __name__ == "__main__":
+    watch('textbook', 'questions')
@@ -0,0 +1,51 @@
+import math
+
+from adaptive import AdaptiveSelector, logit, practice_session, success_probability
+from bank import write_question
+
+ITEMS = {
+    "easy": (-1.5, "loops"),
+    "medium": (0.0, "loops"),
+    "hard": (1.5, "expressions"),
+}
+
+def test_next_question_targets_the_success_rate():
+    selector = AdaptiveSelector(ITEMS, target=0.5)
+    assert selector.next_question("alice") == "medium"
+    selector = AdaptiveSelector(ITEMS, target=1 / (1 + math.exp(-1.5)))
+    assert selector.next_question("alice") == "easy"
+
+def test_seen_items_and_topics_are_respected():
+    selector = AdaptiveSelector(ITEMS, target=0.5)
+    selector.record_response("alice", "medium", 1.0)
+    assert selector.next_question("alice") != "medium"
+    assert selector.next_question("alice", topic="expressions") == "hard"
+    assert selector.next_question("alice", topic="arrays") is None
+
+def test_responses_move_ability_and_difficulty_in_opposite_directions():
+    selector = AdaptiveSelector(ITEMS)
+    selector.record_response("alice", "medium", 1.0)
+    assert selector.abilities["alice"] > 0 and selector.difficulties["medium"] < 0
+    selector.record_response("bob", "hard", 0.0)
+    assert selector.abilities["bob"] < 0 and selector.difficulties["hard"] > 1.5
+
+def test_record_responses_skips_unknown_items():
+    selector = AdaptiveSelector(ITEMS)
+    assert selector.record_responses([("alice", "easy", 1.0), ("alice", "removed", 1.0)]) == 1
+
+def test_rasch_helpers():
+    assert success_probability(0.0, 0.0) == 0.5
+    assert abs(logit(success_probability(1.2, 0.0)) - 1.2) < 1e-12
+
+def test_practice_sessions_persist_responses(tmp_path):
+    directory = str(tmp_path)
+    for question_id in ("q_1", "q_2"):
+        write_question(directory, {"id": question_id, "metadata": {"difficulty": 2}}, f"{question_id}\n")
+    with practice_session(directory) as selector:
+        selector.record_response("alice", "q_1", 1.0)
+    with practice_session(directory) as selector:
+        assert selector.seen["alice"] == {"q_1"}
+        assert selector.next_question("alice") == "q_2"
+        selector.record_response("bob", "q_2", 0.0)
+    with practice_session(directory) as selector:
+        assert set(selector.abilities) == {"alice", "bob"}
@@ -0,0 +1,50 @@
+import os
+
+import assignment_cache
+from assignment_cache import AssignmentCache
+from bank import iter_question_paths, write_question
+
+CONFIG = {"num_knowledge_questions": 2, "num_programmatic_questions": 1}
+
+def write_bank(directory, count=4):
+    for n in range(count):
+        write_question(directory, {"id": f"def_{n}", "title": f"Concept {n}", "metadata": {}},
+                       f"Define concept {n}.\n")
+
+def test_hits_do_not_read_the_bank_and_writes_invalidate(tmp_path, monkeypatch):
+    directory = str(tmp_path / "questions")
+    write_bank(directory)
+    cache = AssignmentCache(directory)
+    first = cache.get("ada", CONFIG)
+    assert cache.get("ada", CONFIG) == first
+
+    # A hit is served without loading the selection pool
+    monkeypatch.setattr(assignment_cache, "selection_pool", lambda *args: 1 / 0)
+    assert AssignmentCache(directory).lookup("ada", CONFIG) == first
+
+    write_question(directory, {"id": "def_9", "metadata": {}}, "Define concept 9.\n")
+    assert AssignmentCache(directory).lookup("ada", CONFIG) is None
+
+def test_rendering_never_writes_to_the_bank(tmp_path):
+    directory = str(tmp_path / "questions")
+    write_bank(directory)
+    before = sorted(iter_question_paths(directory))
+    cache = AssignmentCache(directory, workers=3)
+    assert cache.warm([f"s{n}" for n in range(12)], CONFIG) == 12
+    cache.join()
+    assert cache.errors == []
+    assert sorted(iter_question_paths(directory)) == before
+    assert cache.warm([f"s{n}" for n in range(12)], CONFIG) == 0
+
+def test_superseded_entries_are_replaced_and_merged(tmp_path):
+    directory = str(tmp_path / "questions")
+    write_bank(directory)
+    first, second = AssignmentCache(directory), AssignmentCache(directory)
+    first.get("ada", CONFIG)
+    second.get("bob", CONFIG)
+    assert len(AssignmentCache(directory).load_entries()) == 2
+
+    write_question(directory, {"id": "def_9", "metadata": {}}, "Define concept 9.\n")
+    first.get("ada", CONFIG)
+    cache_files = [name for name in os.listdir(first.cache_dir) if name.endswith(".md")]
+    assert len(cache_files) == 2
@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+
+import pytest
+
+from bank import (
+    atomic_write, bank_generation, find_question, iter_question_paths, load_answer_keys, load_layout, load_question,
+    locked, migrate_layout, open_index, write_question
+)
+
+# Processes and questions per process of the concurrent writer tests
+WRITERS = 4
+QUESTIONS_PER_WRITER = 25
+
+def write_colliding_questions(directory):
+    """Write questions that all start from the same random id, forcing redraws."""
+    for n in range(QUESTIONS_PER_WRITER):
+        front_matter = {"id": "gen_loop_1", "metadata": {"writer": os.getpid(), "n": n}}
+        write_question(directory, front_matter, f"Body {n}\n", {"type": "manual", "n": n}, "gen_loop")
+
+def increment_counter(path):
+    for _ in range(50):
+        with locked(path):
+            with open(path, 'r') as f:
+                value = int(f.read())
+            atomic_write(path, str(value + 1))
+
+def run_processes(target, argument):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=target, args=(argument,)) for _ in range(WRITERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+def test_atomic_write_without_replace_keeps_the_existing_file(tmp_path):
+    path = str(tmp_path / "question.md")
+    atomic_write(path, "first")
+    with pytest.raises(FileExistsError):
+        atomic_write(path, "second", replace=False)
+    atomic_write(path, "third")
+    assert open(path).read() == "third"
+    assert os.listdir(tmp_path) == ["question.md"]
+
+def test_concurrent_writers_never_overwrite_random_ids(tmp_path):
+    directory = str(tmp_path / "questions")
+    run_processes(write_colliding_questions, directory)
+    paths = list(iter_question_paths(directory))
+    assert len(paths) == WRITERS * QUESTIONS_PER_WRITER
+    assert not [name for name in os.listdir(directory) if name.endswith(".tmp")]
+    ids = {load_question(path)[0]["id"] for path in paths}
+    assert ids == set(load_answer_keys(directory))
+    assert bank_generation(directory) > 0
+
+def test_locked_serializes_read_modify_write(tmp_path):
+    path = str(tmp_path / "counter")
+    atomic_write(path, "0")
+    run_processes(increment_counter, path)
+    assert open(path).read() == str(WRITERS * 50)
+
+@pytest.mark.parametrize("layout", ["topic", "hash", "topic_hash", "flat"])
+def test_migration_moves_questions_and_keeps_them_findable(tmp_path, layout):
+    directory = str(tmp_path / "questions")
+    for n in range(10):
+        topic = ["loops", "Boolean Logic", None][n % 3]
+        write_question(directory, {"id": f"q_{n}", "metadata": {"topic": topic}}, f"Body {n}\n")
+    assert migrate_layout(directory, layout) == (0 if layout == "flat" else 10)
+    assert load_layout(directory) == layout
+    for n in range(10):
+        path = find_question(directory, f"q_{n}")
+        assert path and load_question(path)[1] == f"Body {n}\n"
+    assert find_question(directory, "q_missing") is None
+    connection = open_index(directory)
+    indexed = sorted(path for path, in connection.execute("SELECT path FROM questions"))
+    connection.close()
+    assert indexed == sorted(iter_question_paths(directory))
+
+    # Migrating back to flat removes every shard directory
+    migrate_layout(directory, "flat")
+    assert [entry.name for entry in os.scandir(directory) if entry.is_dir()] == []
+    assert migrate_layout(directory, "flat") == 0
+
+def test_unknown_layouts_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        migrate_layout(str(tmp_path), "by_color")
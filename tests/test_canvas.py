@@ -0,0 +1,88 @@
+import json
+import os
+
+import pytest
+
+from bank import find_question, read_front_matter
+from canvas import (
+    code_snippets, evaluate_arithmetic, evaluate_string, ingest_canvas, iter_canvas_nodes, predict_output
+)
+from difficulty import score_difficulty
+
+NODES = [
+    {"id": "a1", "type": "text", "text": "Console.WriteLine(7 / 2);"},
+    {"id": "b2", "type": "text", "text": 'Just a note, with "quotes" and ] brackets.'},
+    {"id": "c3", "type": "text", "text": "```csharp\nint x = 1;\nConsole.WriteLine(x);\n```"},
+]
+
+def write_canvas(path, nodes):
+    path.write_text(json.dumps({"nodes": nodes, "edges": []}, indent=1))
+    return str(path)
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 16])
+def test_iter_canvas_nodes_handles_any_chunk_size(tmp_path, chunk_size):
+    path = write_canvas(tmp_path / "a.canvas", NODES)
+    assert list(iter_canvas_nodes(path, chunk_size)) == NODES
+
+def test_iter_canvas_nodes_without_nodes(tmp_path):
+    path = tmp_path / "empty.canvas"
+    path.write_text('{"edges": []}')
+    assert list(iter_canvas_nodes(str(path), 4)) == []
+
+@pytest.mark.parametrize("expression, value", [
+    ("1 + 2 * 3", 7),
+    ("(1 + 2) * 3", 9),
+    ("7 / 2", 3),
+    ("-7 / 2", -3),
+    ("-7 % 3", -1),
+    ("7 % -3", 1),
+    ("2 - -3", 5),
+    ("1 / 0", None),
+    ("1 +", None),
+    ("x + 1", None),
+])
+def test_evaluate_arithmetic_follows_csharp_integer_rules(expression, value):
+    assert evaluate_arithmetic(expression) == value
+
+def test_evaluate_string_literals():
+    assert evaluate_string('"a\\tb"') == "a\tb"
+    assert evaluate_string('$"{2 * 3} items {{x}}"') == "6 items {x}"
+    assert evaluate_string('$"{count}"') is None
+
+def test_predict_output():
+    assert predict_output('Console.Write("a");\nConsole.WriteLine(1 + 1);\n// done') == "a2\n"
+    assert predict_output("int x = 1;\nConsole.WriteLine(x);") is None
+
+def test_code_snippets():
+    assert code_snippets(NODES[0]["text"]) == ["Console.WriteLine(7 / 2);"]
+    assert code_snippets(NODES[1]["text"]) == []
+    assert code_snippets(NODES[2]["text"]) == ["int x = 1;\nConsole.WriteLine(x);"]
+
+def test_ingest_skips_unchanged_nodes_and_restores_deleted_questions(tmp_path):
+    bank = str(tmp_path / "questions")
+    canvas = write_canvas(tmp_path / "a.canvas", NODES)
+    assert len(ingest_canvas(canvas, bank)) == 2
+    assert ingest_canvas(canvas, bank) == []
+
+    os.remove(find_question(bank, "canvas_a1"))
+    assert ingest_canvas(canvas, bank) == [os.path.join(bank, "canvas_a1.md")]
+
+    write_canvas(tmp_path / "a.canvas", NODES[1:])
+    ingest_canvas(canvas, bank)
+    assert find_question(bank, "canvas_a1") is None and find_question(bank, "canvas_c3")
+
+def test_canvas_question_difficulty_is_scored_from_the_snippet(tmp_path):
+    bank = str(tmp_path / "questions")
+    nested = ("for (int i = 0; i < 5; i++) { for (int j = 0; j < i; j++) { if (i % 2 == 0 && j > 1) "
+              "{ total += i * j; } } }")
+    canvas = write_canvas(tmp_path / "a.canvas", [
+        NODES[0],
+        {"id": "d4", "type": "text", "text": f"```csharp\n{nested}\n```"}
+    ])
+    ingest_canvas(canvas, bank)
+    difficulties = {
+        question_id: read_front_matter(find_question(bank, question_id))["metadata"]["difficulty"]
+        for question_id in ("canvas_a1", "canvas_d4")
+    }
+    assert difficulties == {"canvas_a1": score_difficulty(NODES[0]["text"], 1), "canvas_d4": score_difficulty(nested, 1)}
+    assert difficulties["canvas_d4"] > difficulties["canvas_a1"]
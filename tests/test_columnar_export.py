@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from bank import append_answer_key, iter_answer_keys, load_answer_keys, write_question
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq  # noqa: E402
+
+from columnar_export import export_bank  # noqa: E402
+
+def test_iter_answer_keys_streams_the_latest_record_of_each_question(tmp_path):
+    directory = str(tmp_path)
+    for n in range(25):
+        append_answer_key(directory, {"id": f"q_{n % 10}", "type": "manual", "version": n})
+    records = list(iter_answer_keys(directory, batch_size=4))
+    assert {record["id"]: record for record in records} == load_answer_keys(directory)
+    assert [record["version"] for record in records] == list(range(15, 25))
+
+def test_export_bank_writes_every_table(tmp_path):
+    directory = str(tmp_path / "questions")
+    write_question(directory, {"id": "q_1", "metadata": {"topic": "loops", "difficulty": 2, "tags": ["a"]}},
+                   "Body\n", {"type": "loop", "iterations": 3})
+    # Front matter with an empty tags key holds None
+    write_question(directory, {"id": "q_2", "metadata": {"topic": "loops", "tags": None}}, "Other\n",
+                   {"type": "manual"})
+    results = tmp_path / "graded.jsonl"
+    results.write_text(json.dumps({"student": "s", "question_id": "q_1", "score": 1}) + "\n")
+    output_dir = str(tmp_path / "parquet")
+
+    counts = export_bank(directory, output_dir, "parquet", str(results))
+    assert counts == {"questions": 2, "answer_keys": 2, "results": 1}
+    questions = pq.read_table(f"{output_dir}/questions.parquet").to_pydict()
+    assert dict(zip(questions["id"], questions["tags"])) == {"q_1": ["a"], "q_2": []}
+    keys = pq.read_table(f"{output_dir}/answer_keys.parquet").to_pydict()
+    assert json.loads(keys["record"][keys["id"].index("q_1")])["iterations"] == 3
+
+def test_arrow_export_reads_back(tmp_path):
+    directory = str(tmp_path / "questions")
+    write_question(directory, {"id": "q_1", "metadata": {}}, "Body\n")
+    output_dir = str(tmp_path / "arrow")
+    export_bank(directory, output_dir, "arrow")
+    with pa.ipc.open_file(f"{output_dir}/questions.arrow") as reader:
+        assert reader.read_all().column("id").to_pylist() == ["q_1"]
@@ -0,0 +1,83 @@
+import os
+
+from bank import find_question, load_answer_keys, load_question, migrate_layout, write_question
+from compact import compact_bank
+from extract_definitions import process_textbook_file
+from generate_questions import generate_loop_question
+
+CHAPTER = """>[!abstract] Alpha
+>>[!definition]
+Alpha is the first letter.
+
+Some text between the definitions.
+"""
+
+def write_chapter(path, content):
+    path.write_text(content)
+    return str(path)
+
+def test_edited_source_makes_its_questions_stale(tmp_path):
+    bank = str(tmp_path / "questions")
+    chapter = write_chapter(tmp_path / "chapter.md", CHAPTER)
+    process_textbook_file(chapter, bank)
+    assert compact_bank(bank, dry_run=True)["stale"] == []
+
+    # Editing the chapter without re-extracting it leaves the question behind its source
+    write_chapter(tmp_path / "chapter.md", CHAPTER.replace("first letter", "first Greek letter"))
+    assert compact_bank(bank, dry_run=True)["stale"] == ["def_alpha"]
+
+def test_removed_definitions_and_files_orphan_their_questions(tmp_path):
+    bank = str(tmp_path / "questions")
+    chapter = write_chapter(tmp_path / "chapter.md", CHAPTER)
+    process_textbook_file(chapter, bank)
+    write_chapter(tmp_path / "chapter.md", CHAPTER.replace("Alpha", "Gamma"))
+    assert compact_bank(bank, dry_run=True)["orphaned"] == ["def_alpha"]
+    os.remove(chapter)
+    assert compact_bank(bank, dry_run=True)["orphaned"] == ["def_alpha"]
+
+def test_assignment_loop_questions_are_reclaimed(tmp_path):
+    bank = str(tmp_path / "questions")
+    assignment_path = generate_loop_question(bank, id_prefix="asg_loop")
+    kept_path = generate_loop_question(bank)
+    summary = compact_bank(bank)
+    assert len(summary["orphaned"]) == 1 and summary["orphaned"][0].startswith("asg_loop")
+    assert not os.path.exists(assignment_path) and os.path.exists(kept_path)
+    assert list(load_answer_keys(bank)) == [os.path.splitext(os.path.basename(kept_path))[0]]
+
+def test_duplicates_keep_the_first_and_archive_the_rest(tmp_path):
+    bank = str(tmp_path / "questions")
+    for question_id in ("dup_a", "dup_b"):
+        write_question(bank, {"id": question_id, "metadata": {}}, "Same body.\n", {"type": "manual"})
+    summary = compact_bank(bank, archive=True)
+    assert summary["duplicate"] == ["dup_b"] and summary["kept"] == 1
+    assert find_question(bank, "dup_b") is None
+    assert os.path.exists(os.path.join(bank, ".archive", "dup_b.md"))
+    assert list(load_answer_keys(bank)) == ["dup_a"]
+
+def test_relative_sources_resolve_from_any_directory(tmp_path, monkeypatch):
+    project = tmp_path / "proj"
+    (project / "textbook").mkdir(parents=True)
+    (tmp_path / "other").mkdir()
+    write_chapter(project / "textbook" / "chapter.md", CHAPTER)
+    monkeypatch.chdir(project)
+    process_textbook_file("textbook/chapter.md", "questions")
+    write_question("questions", {"id": "def_legacy", "metadata": {"source": "textbook/gone.md"}}, "Legacy.\n")
+
+    monkeypatch.chdir(tmp_path / "other")
+    bank = "../proj/questions"
+    assert compact_bank(bank, dry_run=True) == {"kept": 2, "orphaned": [], "stale": [], "duplicate": []}
+    os.remove(project / "textbook" / "chapter.md")
+    assert compact_bank(bank, dry_run=True)["orphaned"] == ["def_alpha"]
+
+def test_archives_keep_shard_paths_and_earlier_copies(tmp_path):
+    bank = str(tmp_path / "questions")
+    for round_number in range(2):
+        for question_id in ("dup_a", "dup_b"):
+            write_question(bank, {"id": question_id, "metadata": {"topic": "loops"}}, f"Round {round_number}.\n")
+        if round_number == 0:
+            migrate_layout(bank, "topic")
+        compact_bank(bank, archive=True)
+    archive = os.path.join(bank, ".archive", "loops")
+    assert sorted(os.listdir(archive)) == ["dup_b.1.md", "dup_b.md"]
+    assert load_question(os.path.join(archive, "dup_b.md"))[1] == "Round 0.\n"
+    assert load_question(os.path.join(archive, "dup_b.1.md"))[1] == "Round 1.\n"
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from concept_index import ConceptIndex, extract_terms, load_concept_index
+
+CHAPTER_1 = [
+    ("Variable", "A named storage location holding a value of a type."),
+    ("Scope", "The region of code in which a variable name can be used."),
+]
+
+CHAPTER_2 = [
+    ("Variable", "A name bound to a value that can change while the program runs."),
+    ("Loop", "A statement that repeats a block while a condition holds."),
+]
+
+def chapters(index, term, title):
+    return sorted(chapter for other, chapter, _ in index.lookup(term) if other == title)
+
+def test_extract_terms_skips_stopwords():
+    assert extract_terms("The scope of a variable is the block") == {"scope": 1, "variable": 1, "block": 1}
+
+def test_files_sharing_a_title_keep_separate_definitions():
+    index = ConceptIndex()
+    index.update_file("ch1.md", CHAPTER_1, "h1")
+    index.update_file("ch2.md", CHAPTER_2, "h2")
+    assert chapters(index, "variable", "Variable") == ["ch1.md", "ch2.md"]
+
+    index.remove_file("ch2.md")
+    assert chapters(index, "variable", "Variable") == ["ch1.md"]
+    assert chapters(index, "storage", "Variable") == ["ch1.md"]
+    assert index.lookup("loop") == []
+    assert index.related("Variable") == ["Scope"]
+
+def test_updating_one_file_keeps_the_other_files_definition():
+    index = ConceptIndex()
+    index.update_file("ch1.md", CHAPTER_1, "h1")
+    index.update_file("ch2.md", CHAPTER_2, "h2")
+    index.update_file("ch2.md", [("Loop", "Repeats a block.")], "h3")
+    assert chapters(index, "variable", "Variable") == ["ch1.md"]
+    assert chapters(index, "storage", "Variable") == ["ch1.md"]
+
+def test_related_picks_the_definition_of_the_given_chapter():
+    index = ConceptIndex()
+    index.update_file("ch1.md", CHAPTER_1, "h1")
+    index.update_file("ch2.md", CHAPTER_2, "h2")
+    assert "Variable" not in index.related("Variable", chapter="ch2.md")
+    assert index.related("Variable", chapter="ch1.md")[0] == "Scope"
+
+def test_unchanged_hash_is_skipped():
+    index = ConceptIndex()
+    assert index.update_file("ch1.md", CHAPTER_1, "h1")
+    assert not index.update_file("ch1.md", [], "h1")
+    assert chapters(index, "scope", "Scope") == ["ch1.md"]
+
+def test_save_and_load_round_trip(tmp_path):
+    index = ConceptIndex()
+    index.update_file("ch1.md", CHAPTER_1, "h1")
+    index.update_file("ch2.md", CHAPTER_2, "h2")
+    path = tmp_path / "concept_index.json"
+    index.save(str(path))
+    loaded = ConceptIndex.load(str(path))
+    assert loaded.definitions == index.definitions
+    assert loaded.postings == index.postings
+    assert loaded.lookup("variable") == index.lookup("variable")
+
+def test_unrecognized_indexes_load_as_empty(tmp_path):
+    path = tmp_path / "concept_index.json"
+    path.write_text(json.dumps({
+        "files": {"ch1.md": {"hash": "h1", "definitions": ["Scope"]}},
+        "definitions": {"Scope": {"chapter": "ch1.md", "terms": {"scope": 2, "region": 1}}}
+    }))
+    with pytest.raises(ValueError):
+        ConceptIndex.load(str(path))
+    index = load_concept_index(str(tmp_path))
+    assert index.files == {} and index.definitions == {}
@@ -0,0 +1,49 @@
+import os
+import random
+
+from bank import write_question
+from dedup import NearDuplicateIndex, find_near_duplicates, load_bank_index, save_bank_index, shingle_hashes
+
+TEXT = ("A student writes a loop that should add up the prices of every item in a shopping cart of {n} items, "
+        "but the total printed at the end is always missing the price of the last item in the cart.\n")
+
+OTHER = ("Explain the difference between a variable declared inside a block and one declared in the "
+         "enclosing method, and describe which statements can see each of them.\n")
+
+def jaccard(first, second):
+    first, second = shingle_hashes(first), shingle_hashes(second)
+    return len(first & second) / len(first | second)
+
+def test_minhash_estimates_jaccard_similarity():
+    rng = random.Random(4)
+    index = NearDuplicateIndex(num_perm=256, bands=32)
+    words = [f"word{n}" for n in range(60)]
+    for _ in range(30):
+        first = " ".join(rng.choices(words, k=40))
+        second = " ".join(token if rng.random() < 0.8 else rng.choice(words) for token in first.split())
+        estimate = sum(
+            x == y for x, y in zip(index.signature(first), index.signature(second))
+        ) / index.num_perm
+        assert abs(estimate - jaccard(first, second)) < 0.15
+
+def test_numbers_do_not_hide_duplicates():
+    index = NearDuplicateIndex()
+    assert index.add("q1", TEXT.format(n=5)) == []
+    assert [key for key, _ in index.add("q2", TEXT.format(n=12))] == ["q1"]
+    assert index.add("q3", OTHER) == []
+    index.remove("q1")
+    assert "q1" not in index and len(index) == 2
+    assert [key for key, _ in index.query(TEXT.format(n=7))] == ["q2"]
+
+def test_bank_index_persists_and_follows_the_bank(tmp_path):
+    directory = str(tmp_path / "questions")
+    first = write_question(directory, {"id": "q1", "metadata": {}}, TEXT.format(n=5))
+    write_question(directory, {"id": "q2", "metadata": {}}, TEXT.format(n=9))
+    write_question(directory, {"id": "q3", "metadata": {}}, OTHER)
+    assert [(question, other) for question, other, _ in find_near_duplicates(directory)] == [("q2", "q1")]
+
+    save_bank_index(load_bank_index(directory), directory)
+    os.remove(first)
+    index = load_bank_index(directory)
+    assert sorted(index.signatures) == ["q2", "q3"]
+    assert index.query(TEXT.format(n=1), exclude="q2") == []
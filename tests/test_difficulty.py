@@ -0,0 +1,27 @@
+from difficulty import fingerprint, score_difficulty, shape_features, structural_features
+
+LOOP = "for(int i = 0; i < (size + 1) / 2; i++) { Process(i); }"
+
+def test_structural_features():
+    features = structural_features(LOOP)
+    assert features["control_statements"] == 1 and features["nesting_depth"] == 1
+    assert features["parenthesis_depth"] == 2 and features["state_changes"] == 2
+    assert structural_features("5 / 3.1 + 3 * 0.1")["mixed_types"] == 1
+    assert structural_features("while(x > 0) x--; // a * b && c")["operators"] == 1
+
+def test_literals_share_a_shape_but_keep_their_values():
+    assert fingerprint("for(int i = 3; i < 250; i += 2)") == fingerprint("for(int i = 1; i < 9; i += 1)")
+    shape_features.cache_clear()
+    small = structural_features("x = 5 + 3;")
+    large = structural_features("x = 500 + 3;")
+    assert shape_features.cache_info().misses == 1
+    assert (small["large_literals"], large["large_literals"]) == (0, 1)
+    assert structural_features("x = 5 + -3;")["negative_literals"] == 1
+
+def test_scores_grow_with_structure_and_respect_the_baseline():
+    assert score_difficulty("P || Q") == 1
+    assert score_difficulty(LOOP) == 3
+    nested = "for(int i = 0; i < 5; i++) { for(int j = 0; j < i; j++) { if (i % 2 == 0 && j > 1) { total += i * j; } } }"
+    assert score_difficulty(nested) == 4
+    assert score_difficulty("P || Q", baseline=4) == 3
+    assert all(1 <= score_difficulty(code, baseline) <= 4 for code in ("P", LOOP, nested) for baseline in (1, 4))
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from expressions import parse, render, synthesize_expressions, tokenize, trace, truth_table
+
+def test_precedence_and_associativity():
+    assert parse("a || b && c") == ("or", ("var", "a"), ("and", ("var", "b"), ("var", "c")))
+    assert parse("a -> b -> c") == ("implies", ("var", "a"), ("implies", ("var", "b"), ("var", "c")))
+    assert truth_table("a ^ b", ["a", "b"]) == [False, True, True, False]
+    assert truth_table("a -> b", ["a", "b"]) == [True, False, True, True]
+
+def test_short_circuit_skips_side_effects():
+    analysis = trace("(x > 5) && (y++ < 10)", {"x": 3, "y": 7})
+    assert analysis["result"] is False
+    assert analysis["skipped"] == ["y++ < 10"]
+    assert analysis["final_state"] == {"x": 3, "y": 7}
+
+    analysis = trace("(x < 5) && (y++ < 8) && (--y == 7)", {"x": 3, "y": 7})
+    assert analysis["result"] is True and analysis["final_state"]["y"] == 7
+
+def test_synthesized_expressions_render_and_parse_back():
+    rng = random.Random(3)
+    expressions = synthesize_expressions(500, rng)
+    assert len({expression for expression, _ in expressions}) == len(expressions)
+    for expression, values in expressions:
+        assert render(parse(expression)) == expression
+        assert set(trace(expression, values)["final_state"]) == set(values)
+
+def test_tokenize_rejects_unknown_characters_and_drops_comments():
+    assert tokenize("a && b // both") == ["a", "&&", "b"]
+    with pytest.raises(ValueError):
+        tokenize("a & b")
+    with pytest.raises(ValueError):
+        parse("a &&")
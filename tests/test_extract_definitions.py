@@ -0,0 +1,48 @@
+import json
+
+from concept_index import load_concept_index
+from extract_definitions import (
+    forget_textbook_file, load_extraction_manifest, process_textbook_definitions, process_textbook_file
+)
+
+CHAPTER = """>[!abstract] Alpha
+>>[!definition]
+Alpha is the first letter.
+"""
+
+def test_watched_files_are_recorded_in_the_extraction_manifest(tmp_path):
+    bank = str(tmp_path / "questions")
+    textbook = tmp_path / "textbook"
+    textbook.mkdir()
+    chapter = textbook / "chapter.md"
+    chapter.write_text(CHAPTER)
+
+    # The watcher regenerates a single file; a full extraction afterwards has nothing to do
+    assert len(process_textbook_file(str(chapter), bank)) == 1
+    entry = load_extraction_manifest(bank)[str(chapter)]
+    assert (entry["mtime_ns"], entry["size"]) == (chapter.stat().st_mtime_ns, chapter.stat().st_size)
+    assert process_textbook_definitions(str(textbook), bank, workers=1) == []
+
+    forget_textbook_file(str(chapter), bank)
+    assert load_extraction_manifest(bank) == {}
+
+def test_full_extraction_skips_unchanged_files(tmp_path):
+    bank = str(tmp_path / "questions")
+    textbook = tmp_path / "textbook"
+    (textbook / "part").mkdir(parents=True)
+    (textbook / "part" / "chapter.md").write_text(CHAPTER)
+    assert len(process_textbook_definitions(str(textbook), bank, workers=1)) == 1
+    assert process_textbook_definitions(str(textbook), bank, workers=1) == []
+    assert len(process_textbook_definitions(str(textbook), bank, workers=1, force=True)) == 1
+
+def test_an_unrecognized_concept_index_is_rebuilt(tmp_path):
+    bank = tmp_path / "questions"
+    textbook = tmp_path / "textbook"
+    textbook.mkdir()
+    (textbook / "chapter.md").write_text(CHAPTER)
+    process_textbook_definitions(str(textbook), str(bank), workers=1)
+
+    (bank / "concept_index.json").write_text(json.dumps({"files": {}, "definitions": {"Alpha": {"terms": {}}}}))
+    assert load_concept_index(str(bank)).files == {}
+    process_textbook_definitions(str(textbook), str(bank), workers=1)
+    assert list(load_concept_index(str(bank)).files) == [str(textbook / "chapter.md")]
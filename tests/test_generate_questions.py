@@ -0,0 +1,32 @@
+import random
+
+import pytest
+
+import generate_questions
+from bank import read_front_matter
+
+def refuse():
+    raise AssertionError("built although not chosen")
+
+@pytest.mark.parametrize("generator, builder", [
+    (generate_questions.generate_off_by_one_question, "random_mutant"),
+    (generate_questions.generate_boolean_expression_question, "synthesize_expressions"),
+])
+def test_expensive_variations_are_built_only_when_chosen(tmp_path, monkeypatch, generator, builder):
+    monkeypatch.setattr(generate_questions, builder, lambda *args, **kwargs: refuse())
+    monkeypatch.setattr(random, "choice", lambda options: options[0])
+    assert read_front_matter(generator(str(tmp_path)))["metadata"]["difficulty"]
+
+@pytest.mark.parametrize("generator", [
+    generate_questions.generate_off_by_one_question,
+    generate_questions.generate_boolean_expression_question,
+    generate_questions.generate_variable_scope_question,
+])
+def test_chosen_builders_produce_questions(tmp_path, monkeypatch, generator):
+    monkeypatch.setattr(random, "choice", lambda options: options[-1])
+    assert read_front_matter(generator(str(tmp_path)))["metadata"]["difficulty"]
+
+def test_scope_programs_are_synthesized_only_when_chosen(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_questions, "generate_programs", lambda *args, **kwargs: refuse())
+    monkeypatch.setattr(random, "choice", lambda options: options[0])
+    assert read_front_matter(generate_questions.generate_variable_scope_question(str(tmp_path)))["metadata"]
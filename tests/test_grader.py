@@ -0,0 +1,57 @@
+import csv
+import json
+
+import numpy as np
+
+from bank import write_question
+from grader import grade_group, grade_submissions, parse_state, parse_truth_values
+
+def test_truth_tables_are_graded_per_cell():
+    key = {"type": "truth_table", "result_column": [True, False, False, True]}
+    answers = ["TFFT", "T, F, T, T", ["true", "false", "false", "false"], "TFF", "yes"]
+    scores, parts = grade_group(key, answers)
+    assert scores.tolist() == [1.0, 0.75, 0.75, 0.0, 0.0]
+    assert parts.shape == (5, 4)
+
+    # The vectorized grades agree with grading each answer on its own
+    for answer, score in zip(answers, scores):
+        values = parse_truth_values(answer)
+        expected = 0.0
+        if values is not None and len(values) == 4:
+            expected = float(np.mean([value == int(cell) for value, cell in zip(values, key["result_column"])]))
+        assert score == expected
+
+def test_numbers_states_and_single_values():
+    scores, _ = grade_group({"type": "numeric_expression", "expected": 2.5, "tolerance": 0.01},
+                            ["2.5", "2.509", "2.52", "abc", None])
+    assert scores.tolist() == [1.0, 1.0, 0.0, 0.0, 0.0]
+
+    key = {"type": "variable_state", "variables": ["x", "y"], "final_state": {"x": 5, "y": -10}}
+    scores, parts = grade_group(key, ["x = 5, y = -10", {"x": 5, "y": 3}, "y: -10", ""])
+    assert scores.tolist() == [1.0, 0.5, 0.5, 0.0]
+    assert parse_state("y=2, x=1", ["x", "y"]) == [1.0, 2.0]
+
+    scores, _ = grade_group({"type": "boolean_expression", "expected": False}, ["false", "F", "true", "TF", True])
+    assert scores.tolist() == [1.0, 1.0, 0.0, 0.0, 0.0]
+
+def test_submissions_are_streamed_in_chunks(tmp_path):
+    directory = str(tmp_path / "questions")
+    write_question(directory, {"id": "tt", "metadata": {}}, "Body\n",
+                   {"type": "truth_table", "result_column": [False, True]})
+    write_question(directory, {"id": "essay", "metadata": {}}, "Body\n", {"type": "manual"})
+    submissions = tmp_path / "submissions.jsonl"
+    submissions.write_text("".join(
+        json.dumps({"student": n, "question_id": question_id, "answer": "FT" if n % 2 else "TT"}) + "\n"
+        for n in range(7) for question_id in ("tt", "essay", "unknown")
+    ))
+    results = str(tmp_path / "graded.csv")
+    report = grade_submissions(str(submissions), results, directory, chunk_size=3)
+    assert report["ungraded"] == 14
+    item = report["items"]["tt"]
+    assert item["submissions"] == 7
+    assert np.isclose(item["mean_score"], 5 / 7)
+    assert np.isclose(item["full_credit_rate"], 3 / 7)
+    assert item["part_accuracy"] == [round(3 / 7, 4), 1.0]
+    with open(results, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [float(row["score"]) for row in rows] == [0.5 if n % 2 == 0 else 1.0 for n in range(7)]
@@ -0,0 +1,69 @@
+import csv
+import random
+
+import numpy as np
+import pytest
+
+from bank import load_calibrated_difficulties
+from item_analysis import analyze_results, calibrated_difficulty, flagged_items
+
+def random_results(rng, students, items=6):
+    """Graded results where stronger students score higher, except on a reversed item."""
+    rows = []
+    for student in students:
+        ability = rng.random()
+        for item in range(items):
+            if rng.random() < 0.8:
+                chance = 1 - ability if item == 0 else ability
+                rows.append((student, f"q{item}", float(rng.random() < chance)))
+    return rows
+
+def write_results(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["student", "question_id", "score"])
+        writer.writerows(rows)
+    return str(path)
+
+def brute_force(rows):
+    """P-value and item-rest correlation of each item, computed response by response."""
+    by_student = {}
+    for student, question_id, score in rows:
+        by_student.setdefault(student, []).append((question_id, score))
+    statistics = {}
+    for question_id in sorted({row[1] for row in rows}):
+        scores, rests = [], []
+        all_scores = [score for _, item, score in rows if item == question_id]
+        for responses in by_student.values():
+            for index, (item, score) in enumerate(responses):
+                others = [other for position, (_, other) in enumerate(responses) if position != index]
+                if item == question_id and others:
+                    scores.append(score)
+                    rests.append(sum(others) / len(others))
+        statistics[question_id] = (np.mean(all_scores), np.corrcoef(scores, rests)[0, 1])
+    return statistics
+
+def test_statistics_match_a_direct_computation(tmp_path):
+    rows = random_results(random.Random(9), [f"s{n}" for n in range(200)])
+    report = analyze_results(write_results(tmp_path / "graded.csv", rows), str(tmp_path), chunk_size=97)
+    for question_id, (p_value, discrimination) in brute_force(rows).items():
+        assert report[question_id]["p_value"] == pytest.approx(p_value, abs=1e-4)
+        assert report[question_id]["discrimination"] == pytest.approx(discrimination, abs=1e-4)
+    assert flagged_items(report) == ["q0"]
+
+def test_cohorts_accumulate_like_a_single_file(tmp_path):
+    rng = random.Random(2)
+    first = random_results(rng, [f"a{n}" for n in range(80)])
+    second = random_results(rng, [f"b{n}" for n in range(80)])
+    (tmp_path / "split").mkdir()
+    (tmp_path / "whole").mkdir()
+    analyze_results(write_results(tmp_path / "first.csv", first), str(tmp_path / "split"))
+    split = analyze_results(write_results(tmp_path / "second.csv", second), str(tmp_path / "split"))
+    whole = analyze_results(write_results(tmp_path / "whole.csv", first + second), str(tmp_path / "whole"))
+    assert split == whole
+    assert load_calibrated_difficulties(str(tmp_path / "split")) == {
+        question_id: item["difficulty"] for question_id, item in whole.items()
+    }
+
+def test_difficulty_bands():
+    assert [calibrated_difficulty(p) for p in (0.9, 0.85, 0.7, 0.5, 0.1)] == [1, 1, 2, 3, 4]
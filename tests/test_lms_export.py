@@ -0,0 +1,65 @@
+import xml.etree.ElementTree as ElementTree
+import zipfile
+
+from bank import write_question
+from lms_export import QTI_NAMESPACE, cdata, export_moodle, export_qti, render_markdown
+
+BODY = """---
+title: "Loop Application"
+---
+
+## Question:
+
+Analyze `for` loops with **care** & attention:
+
+```csharp
+if (a < b && b > c) { }
+```
+
+| P | Q | P && Q |
+|---|---|--------|
+T | T | true
+
+1. Trace it.
+2. Explain it.
+"""
+
+def write_bank(directory):
+    write_question(directory, {"id": "q1", "metadata": {"topic": "loops", "tags": ["loops", "a&b"]}}, BODY)
+    write_question(directory, {"id": "q2", "metadata": {"topic": "loops", "tags": None}}, "Plain ]]> text\n")
+    write_question(directory, {"id": "q3", "metadata": {}}, "No topic\n")
+
+def test_render_markdown():
+    html = render_markdown(BODY.split("---\n", 2)[2])
+    assert "<h3>Question:</h3>" in html
+    assert "<p>Analyze <code>for</code> loops with <strong>care</strong> &amp; attention:</p>" in html
+    assert "<pre><code>if (a &lt; b &amp;&amp; b &gt; c) { }</code></pre>" in html
+    assert "<table><tr><td>P</td><td>Q</td><td>P &amp;&amp; Q</td></tr><tr><td>T</td><td>T</td><td>true</td></tr></table>" in html
+    assert "<ol><li>Trace it.</li><li>Explain it.</li></ol>" in html
+
+def test_cdata_splits_terminators():
+    assert cdata("a]]>b") == "<![CDATA[a]]]]><![CDATA[>b]]>"
+
+def test_qti_package_is_well_formed(tmp_path):
+    directory = str(tmp_path / "questions")
+    write_bank(directory)
+    output_path = str(tmp_path / "qti.zip")
+    assert export_qti(directory, output_path) == 3
+    with zipfile.ZipFile(output_path) as package:
+        assert sorted(package.namelist()) == ["imsmanifest.xml", "items/q1.xml", "items/q2.xml", "items/q3.xml"]
+        manifest = ElementTree.fromstring(package.read("imsmanifest.xml"))
+        assert len([element for element in manifest.iter() if element.tag.endswith("resource")]) == 3
+        item = ElementTree.fromstring(package.read("items/q1.xml"))
+        assert item.tag == f"{{{QTI_NAMESPACE}}}assessmentItem"
+        assert item.get("title") == "Loop Application"
+
+def test_moodle_file_groups_questions_by_topic(tmp_path):
+    directory = str(tmp_path / "questions")
+    write_bank(directory)
+    output_path = str(tmp_path / "moodle.xml")
+    assert export_moodle(directory, output_path) == 3
+    quiz = ElementTree.parse(output_path).getroot()
+    questions = quiz.findall("question")
+    assert [question.get("type") for question in questions] == ["category", "essay", "essay", "category", "essay"]
+    assert [tag.text for tag in questions[1].iter("text")][-2:] == ["loops", "a&b"]
+    assert questions[2].find("questiontext/text").text == "<p>Plain ]]&gt; text</p>"
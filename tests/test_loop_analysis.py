@@ -0,0 +1,68 @@
+import itertools
+import random
+
+import pytest
+
+from loop_analysis import analyze_loop, iteration_count, nested_iterations, positive_part_sum, simulate_nested
+
+OPERATORS = ("<", "<=", ">", ">=")
+
+def run_loop(start, operator, bound, step, limit=1000):
+    """Visit a loop's counter values one by one, or return None if it runs past limit."""
+    values = []
+    i = start
+    while {"<": i < bound, "<=": i <= bound, ">": i > bound, ">=": i >= bound}[operator]:
+        values.append(i)
+        if len(values) > limit:
+            return None
+        i += step
+    return values
+
+def test_single_loops_match_running_them():
+    for start, operator, bound, step in itertools.product(range(-3, 4), OPERATORS, range(-3, 4), (-2, -1, 1, 3)):
+        values = run_loop(start, operator, bound, step)
+        analysis = analyze_loop(start, operator, bound, step)
+        if values is None:
+            assert analysis["iterations"] is None
+            continue
+        assert analysis["iterations"] == len(values)
+        assert analysis["final_counter"] == start + len(values) * step
+        assert analysis["sum"] == sum(values)
+
+def random_term(rng):
+    if rng.random() < 0.5:
+        return rng.randint(-6, 12)
+    return (rng.choice((-2, -1, 1, 2)), rng.randint(-6, 6))
+
+def test_nested_loops_match_simulation():
+    rng = random.Random(7)
+    checked = 0
+    while checked < 2000:
+        outer = (rng.randint(-4, 4), rng.choice(("<", "<=")), rng.randint(-4, 10), rng.choice((1, 2, 3)))
+        inner = (random_term(rng), rng.choice(OPERATORS), random_term(rng), rng.choice((-2, -1, 1, 2)))
+        try:
+            expected = simulate_nested(outer, inner, max_iterations=10000)
+        except ValueError:
+            # The inner loop does not terminate for some outer value
+            assert nested_iterations(outer, inner) is None
+            continue
+        assert nested_iterations(outer, inner) == expected, (outer, inner)
+        checked += 1
+
+@pytest.mark.parametrize("n", [1, 2, 5, 10, 50])
+def test_positive_part_sum_matches_simulation(n):
+    # for(i = 0; i < n + 5; i++) for(j = 0; j < 3 * n + 1 - 3 * i; j++)
+    outer, inner = (0, "<", n + 5, 1), (0, "<", (-3, 3 * n + 1), 1)
+    assert nested_iterations(outer, inner) == simulate_nested(outer, inner)
+
+def test_positive_part_sum_is_exact_above_float_precision():
+    # The same loop family as above, too long to simulate: terms 3n + 1 - 3k are
+    # positive for k = 0 .. n, and float division put the last one out of range
+    n = 10 ** 17
+    expected = (n + 1) * (3 * n + 1) - 3 * n * (n + 1) // 2
+    assert positive_part_sum(3 * n + 1, -3, n + 5) == expected
+    assert nested_iterations((0, "<", n + 5, 1), (0, "<", (-3, 3 * n + 1), 1)) == expected
+
+def test_unterminated_loops_are_reported():
+    assert iteration_count(0, "<", 10, -1) is None
+    assert nested_iterations((0, "<", 3, 1), (0, "<", 5, 0)) is None
@@ -0,0 +1,61 @@
+import itertools
+import random
+
+import pytest
+
+from expressions import truth_table
+from minimize import complexity, coverage, literal_count, minimal_cover, minimize, simplify, table_bits
+
+def brute_force_cost(bits, num_vars):
+    """Fewest terms, then fewest literals, of any sum of products equal to the table."""
+    implicants = [
+        (value, mask)
+        for mask in range(2 ** num_vars)
+        for value in range(2 ** num_vars)
+        if not value & mask and coverage((value, mask), num_vars) & ~bits == 0
+    ]
+    for size in range(len(implicants) + 1):
+        costs = [
+            sum(literal_count(implicant, num_vars) for implicant in terms)
+            for terms in itertools.combinations(implicants, size)
+            if sum_coverage(terms, num_vars) == bits
+        ]
+        if costs:
+            return size, min(costs)
+
+def sum_coverage(terms, num_vars):
+    bits = 0
+    for implicant in terms:
+        bits |= coverage(implicant, num_vars)
+    return bits
+
+@pytest.mark.parametrize("num_vars", [1, 2, 3])
+def test_every_table_is_minimized_exactly(num_vars):
+    variables = ["a", "b", "c"][:num_vars]
+    for bits in range(2 ** 2 ** num_vars):
+        column = [bool(bits >> row & 1) for row in range(2 ** num_vars)]
+        assert truth_table(minimize(column, variables), variables) == column
+        if bits:
+            cover = minimal_cover(bits, num_vars)
+            assert sum_coverage(cover, num_vars) == bits
+            cost = (len(cover), sum(literal_count(implicant, num_vars) for implicant in cover))
+            assert cost == brute_force_cost(bits, num_vars)
+
+def test_random_four_variable_tables_are_equivalent():
+    rng = random.Random(7)
+    variables = ["a", "b", "c", "d"]
+    for _ in range(200):
+        column = [rng.random() < 0.5 for _ in range(16)]
+        assert truth_table(minimize(column, variables), variables) == column
+
+def test_table_bits_and_constants():
+    assert table_bits([True, False, False, True]) == 0b1001
+    assert minimize([False] * 4, ["a", "b"]) == "false"
+    assert minimize([True] * 4, ["a", "b"]) == "true"
+
+def test_simplify_reports_whether_the_expression_shrank():
+    variables = ["a", "b"]
+    expression = "(a && b) || (a && !b)"
+    assert simplify(expression, truth_table(expression, variables), variables) == ("a", True)
+    assert simplify("a || b", truth_table("a || b", variables), variables) == ("a || b", False)
+    assert complexity("!a && b") == (2, 2)
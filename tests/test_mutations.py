@@ -0,0 +1,85 @@
+import operator
+import random
+import re
+
+from mutations import behavior, candidate_mutants, generate_mutants, make_loop, mutants, random_loop, render_loop
+
+COMPARISONS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+# Iterations after which a simulated loop is taken not to terminate
+SIMULATION_LIMIT = 10000
+
+def simulate(loop):
+    """Run a loop step by step and summarize it the way behavior() does."""
+    values = []
+    i = loop["start"]
+    outcome = "completes"
+    while COMPARISONS[loop["operator"]](i, loop["bound"]):
+        if len(values) == SIMULATION_LIMIT:
+            outcome = "never terminates"
+            break
+        if loop["indexes"] and not 0 <= i < loop["length"]:
+            outcome = f"IndexOutOfRangeException at i = {i}"
+            break
+        values.append(i)
+        i += loop["step"]
+    if not values:
+        return {"iterations": 0, "first": None, "last": None, "step": None, "outcome": outcome}
+    if outcome == "never terminates":
+        return {"iterations": None, "first": values[0], "last": None, "step": loop["step"], "outcome": outcome}
+    return {
+        "iterations": len(values),
+        "first": values[0],
+        "last": values[-1],
+        "step": loop["step"] if len(values) > 1 else None,
+        "outcome": outcome
+    }
+
+def test_behavior_matches_simulation_for_loops_and_all_their_mutants():
+    rng = random.Random(5)
+    for _ in range(2000):
+        loop = random_loop(rng)
+        assert behavior(loop) == simulate(loop), render_loop(loop)
+        for _, _, mutant in candidate_mutants(loop):
+            assert behavior(mutant) == simulate(mutant), render_loop(mutant)
+
+def test_equivalent_mutants_are_discarded():
+    loop = make_loop(0, "<", 9, 2, "Console.WriteLine(i);", "print the even numbers below 9")
+    assert {render_loop(mutant) for _, _, mutant in mutants(loop)}.isdisjoint(
+        {"for(int i = 0; i <= 9; i += 2) { Console.WriteLine(i); }"}
+    )
+    for _, _, mutant in mutants(loop):
+        assert simulate(mutant) != simulate(loop)
+
+def test_generated_mutants_are_distinct():
+    results = generate_mutants(300, random.Random(2))
+    assert len(results) == 300
+    assert len({render_loop(mutant) for _, mutant, _, _ in results}) == 300
+
+# Description of each mutation kind, naming the mutant's code and then the correct code
+DESCRIPTIONS = {
+    "boundary": r"the condition uses (\S+) where (\S+) is needed",
+    "start": r"i starts at (.+) instead of (.+)",
+    "bound": r"the bound (.+) should be (.+)",
+    "increment": r"the update (.+) should be (.+)"
+}
+
+# The part of a rendered loop each mutation kind changes
+LOOP_PARTS = {
+    "boundary": r"; i (\S+) ",
+    "start": r"int i = (.+?);",
+    "bound": r"; i \S+ (.+?);",
+    "increment": r"; ([^;]+)\) \{"
+}
+
+def test_descriptions_name_the_mutant_code_first_and_the_correct_code_second():
+    rng = random.Random(8)
+    seen = set()
+    for _ in range(500):
+        loop = random_loop(rng)
+        for kind, description, mutant in candidate_mutants(loop):
+            used, needed = re.fullmatch(DESCRIPTIONS[kind], description).groups()
+            assert re.search(LOOP_PARTS[kind], render_loop(mutant)).group(1) == used, description
+            assert re.search(LOOP_PARTS[kind], render_loop(loop)).group(1) == needed, description
+            seen.add(kind)
+    assert seen == set(DESCRIPTIONS)
@@ -0,0 +1,84 @@
+import random
+
+from scope_analysis import analyze_scopes, describe_execution, generate_programs
+
+def run_program(program):
+    """Check and run a program by walking it with a stack of scopes.
+
+    Returns (errors, output) with errors as a set of (line, code, name).
+    """
+    errors = set()
+    output = []
+    line = 0
+    labels = ["Outer", "Inside", "Inner", "Innermost"]
+
+    def block_names(body):
+        return {statement[1] for statement in body if statement[0] == "declare"}
+
+    def walk(body, scopes):
+        nonlocal line
+        # scopes: list of (names declared anywhere in the block, values declared so far), outermost first
+        scope = (block_names(body), {})
+        scopes = scopes + [scope]
+        for statement in body:
+            if statement[0] == "block":
+                line += 1
+                walk(statement[1], scopes)
+                line += 1
+                continue
+            line += 1
+            if statement[0] == "declare":
+                _, name, value = statement
+                # A conflicting declaration is still a declaration; a duplicate leaves the first in place
+                if name in scope[1]:
+                    errors.add((line, "CS0128", name))
+                    continue
+                if any(name in names for names, _ in scopes[:-1]):
+                    errors.add((line, "CS0136", name))
+                scope[1][name] = value
+                continue
+            fields = []
+            for name in statement[1]:
+                owner = next((values for names, values in reversed(scopes) if name in names), None)
+                if owner is None:
+                    errors.add((line, "CS0103", name))
+                elif name not in owner:
+                    errors.add((line, "CS0841", name))
+                else:
+                    fields.append(f"{name}={owner[name]}")
+            label = labels[min(len(scopes) - 1, len(labels) - 1)]
+            output.append(f"{label}: {', '.join(fields)}")
+
+    walk(program, [])
+    return errors, output
+
+def test_analysis_matches_a_scope_stack_interpreter():
+    rng = random.Random(11)
+    for program, analysis in generate_programs(1500, rng, max_depth=3):
+        errors, output = run_program(program)
+        assert {(error["line"], error["code"], error["name"]) for error in analysis["errors"]} == errors
+        assert analysis["output"] == (None if errors else output)
+
+def test_each_error_code():
+    program = [
+        ("declare", "a", 1),
+        ("print", ["b"]),
+        ("block", [("declare", "a", 2), ("print", ["a"])]),
+        ("declare", "a", 3),
+        ("block", [("print", ["c"]), ("declare", "c", 4)]),
+    ]
+    analysis = analyze_scopes(program)
+    codes = {(error["code"], error["name"]) for error in analysis["errors"]}
+    assert codes == {("CS0103", "b"), ("CS0136", "a"), ("CS0128", "a"), ("CS0841", "c")}
+    assert analysis["output"] is None
+    assert "error CS0841" in describe_execution(analysis)
+
+def test_sibling_blocks_may_reuse_names():
+    program = [
+        ("block", [("declare", "x", 1), ("print", ["x"])]),
+        ("block", [("declare", "x", 2), ("print", ["x"])]),
+    ]
+    analysis = analyze_scopes(program)
+    assert analysis["errors"] == []
+    assert analysis["output"] == ["Inside: x=1", "Inside: x=2"]
+    assert describe_execution(analysis) == 'prints "Inside: x=1"\nprints "Inside: x=2"'
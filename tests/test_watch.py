@@ -0,0 +1,44 @@
+import os
+
+from bank import bank_generation
+from watch import changed_paths, load_dependencies, rebuild_textbook_file, snapshot
+
+CHAPTER = """>[!abstract] Alpha
+>>[!definition]
+Alpha is the first letter.
+>>[!example]
+Alpha comes before beta.
+
+>[!abstract] Beta
+>>[!definition]
+Beta is the second letter.
+"""
+
+def test_snapshots_report_added_modified_and_removed_files(tmp_path):
+    (tmp_path / "a.md").write_text("a")
+    (tmp_path / "b.md").write_text("b")
+    (tmp_path / "notes.txt").write_text("ignored")
+    old = snapshot(str(tmp_path))
+    (tmp_path / "a.md").write_text("a, edited")
+    os.remove(tmp_path / "b.md")
+    (tmp_path / "c.md").write_text("c")
+    assert changed_paths(old, snapshot(str(tmp_path))) == {str(tmp_path / name) for name in ("a.md", "b.md", "c.md")}
+
+def test_rebuilding_a_chapter_removes_questions_of_vanished_definitions(tmp_path):
+    bank = str(tmp_path / "questions")
+    chapter = tmp_path / "chapter.md"
+    chapter.write_text(CHAPTER)
+    dependencies = {}
+    assert len(rebuild_textbook_file(str(chapter), bank, dependencies)) == 2
+    assert sorted(load_dependencies(bank)[str(chapter)]) == sorted(dependencies[str(chapter)])
+
+    chapter.write_text(CHAPTER.split("\n\n")[0] + "\n")
+    generation = bank_generation(bank)
+    current = rebuild_textbook_file(str(chapter), bank, dependencies)
+    assert [os.path.basename(path) for path in current] == ["def_alpha.md"]
+    assert not os.path.exists(os.path.join(bank, "def_beta.md"))
+    assert bank_generation(bank) > generation
+
+    os.remove(chapter)
+    assert rebuild_textbook_file(str(chapter), bank, dependencies) == []
+    assert load_dependencies(bank) == {}
@@ -0,0 +1,100 @@
+import os
+import threading
+
+import pytest
+
+import bank
+from bank import (
+    disable_write_behind, enable_duplicate_check, enable_write_behind, flush_writes, iter_question_paths,
+    load_answer_keys, load_question, write_question
+)
+
+BODY = "Trace the loop for(int i = 0; i < 10; i++) and list every value of i it prints, one per line.\n"
+
+@pytest.fixture
+def write_behind():
+    writer = enable_write_behind(sync=False)
+    yield writer
+    disable_write_behind()
+
+def test_queued_writes_are_published_with_their_answer_keys(tmp_path, write_behind):
+    directory = str(tmp_path)
+    paths = [
+        write_question(directory, {"id": f"q_{n}", "metadata": {}}, f"Body {n}\n", {"type": "manual", "n": n})
+        for n in range(50)
+    ]
+    flush_writes()
+    for n, path in enumerate(paths):
+        assert load_question(path) == ({"id": f"q_{n}", "metadata": {}}, f"Body {n}\n")
+    assert {record["n"] for record in load_answer_keys(directory).values()} == set(range(50))
+
+def test_random_ids_are_reserved_when_queued(tmp_path, write_behind, monkeypatch):
+    directory = str(tmp_path)
+    # Hold the writer back until the reservation has been checked
+    released = threading.Event()
+    write_batch = bank.WriteBehind.write_batch
+    monkeypatch.setattr(bank.WriteBehind, "write_batch", lambda self, jobs: released.wait() and write_batch(self, jobs))
+    front_matter = {"id": "gen_1000", "metadata": {}}
+    path = write_question(directory, front_matter, BODY, None, "gen")
+    # Only a hidden reservation exists before the writer gets to it
+    assert not os.path.exists(path) and os.path.exists(bank.reservation_path(path))
+    assert list(iter_question_paths(directory)) == []
+    released.set()
+    # Another question drawing the same id is moved to a fresh one
+    ids = iter(["gen_1000", "gen_1001"])
+    monkeypatch.setattr(bank, "new_question_id", lambda prefix, attempt=0: next(ids))
+    other = {"id": next(ids), "metadata": {}}
+    other_path = write_question(directory, other, "Other body\n", None, "gen")
+    flush_writes()
+    assert other["id"] == "gen_1001" and other_path != path
+    assert load_question(path)[1] == BODY and load_question(other_path)[1] == "Other body\n"
+    assert sorted(os.listdir(directory)) == [".generation", "gen_1000.md", "gen_1001.md"]
+
+def test_synchronous_writers_respect_queued_reservations(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    queued_path = os.path.join(directory, "gen_4000.md")
+    bank.reserve(queued_path)
+    ids = iter(["gen_4001"])
+    monkeypatch.setattr(bank, "new_question_id", lambda prefix, attempt=0: next(ids))
+    path = write_question(directory, {"id": "gen_4000", "metadata": {}}, BODY, None, "gen")
+    assert path == os.path.join(directory, "gen_4001.md")
+    assert not os.path.exists(queued_path) and not os.path.exists(bank.reservation_path(path))
+
+def test_ids_taken_by_another_process_are_redrawn_at_submit(tmp_path, write_behind):
+    directory = str(tmp_path)
+    taken = os.path.join(directory, "gen_2000.md")
+    with open(taken, 'w') as f:
+        f.write("written elsewhere\n")
+    front_matter = {"id": "gen_2000", "metadata": {}}
+    path = write_question(directory, front_matter, BODY, {"type": "manual"}, "gen")
+    flush_writes()
+    assert path != taken and front_matter["id"] != "gen_2000"
+    with open(taken) as f:
+        assert f.read() == "written elsewhere\n"
+    assert list(load_answer_keys(directory)) == [front_matter["id"]]
+
+def test_duplicates_within_one_batch_are_suppressed(tmp_path, write_behind):
+    directory = str(tmp_path)
+    enable_duplicate_check(directory, suppress=True)
+    first = write_question(directory, {"id": "gen_3000", "metadata": {}}, BODY, None, "gen")
+    second = write_question(directory, {"id": "gen_3001", "metadata": {}}, BODY, None, "gen")
+    flush_writes()
+    assert second == first
+    assert list(iter_question_paths(directory)) == [first]
+    bank._duplicate_checks.pop(directory)
+
+def test_writer_errors_are_raised_on_flush(tmp_path, write_behind):
+    blocked = tmp_path / "file"
+    blocked.write_text("")
+    write_question(str(blocked), {"id": "q", "metadata": {}}, BODY)
+    with pytest.raises(OSError):
+        flush_writes()
+
+def test_background_writes_flush_when_the_block_raises(tmp_path):
+    directory = str(tmp_path)
+    with pytest.raises(RuntimeError):
+        with bank.background_writes():
+            path = write_question(directory, {"id": "q", "metadata": {}}, BODY)
+            raise RuntimeError
+    assert bank._write_behind is None
+    assert load_question(path)[1] == BODY